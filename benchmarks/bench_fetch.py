@@ -0,0 +1,110 @@
+"""
+Benchmarks the fetch path of get_soup_of_page against parsing the decoded text of the response.
+
+The text path is what get_soup_of_page used to do: response.text (which runs the charset detector of requests when the
+server sends no charset), strip() and then BeautifulSoup on the string. The bytes path hands response.content straight to
+the parser with the sniffed encoding. The CPU time and the peak of the allocations are reported per page, both for
+turning the response into the markup the parser reads (decode) and for the whole fetch and parse (total).
+
+Usage: python benchmarks/bench_fetch.py [--pages 50] [--size 100000]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+from bs4.dammit import UnicodeDammit
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from dawson_college_pyscrapper.transport import Transport, use_transport
+from dawson_college_pyscrapper.util import DEFAULT_ENCODING, get_soup_of_page, sniff_encoding
+
+
+def build_page(size: int, declare_charset: bool) -> bytes:
+    """Builds a program page of about the given size in bytes, with accented text as on the French pages."""
+    head = '<head><meta charset="utf-8"><title>Programme</title></head>' if declare_charset else "<head><title>Programme</title></head>"
+    row = '<tr><td class="program-name"><a href="/programs/génie">Génie électrique — diplôme d\'études collégiales</a></td></tr>'
+    rows = row * (size // len(row.encode("utf-8")) + 1)
+    return f'\n  <html>{head}<body><table>{rows}</table><p class="page-mod-date">Last Modified: May 5, 2022</p></body></html>\n'.encode()
+
+
+def build_response(content: bytes) -> Response:
+    """Builds a requests Response as returned by the server, without a charset in its Content-Type."""
+    response = Response()
+    response.status_code = 200
+    response._content = content
+    response.headers = CaseInsensitiveDict({"Content-Type": "text/html"} if b"charset" in content else {})
+    response.encoding = None if b"charset" not in content else "ISO-8859-1"
+    return response
+
+
+class StaticTransport(Transport):
+    """Returns a new response with the same body for every request."""
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def request(self, method, url, **kwargs):
+        return build_response(self.content)
+
+
+def text_markup(content: bytes) -> str:
+    """The markup the previous fetch path handed to the parser."""
+    return build_response(content).text.strip()
+
+
+def bytes_markup(content: bytes) -> str:
+    """The markup the parser decodes from the bytes handed to it by the current fetch path."""
+    response = build_response(content)
+    encoding = sniff_encoding(response.content, response.headers) or DEFAULT_ENCODING
+    return UnicodeDammit(response.content, known_definite_encodings=[encoding], is_html=True).unicode_markup
+
+
+def text_path(content: bytes) -> BeautifulSoup:
+    """The previous fetch path."""
+    return BeautifulSoup(text_markup(content), "html.parser")
+
+
+def bytes_path(content: bytes) -> BeautifulSoup:
+    """The current fetch path."""
+    with use_transport(StaticTransport(content)):
+        return get_soup_of_page("https://www.dawsoncollege.qc.ca/programs/program-name")
+
+
+def measure(function, content: bytes, pages: int):
+    """Returns the CPU seconds and the peak allocated bytes per page of the given function."""
+    function(content)
+
+    started = time.process_time()
+    for _ in range(pages):
+        function(content)
+    cpu_per_page = (time.process_time() - started) / pages
+
+    tracemalloc.start()
+    function(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return cpu_per_page, peak
+
+
+def main():
+    """Runs the benchmark and prints the results."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50, help="Number of pages parsed per measure.")
+    parser.add_argument("--size", type=int, default=100_000, help="Size of a page in bytes.")
+    args = parser.parse_args()
+
+    for label, declare_charset in (("no charset declared", False), ("meta charset declared", True)):
+        content = build_page(args.size, declare_charset)
+        print(f"{label} ({len(content)} bytes per page)")
+        for stage, text_function, bytes_function in (("decode", text_markup, bytes_markup), ("total", text_path, bytes_path)):
+            for name, function in (("text", text_function), ("bytes", bytes_function)):
+                cpu_per_page, peak = measure(function, content, args.pages)
+                print(f"  {stage:>6} {name:>5}: {cpu_per_page * 1000:8.2f} ms CPU, {peak / 1024:8.0f} KiB peak per page")
+
+
+if __name__ == "__main__":
+    main()
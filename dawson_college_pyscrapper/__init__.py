@@ -6,7 +6,7 @@ __author__ = """Jeffrey Boisvert"""
 __email__ = "info.jeffreyboisvert@gmail.com"
 __version__ = "1.1.1"
 
-from . import models, scrapper, exceptions
+from . import models, scrapper, exceptions, checkpoint, transport, refresher, snapshot, distributed, aggregator, archive, connections
 
 # any functions from backend you want to expose should be
 # imported above and added to the list below.
@@ -14,4 +14,12 @@ __all__ = [
     "models",
     "scrapper",
     "exceptions",
+    "checkpoint",
+    "transport",
+    "refresher",
+    "snapshot",
+    "distributed",
+    "aggregator",
+    "archive",
+    "connections",
 ]
@@ -0,0 +1,131 @@
+"""A module which contains the aggregator computing the metrics of a scrape as the programs arrive."""
+
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dawson_college_pyscrapper.models import GeneralMetrics, Program, ScrapeReport
+from dawson_college_pyscrapper.util import parse_modified_date
+
+# The GeneralMetrics field counting each type of program.
+TYPE_FIELDS: Dict[str, str] = {
+    "Program": "number_of_programs",
+    "Profile": "number_of_profiles",
+    "Discipline": "number_of_disciplines",
+    "Special Area of Study": "number_of_special_studies",
+    "General Education": "number_of_general_studies",
+}
+
+
+def _year_of(modified_date: str) -> Optional[str]:
+    """
+    Gets the year a program was last modified.
+
+    :param modified_date: The date as shown on the program page (ex: January 20, 2023) or in ISO 8601 (ex: 2023-01-20).
+    :return: The year (ex: 2023) or None if the date cannot be parsed.
+    """
+    if parsed_date := parse_modified_date(modified_date):
+        return str(parsed_date.year)
+
+    try:
+        return str(datetime.fromisoformat(modified_date.strip()).year)
+    except (AttributeError, ValueError):
+        return None
+
+
+class MetricsAggregator:
+    """
+    Computes the GeneralMetrics of a scrape as the programs are scraped, in constant time per program.
+
+    add is called once per listed program as soon as it is finished (see the on_program argument of get_programs) and
+    snapshot can be called at any time, from any thread, to get the metrics of the programs finished so far.
+
+    :param number_of_students: Number of students to report in the metrics.
+    :param number_of_faculty: Number of faculty to report in the metrics.
+    :param report: The ScrapeReport of the scrape. Once the number of listed programs is known, snapshots report the share of them finished so far as their completeness.
+    """
+
+    def __init__(self, number_of_students: int = 0, number_of_faculty: int = 0, report: Optional[ScrapeReport] = None):
+        """Creates an aggregator without any programs."""
+        self.number_of_students = number_of_students
+        self.number_of_faculty = number_of_faculty
+        self.report = report if report is not None else ScrapeReport()
+
+        self._lock = threading.Lock()
+        self._programs: List[Program] = []
+        self._finished = 0
+        self._type_counts: Counter = Counter()
+        self._year_counts: Counter = Counter()
+
+    def add(self, program: Optional[Program]):
+        """
+        Adds a finished program to the metrics.
+
+        :param program: The program scraped or None if the listed program could not be scraped or is not a valid program.
+        """
+        year = _year_of(program.modified_date) if program else None
+        with self._lock:
+            self._finished += 1
+            if program is None:
+                return
+
+            self._programs.append(program)
+            self._type_counts[program.program_type] += 1
+            if year is not None:
+                self._year_counts[year] += 1
+
+    @property
+    def finished(self) -> int:
+        """
+        The number of listed programs finished so far, whether they could be scraped or not.
+
+        :return: The number of programs added.
+        """
+        return self._finished
+
+    def snapshot(self) -> GeneralMetrics:
+        """
+        Gets the metrics of the programs finished so far.
+
+        :return: A GeneralMetrics with the programs in the order they were added. Its completeness is the share of the listed programs finished so far (1 if the listing is not parsed yet).
+        """
+        with self._lock:
+            listed = self.report.listed
+            completeness = round(min(self._finished / listed, 1.0), 4) if listed else 1.0
+            return self._metrics(list(self._programs), completeness=completeness, skipped_urls=[])
+
+    def result(self, programs: Optional[List[Program]] = None) -> GeneralMetrics:
+        """
+        Gets the final metrics once the scrape is done, without going over the programs again.
+
+        :param programs: The programs to report, in the order they should be reported (ex: listing order). The programs added are used by default.
+        :return: A GeneralMetrics whose completeness and skipped URLs come from the report.
+        """
+        with self._lock:
+            return self._metrics(
+                list(self._programs) if programs is None else programs,
+                completeness=self.report.completeness,
+                skipped_urls=list(self.report.skipped_urls),
+            )
+
+    def _metrics(self, programs: List[Program], completeness: float, skipped_urls: List[str]) -> GeneralMetrics:
+        """
+        Builds the GeneralMetrics from the current counts. The lock must be held.
+
+        :param programs: The programs to report.
+        :param completeness: The completeness to report.
+        :param skipped_urls: The skipped URLs to report.
+        :return: The GeneralMetrics.
+        """
+        return GeneralMetrics(
+            date=datetime.now(),
+            total_programs_offered=len(self._programs),
+            **{field_name: self._type_counts[program_type] for program_type, field_name in TYPE_FIELDS.items()},
+            number_of_students=self.number_of_students,
+            number_of_faculty=self.number_of_faculty,
+            total_year_counts=dict(self._year_counts),
+            programs=programs,
+            completeness=completeness,
+            skipped_urls=skipped_urls,
+        )
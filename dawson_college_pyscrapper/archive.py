@@ -0,0 +1,463 @@
+"""A module which contains the compressed archive of the raw pages fetched by the scrapper."""
+
+import bisect
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from dawson_college_pyscrapper.models import ProgramPageData
+from dawson_college_pyscrapper.transport import RequestsTransport, Transport, use_transport
+from dawson_college_pyscrapper.util import canonicalize_url, extract_program_page, release_soup, soup_from_content
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_MAGIC: bytes = b"DCARCH\x00\x01"
+INDEX_FILE_NAME: str = "index.bin"
+PAGES_FILE_NAME: str = "pages.bin"
+DICTIONARIES_DIRECTORY_NAME: str = "dictionaries"
+# No dictionary was used to compress the page.
+NO_DICTIONARY: int = 0
+
+# url key (the first 8 bytes of the SHA-256 of the URL), fetch time, offset of the entry in the pages file, length of the
+# compressed body, length of the URL, length of the content type and identifier of the dictionary the body is compressed with.
+_INDEX_RECORD = struct.Struct("<QdQIHHI")
+
+
+def _zstandard():
+    """
+    Imports zstandard, which is an optional dependency.
+
+    :return: The zstandard module.
+    :raises ImportError: If zstandard is not installed.
+    """
+    try:
+        import zstandard
+    except ImportError as error:
+        raise ImportError('The page archive needs zstandard, install it with pip install "dawson-college-pyscrapper[archive]"') from error
+
+    return zstandard
+
+
+def _url_key(url: str) -> int:
+    """
+    Gets the key a URL is indexed by.
+
+    :param url: The URL of the page.
+    :return: The first 8 bytes of the SHA-256 of the URL as an integer.
+    """
+    return int.from_bytes(hashlib.sha256(url.encode("utf-8")).digest()[:8], "little")
+
+
+@dataclass(frozen=True)
+class ArchivedPage:
+    """
+    A page stored in the PageArchive.
+
+    :param url: The URL the page was fetched from.
+    :param fetched_at: The time (seconds since the epoch) the page was fetched at.
+    :param content: The raw body of the page.
+    :param content_type: The Content-Type header returned with the page, if any.
+    """
+
+    url: str
+    fetched_at: float
+    content: bytes
+    content_type: str = ""
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """
+        The headers of the page needed to parse it again.
+
+        :return: The Content-Type header of the page, if any.
+        """
+        return {"Content-Type": self.content_type} if self.content_type else {}
+
+
+class _MappedFile:
+    """A read-only memory mapping of a file which only grows, mapped again whenever it grew past the mapping."""
+
+    def __init__(self, path: str):
+        """
+        Creates the mapping. Nothing is mapped until the file is read.
+
+        :param path: The path of the file.
+        """
+        self.path = path
+        self.mapping: Optional[mmap.mmap] = None
+
+    def view(self, end: int) -> mmap.mmap:
+        """
+        Gets the mapping, making sure it covers the file up to the given offset.
+
+        :param end: The offset the mapping must cover.
+        :return: The mapping.
+        """
+        if self.mapping is None or len(self.mapping) < end:
+            with open(self.path, "rb") as mapped_file:
+                mapping = mmap.mmap(mapped_file.fileno(), 0, access=mmap.ACCESS_READ)
+            # The previous mapping is unmapped once the last reader is done with it.
+            self.mapping = mapping
+
+        return self.mapping
+
+    def close(self):
+        """Drops the mapping."""
+        self.mapping = None
+
+
+class PageArchive:
+    """
+    An append-only archive of the raw bodies of fetched pages, so new fields can be extracted later without crawling again.
+
+    The bodies are compressed with zstandard and, once enough pages were archived (see train_after), with a dictionary
+    trained on them: pages of a site share most of their template so a dictionary makes each page compress to little more
+    than what is specific to it. Every version of a page is kept and indexed by URL and fetch time in an append-only index
+    file of fixed-size records. The index file is read once when the archive is opened, into a dict of the versions of
+    every page in memory, so looking a page up never reads the disk. The record and the body of the version found are then
+    read through memory mappings of the index and pages files.
+
+    It is safe to use from many threads of a single process. zstandard must be installed (pip install "dawson-college-pyscrapper[archive]").
+
+    :param directory: The directory the archive is stored in. It is created if it does not exist and loaded if it does.
+    :param level: The zstandard compression level.
+    :param dictionary_size: The maximum size in bytes of the trained dictionary.
+    :param train_after: The number of pages archived without a dictionary after which one is trained. If 0 no dictionary is trained automatically (see train_dictionary).
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike], level: int = 3, dictionary_size: int = 112_640, train_after: int = 64):
+        """Opens (or creates) the archive in the given directory."""
+        self._zstd = _zstandard()
+        self.directory = os.fspath(directory)
+        self.level = level
+        self.dictionary_size = dictionary_size
+        self.train_after = train_after
+
+        self._index_path = os.path.join(self.directory, INDEX_FILE_NAME)
+        self._pages_path = os.path.join(self.directory, PAGES_FILE_NAME)
+        self._dictionaries_directory = os.path.join(self.directory, DICTIONARIES_DIRECTORY_NAME)
+        os.makedirs(self._dictionaries_directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._dictionaries: Dict[int, object] = {}
+        self._decompressors: Dict[int, object] = {}
+        self._dictionary_id = NO_DICTIONARY
+        self._compressor = self._zstd.ZstdCompressor(level=level)
+        # The in-memory index: the (fetch time, record number) of every version of every page, by URL key, sorted by fetch time.
+        self._versions: Dict[int, List[Tuple[float, int]]] = {}
+        self._records = 0
+        self._pages_without_dictionary = 0
+
+        self._load()
+        self._index_map = _MappedFile(self._index_path)
+        self._pages_map = _MappedFile(self._pages_path)
+        self._index_file = open(self._index_path, "ab")
+        self._pages_file = open(self._pages_path, "ab")
+
+    def _load(self):
+        """Loads the dictionaries and the index, dropping a partially written last record."""
+        for file_name in os.listdir(self._dictionaries_directory):
+            dictionary_name, extension = os.path.splitext(file_name)
+            if extension != ".zdict" or not dictionary_name.isdigit() or int(dictionary_name) == NO_DICTIONARY:
+                logger.debug("Ignoring %s which is not a dictionary of the archive", file_name)
+                continue
+
+            with open(os.path.join(self._dictionaries_directory, file_name), "rb") as dictionary_file:
+                self._dictionaries[int(dictionary_name)] = self._zstd.ZstdCompressionDict(dictionary_file.read())
+
+        # The next pages are compressed with the latest dictionary.
+        if self._dictionaries:
+            self._use_dictionary(max(self._dictionaries))
+
+        if not os.path.exists(self._index_path):
+            with open(self._index_path, "wb") as index_file:
+                index_file.write(ARCHIVE_MAGIC)
+            open(self._pages_path, "ab").close()
+            return
+
+        with open(self._index_path, "rb") as index_file:
+            if index_file.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+                raise ValueError(f"{self._index_path} is not the index of a page archive.")
+            index = index_file.read()
+
+        pages_size = os.path.getsize(self._pages_path)
+        complete_records = len(index) // _INDEX_RECORD.size
+        for record_number, record in enumerate(_INDEX_RECORD.iter_unpack(index[: complete_records * _INDEX_RECORD.size])):
+            url_key, fetched_at, offset, body_length, url_length, content_type_length, dictionary_id = record
+            if offset + url_length + content_type_length + body_length > pages_size:
+                complete_records = record_number
+                break
+            bisect.insort(self._versions.setdefault(url_key, []), (fetched_at, record_number))
+            if dictionary_id == NO_DICTIONARY:
+                self._pages_without_dictionary += 1
+
+        if complete_records * _INDEX_RECORD.size != len(index):
+            logger.debug("Dropping %s bytes of partially written index records", len(index) - complete_records * _INDEX_RECORD.size)
+            with open(self._index_path, "r+b") as index_file:
+                index_file.truncate(len(ARCHIVE_MAGIC) + complete_records * _INDEX_RECORD.size)
+
+        self._records = complete_records
+
+    def _use_dictionary(self, dictionary_id: int):
+        """
+        Compresses the next pages with the given dictionary.
+
+        :param dictionary_id: The identifier of a loaded dictionary.
+        """
+        self._dictionary_id = dictionary_id
+        self._compressor = self._zstd.ZstdCompressor(level=self.level, dict_data=self._dictionaries[dictionary_id])
+
+    def _decompressor(self, dictionary_id: int):
+        """
+        Gets the decompressor of the pages compressed with the given dictionary.
+
+        :param dictionary_id: The identifier of the dictionary or NO_DICTIONARY.
+        :return: The decompressor.
+        """
+        if (decompressor := self._decompressors.get(dictionary_id)) is None:
+            dictionary = self._dictionaries[dictionary_id] if dictionary_id != NO_DICTIONARY else None
+            decompressor = self._decompressors[dictionary_id] = self._zstd.ZstdDecompressor(dict_data=dictionary)
+
+        return decompressor
+
+    def __len__(self) -> int:
+        """
+        The number of pages archived, every version counted.
+
+        :return: The number of pages.
+        """
+        return self._records
+
+    def add(self, url: str, content: bytes, content_type: str = "", fetched_at: Optional[float] = None):
+        """
+        Archives a version of a page.
+
+        :param url: The URL the page was fetched from (ex: https://www.dawsoncollege.qc.ca/programs/program-name)
+        :param content: The raw body of the page.
+        :param content_type: The Content-Type header returned with the page, if any.
+        :param fetched_at: The time (seconds since the epoch) the page was fetched at. Now by default.
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        encoded_url = url.encode("utf-8")
+        encoded_content_type = content_type.encode("utf-8")
+
+        with self._lock:
+            body = self._compressor.compress(content)
+            offset = self._pages_file.tell()
+            self._pages_file.write(encoded_url + encoded_content_type + body)
+            self._pages_file.flush()
+
+            url_key = _url_key(url)
+            self._index_file.write(
+                _INDEX_RECORD.pack(url_key, fetched_at, offset, len(body), len(encoded_url), len(encoded_content_type), self._dictionary_id)
+            )
+            self._index_file.flush()
+
+            bisect.insort(self._versions.setdefault(url_key, []), (fetched_at, self._records))
+            self._records += 1
+
+            if self._dictionary_id == NO_DICTIONARY:
+                self._pages_without_dictionary += 1
+                if self.train_after and self._pages_without_dictionary >= self.train_after:
+                    self.train_dictionary()
+
+    def train_dictionary(self, samples: int = 1000) -> bool:
+        """
+        Trains a dictionary on the latest versions of the archived pages and compresses the next pages with it.
+
+        Pages already archived keep the dictionary (or lack of) they were compressed with.
+
+        :param samples: The maximum number of pages to train on.
+        :return: True if a dictionary was trained, False if there are not enough pages to train one.
+        """
+        with self._lock:
+            bodies = [page.content for _, page in zip(range(samples), self.latest_pages())]
+            try:
+                dictionary = self._zstd.train_dictionary(self.dictionary_size, bodies)
+            except self._zstd.ZstdError:
+                logger.debug("Not enough pages to train a dictionary on (%s pages)", len(bodies))
+                return False
+
+            dictionary_id = max(self._dictionaries, default=NO_DICTIONARY) + 1
+            dictionary_path = os.path.join(self._dictionaries_directory, f"{dictionary_id}.zdict")
+            with open(dictionary_path, "wb") as dictionary_file:
+                dictionary_file.write(dictionary.as_bytes())
+                dictionary_file.flush()
+                os.fsync(dictionary_file.fileno())
+
+            self._dictionaries[dictionary_id] = dictionary
+            self._use_dictionary(dictionary_id)
+            logger.debug("Trained the dictionary %s on %s pages", dictionary_id, len(bodies))
+
+        return True
+
+    def _read(self, record_number: int) -> ArchivedPage:
+        """
+        Reads a page of the archive.
+
+        :param record_number: The number of the record of the page in the index.
+        :return: The ArchivedPage.
+        """
+        record_offset = len(ARCHIVE_MAGIC) + record_number * _INDEX_RECORD.size
+        index = self._index_map.view(record_offset + _INDEX_RECORD.size)
+        _, fetched_at, offset, body_length, url_length, content_type_length, dictionary_id = _INDEX_RECORD.unpack_from(index, record_offset)
+
+        body_offset = offset + url_length + content_type_length
+        pages = self._pages_map.view(body_offset + body_length)
+        with self._lock:
+            content = self._decompressor(dictionary_id).decompress(pages[body_offset : body_offset + body_length])
+
+        return ArchivedPage(
+            url=pages[offset : offset + url_length].decode("utf-8"),
+            fetched_at=fetched_at,
+            content=content,
+            content_type=pages[offset + url_length : body_offset].decode("utf-8"),
+        )
+
+    def _versions_of(self, url: str) -> List[Tuple[float, int]]:
+        """
+        Gets the versions of a page.
+
+        :param url: The URL of the page.
+        :return: The (fetch time, record number) of every version of the page, sorted by fetch time.
+        """
+        return self._versions.get(_url_key(url), [])
+
+    def fetch_times(self, url: str) -> List[float]:
+        """
+        Gets the times the versions of a page were fetched at.
+
+        :param url: The URL of the page.
+        :return: The fetch times (seconds since the epoch) from the oldest to the latest.
+        """
+        return [fetched_at for fetched_at, _ in self._versions_of(url)]
+
+    def get(self, url: str, at: Optional[float] = None) -> Optional[ArchivedPage]:
+        """
+        Gets a version of a page.
+
+        :param url: The URL of the page (ex: https://www.dawsoncollege.qc.ca/programs/program-name)
+        :param at: A time (seconds since the epoch). If given, the latest version fetched at or before it is returned instead of the latest version.
+        :return: The ArchivedPage or None if the page (or a version old enough) is not archived.
+        """
+        versions = self._versions_of(url)
+        if at is not None:
+            versions = versions[: bisect.bisect_right(versions, (at, float("inf")))]
+
+        for _, record_number in reversed(versions):
+            if (page := self._read(record_number)).url == url:
+                return page
+
+        return None
+
+    def latest_pages(self) -> Iterator[ArchivedPage]:
+        """
+        Iterates over the latest version of every archived page, in the order they are stored so the pages file is read sequentially.
+
+        :return: An iterator of the ArchivedPage.
+        """
+        latest_records = sorted(versions[-1][1] for versions in self._versions.values())
+        for record_number in latest_records:
+            yield self._read(record_number)
+
+    def close(self):
+        """Closes the files of the archive."""
+        with self._lock:
+            self._index_file.close()
+            self._pages_file.close()
+            self._index_map.close()
+            self._pages_map.close()
+
+    def __enter__(self) -> "PageArchive":
+        """Returns the archive."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Closes the archive."""
+        self.close()
+
+
+class ArchivingTransport(Transport):
+    """
+    A transport which adds the body of every successful GET response going through another transport to a PageArchive.
+
+    :param archive: The archive the pages are added to. It is left open when the transport is done.
+    :param transport: The transport the requests are sent through. The RequestsTransport is used if not provided.
+    """
+
+    def __init__(self, archive: PageArchive, transport: Optional[Transport] = None):
+        """Creates the transport."""
+        self.archive = archive
+        self.transport = transport or RequestsTransport()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Sends the request through the wrapped transport and archives its response if it is a page.
+
+        :param method: The HTTP method of the request (ex: GET).
+        :param url: The URL of the request.
+        :param headers: The headers of the request.
+        :param data: The form data of the request.
+        :param timeout: The number of seconds to wait for the server before giving up.
+        :return: The response of the wrapped transport.
+        """
+        response = self.transport.request(method, url, headers=headers, data=data, timeout=timeout)
+        if method.upper() == "GET" and response.status_code == 200:
+            self.archive.add(canonicalize_url(url), response.content, content_type=response.headers.get("Content-Type") or "")
+
+        return response
+
+    def warm_up(self, urls: Iterable[str], connections: int = 1, timeout: Optional[float] = None) -> List[Future]:
+        """
+        Warms up the connections of the wrapped transport (see Transport.warm_up).
+
+        :param urls: URLs of the hosts to connect to.
+        :param connections: The number of connections opened to each host.
+        :param timeout: The number of seconds to wait for each connection before giving up.
+        :return: One future per connection being opened.
+        """
+        return self.transport.warm_up(urls, connections=connections, timeout=timeout)
+
+    def __enter__(self) -> "ArchivingTransport":
+        """Uses the transport for every request of the scrapper in the current context until the context exits (see use_transport)."""
+        self._using_transport = use_transport(self)
+        return self._using_transport.__enter__()
+
+    def __exit__(self, *exc_info):
+        """Restores the previous transport."""
+        self._using_transport.__exit__(*exc_info)
+
+
+def parse_archived_program_pages(archive: PageArchive, base_url: Optional[str] = None) -> Iterator[Tuple[str, ProgramPageData]]:
+    """
+    Extracts the fields of the latest version of every archived page again, without any request (see extract_program_page).
+
+    The pages are read in the order they are stored and each parse tree is released as soon as its fields are extracted.
+
+    :param archive: The archive of the pages.
+    :param base_url: If given only the pages whose URL starts with it are parsed (ex: https://www.dawsoncollege.qc.ca/programs/).
+    :return: An iterator of the URL and the ProgramPageData of each page.
+    """
+    for page in archive.latest_pages():
+        if base_url and not page.url.startswith(base_url):
+            continue
+
+        html_soup = soup_from_content(page.content, page.headers)
+        try:
+            yield page.url, extract_program_page(html_soup, page.url)
+        finally:
+            release_soup(html_soup)
@@ -0,0 +1,120 @@
+"""A module which contains the on-disk cache of fetched pages."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    """
+    A page stored in the PageCache.
+
+    :param url: The URL the page was fetched from.
+    :param text: The body of the page.
+    :param fetched_at: The time (seconds since the epoch) the page was fetched at.
+    :param etag: The ETag header returned with the page, if any.
+    :param last_modified: The Last-Modified header returned with the page, if any.
+    """
+
+    url: str
+    text: str
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def validators(self) -> Dict[str, str]:
+        """
+        Returns the headers used to ask the server whether the cached page is still valid.
+
+        :return: The conditional request headers (If-None-Match and/or If-Modified-Since) for this page.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+class PageCache:
+    """
+    A cache of fetched pages stored as one JSON file per URL in a directory.
+
+    Pages younger than max_age are served without touching the network. Older pages are revalidated with a conditional
+    request so an unchanged page costs a 304 response instead of a full download.
+
+    :param directory: The directory the pages are stored in. It is created if it does not exist.
+    :param max_age: The number of seconds a cached page is used without being revalidated. If None pages are always revalidated.
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike], max_age: Optional[float] = None):
+        """Creates the cache in the given directory."""
+        self.directory = os.fspath(directory)
+        self.max_age = max_age
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        """
+        Gets the path of the file the page at the given URL is stored in.
+
+        :param url: The URL of the page.
+        :return: The path of the file the page is stored in.
+        """
+        return os.path.join(self.directory, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json")
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """
+        Gets the cached page for the given URL.
+
+        :param url: The URL of the page (ex: https://www.dawsoncollege.qc.ca/programs/program-name)
+        :return: The CachedPage or None if the page is not cached (or the cached file cannot be read).
+        """
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as cached_file:
+                return CachedPage(**json.load(cached_file))
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError):
+            logger.debug("Ignoring unreadable cache entry for %s", url)
+            return None
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        """
+        Whether the cached page can be used without being revalidated.
+
+        :param page: The cached page.
+        :return: True if the page is younger than max_age.
+        """
+        return self.max_age is not None and time.time() - page.fetched_at < self.max_age
+
+    def set(self, url: str, text: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> CachedPage:
+        """
+        Stores the page for the given URL. The file is replaced atomically so concurrent readers never see a partial page.
+
+        :param url: The URL of the page (ex: https://www.dawsoncollege.qc.ca/programs/program-name)
+        :param text: The body of the page.
+        :param etag: The ETag header returned with the page, if any.
+        :param last_modified: The Last-Modified header returned with the page, if any.
+        :return: The CachedPage which was stored.
+        """
+        page = CachedPage(url=url, text=text, fetched_at=time.time(), etag=etag, last_modified=last_modified)
+
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as temporary_file:
+                json.dump(asdict(page), temporary_file, ensure_ascii=False)
+            os.replace(temporary_path, self._path(url))
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+        return page
@@ -0,0 +1,106 @@
+"""A module which contains the journal used to checkpoint and resume long scrapes."""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict
+from typing import Dict, Optional, Set, Union
+
+from dawson_college_pyscrapper.models import Program
+
+logger = logging.getLogger(__name__)
+
+PROGRAM_ENTRY: str = "program"
+FAILURE_ENTRY: str = "failure"
+
+
+class Checkpoint:
+    """
+    An append-only journal of the program pages completed (or failed) during a scrape.
+
+    Each entry is written as a single JSON line as soon as it is known so that a scrape which dies halfway can be
+    resumed by passing the same journal again, only fetching the programs which are missing from it.
+
+    :param path: The path of the journal file. It is created if it does not exist and loaded if it does.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        """Creates the checkpoint and loads any entries already in the journal at the given path."""
+        self.path = os.fspath(path)
+        self.completed: Dict[str, Program] = {}
+        self.failed: Set[str] = set()
+        self._lock = threading.Lock()
+
+        self._load()
+
+    def _load(self):
+        """Loads the entries already in the journal, dropping a partially written last line so the next entry starts on a line of its own."""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as journal:
+            content = journal.read()
+
+        complete_length = content.rfind(b"\n") + 1
+        if complete_length != len(content):
+            logger.debug("Dropping %s bytes of a partially written last entry of %s", len(content) - complete_length, self.path)
+            with open(self.path, "r+b") as journal:
+                journal.truncate(complete_length)
+
+        # The lines are split on newlines only, like they are written, as JSON strings may hold other line separators.
+        for line_number, line in enumerate(content[:complete_length].split(b"\n")[:-1], start=1):
+            try:
+                entry = json.loads(line)
+                if entry["type"] == PROGRAM_ENTRY:
+                    program = Program(**entry["program"])
+                    self.completed[program.url] = program
+                    self.failed.discard(program.url)
+                elif entry["type"] == FAILURE_ENTRY and entry["url"] not in self.completed:
+                    self.failed.add(entry["url"])
+            except (ValueError, KeyError, TypeError):
+                logger.debug("Skipping unreadable entry on line %s of %s", line_number, self.path)
+
+        logger.debug("Loaded %s completed and %s failed programs from %s", len(self.completed), len(self.failed), self.path)
+
+    def _append(self, entry: dict):
+        """
+        Appends an entry to the journal and flushes it to disk right away.
+
+        :param entry: The entry to append.
+        """
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as journal:
+            journal.write(line)
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def get(self, program_url: str) -> Optional[Program]:
+        """
+        Gets the program already completed for the given URL.
+
+        :param program_url: The URL of the program (ex: https://www.dawsoncollege.qc.ca/programs/program-name)
+        :return: The Program from the journal or None if it has not been completed yet.
+        """
+        return self.completed.get(program_url)
+
+    def record_program(self, program: Program):
+        """
+        Records a completed program.
+
+        :param program: The program which was scraped.
+        """
+        self._append({"type": PROGRAM_ENTRY, "program": asdict(program)})
+        with self._lock:
+            self.completed[program.url] = program
+            self.failed.discard(program.url)
+
+    def record_failure(self, program_url: str):
+        """
+        Records a program URL which could not be scraped. It will be tried again when resuming.
+
+        :param program_url: The URL of the program which failed (ex: https://www.dawsoncollege.qc.ca/programs/program-name)
+        """
+        self._append({"type": FAILURE_ENTRY, "url": program_url})
+        with self._lock:
+            self.failed.add(program_url)
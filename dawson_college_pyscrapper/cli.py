@@ -0,0 +1,215 @@
+"""The dawson-scrape command line entry point."""
+
+import argparse
+import cProfile
+import json
+import logging
+import os
+import pstats
+import sys
+from contextlib import nullcontext
+from dataclasses import asdict
+from typing import List, Optional
+
+import pandas as pd
+
+from dawson_college_pyscrapper.cache import PageCache
+from dawson_college_pyscrapper.checkpoint import Checkpoint
+from dawson_college_pyscrapper.connections import DEFAULT_POOL_SIZE, SessionTransport
+from dawson_college_pyscrapper.distributed import SQLiteWorkQueue, run_worker, scrape_distributed
+from dawson_college_pyscrapper.models import GeneralMetrics
+from dawson_college_pyscrapper.profiling import StageTimer, record_stages
+from dawson_college_pyscrapper.scrapper import scrape
+from dawson_college_pyscrapper.transport import RecordingTransport, ReplayTransport
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS: List[str] = ["json", "csv", "parquet"]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the parser of the command line arguments.
+
+    :return: The argument parser of dawson-scrape.
+    """
+    parser = argparse.ArgumentParser(prog="dawson-scrape", description="Scrape the general metrics of Dawson College.")
+    parser.add_argument("-c", "--concurrency", type=int, default=1, help="Number of program pages fetched concurrently (default: 1).")
+    parser.add_argument("-t", "--timeout", type=float, default=30.0, help="Seconds to wait for the server on each request (default: 30).")
+    parser.add_argument("--deadline", type=float, help="Seconds the scrape must complete in. Program pages still pending are skipped.")
+    parser.add_argument("--cache-dir", help="Directory to cache fetched pages in. Cached pages are revalidated with conditional requests.")
+    parser.add_argument("--cache-max-age", type=float, help="Seconds a cached page is used without being revalidated.")
+    parser.add_argument("--checkpoint", help="Journal file used to resume an interrupted scrape.")
+    parser.add_argument("--record", metavar="ARCHIVE", help="Record every request and response of the scrape into this archive.")
+    parser.add_argument("--replay", metavar="ARCHIVE", help="Serve the scrape from an archive written by --record, without any network.")
+    parser.add_argument("--replay-latency", action="store_true", help="Wait for the original latency of each request when replaying.")
+    parser.add_argument(
+        "--warm-up",
+        type=int,
+        default=0,
+        metavar="CONNECTIONS",
+        help="Keep pooled connections and open this many to the site while the listing downloads (default: 0).",
+    )
+    parser.add_argument(
+        "--queue",
+        metavar="DATABASE",
+        help="Coordinate workers on this host through this SQLite queue instead of fetching program pages (not on a network filesystem).",
+    )
+    parser.add_argument("--worker", action="store_true", help="Scrape the program pages enqueued in --queue by a coordinator, then exit.")
+    parser.add_argument("--lease-timeout", type=float, default=120.0, help="Seconds a worker has to scrape a program page (default: 120).")
+    parser.add_argument(
+        "--idle-timeout", type=float, default=0.0, help="Seconds a worker waits for work once the queue is empty (default: 0)."
+    )
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="json", help="Output format (default: json).")
+    parser.add_argument("-o", "--output", help="File to write the output to (default: standard output).")
+    parser.add_argument("--profile", metavar="DIRECTORY", help="Write a per-stage timing breakdown and a cProfile dump to this directory.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable debug logging.")
+
+    return parser
+
+
+def _can_write_parquet() -> bool:
+    """
+    Checks that pyarrow, which is an optional dependency, can be imported, so a scrape is not thrown away when writing its output.
+
+    :return: True if pyarrow is installed.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+
+    return True
+
+
+def write_output(metrics: GeneralMetrics, output_format: str, output: Optional[str]):
+    """
+    Writes the scraped metrics in the given format.
+
+    JSON contains all the metrics while CSV and Parquet contain one row per program.
+
+    :param metrics: The scraped metrics.
+    :param output_format: One of json, csv or parquet.
+    :param output: The file to write to. If None the output is written to standard output (not supported by parquet).
+    """
+    if output_format == "json":
+        text = json.dumps(metrics.to_dict(), indent=2, ensure_ascii=False)
+        if output:
+            with open(output, "w", encoding="utf-8") as output_file:
+                output_file.write(text + "\n")
+        else:
+            print(text)
+        return
+
+    programs_data_frame = pd.DataFrame([asdict(program) for program in metrics.programs])
+    if output_format == "csv":
+        programs_data_frame.to_csv(output or sys.stdout, index=False)
+    else:
+        programs_data_frame.to_parquet(output, index=False)
+
+
+def write_profile(directory: str, profiler: cProfile.Profile, timer: StageTimer):
+    """
+    Writes the per-stage timing breakdown (stages.txt) and the cProfile dump (scrape.pstats) of a scrape.
+
+    :param directory: The directory to write the profile to. It is created if it does not exist.
+    :param profiler: The profiler the scrape ran under.
+    :param timer: The timer the stages of the scrape were recorded in.
+    """
+    os.makedirs(directory, exist_ok=True)
+    profiler.dump_stats(os.path.join(directory, "scrape.pstats"))
+
+    with open(os.path.join(directory, "stages.txt"), "w", encoding="utf-8") as stages_file:
+        stages_file.write(timer.report() + "\n\n")
+        stats = pstats.Stats(profiler, stream=stages_file)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(30)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Runs dawson-scrape.
+
+    :param argv: The command line arguments. If None the arguments of the process are used.
+    :return: The exit code.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.record and args.replay:
+        parser.error("--record and --replay cannot be used together")
+    if args.format == "parquet" and not args.output:
+        parser.error("--output is required when the format is parquet")
+    if args.format == "parquet" and not _can_write_parquet():
+        parser.error('The parquet format needs pyarrow, install it with pip install "dawson-college-pyscrapper[parquet]"')
+    if args.worker and not args.queue:
+        parser.error("--worker requires --queue")
+    if args.warm_up and args.replay:
+        parser.error("--warm-up and --replay cannot be used together")
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+
+    cache = PageCache(args.cache_dir, max_age=args.cache_max_age) if args.cache_dir else None
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+
+    # Only the calling thread is profiled. With --concurrency 1 (the default) the program pages are fetched in it, with more
+    # workers they show up as time waiting on them.
+    profiler = cProfile.Profile() if args.profile else None
+    network_transport = SessionTransport(pool_size=max(args.concurrency, args.warm_up, DEFAULT_POOL_SIZE)) if args.warm_up else None
+    if args.record:
+        transport = RecordingTransport(args.record, transport=network_transport)
+    elif network_transport:
+        transport = network_transport
+    elif args.replay:
+        transport = ReplayTransport(args.replay, replay_latency=args.replay_latency)
+    else:
+        transport = nullcontext()
+
+    if args.worker:
+        with transport, SQLiteWorkQueue(args.queue) as queue:
+            completed = run_worker(
+                queue,
+                max_workers=args.concurrency,
+                lease_timeout=args.lease_timeout,
+                timeout=args.timeout,
+                cache=cache,
+                idle_timeout=args.idle_timeout,
+            )
+        logger.info("Scraped %s program pages", completed)
+        return 0
+
+    with transport, record_stages() as timer:
+        if profiler:
+            profiler.enable()
+        try:
+            if args.queue:
+                with SQLiteWorkQueue(args.queue) as queue:
+                    metrics = scrape_distributed(queue, timeout=args.timeout, cache=cache, checkpoint=checkpoint, deadline=args.deadline)
+            else:
+                metrics = scrape(
+                    checkpoint=checkpoint,
+                    max_workers=args.concurrency,
+                    timeout=args.timeout,
+                    cache=cache,
+                    deadline=args.deadline,
+                    warm_up=args.warm_up,
+                )
+        finally:
+            if profiler:
+                profiler.disable()
+
+    if profiler:
+        write_profile(args.profile, profiler, timer)
+        logger.info("Stage timings:\n%s", timer.report())
+
+    try:
+        write_output(metrics, args.format, args.output)
+    except ImportError as error:
+        parser.error(f"The {args.format} format needs an optional dependency which is not installed: {error}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
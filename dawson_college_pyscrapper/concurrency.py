@@ -0,0 +1,132 @@
+"""A module which contains concurrency helpers used by the scrapper."""
+
+import contextvars
+import threading
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, TypeVar
+from urllib.parse import urlsplit
+
+T = TypeVar("T")
+
+
+class _Call:
+    """A single in-flight call which any number of callers can wait on."""
+
+    def __init__(self):
+        """Creates a call which has not completed yet."""
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key so that only one of them does the actual work.
+
+    While a call for a key is in flight, every other caller asking for that same key blocks and then receives the same
+    result (or the same exception) instead of repeating the work. Once the call completes the key is forgotten, so a
+    later call will do the work again.
+    """
+
+    def __init__(self):
+        """Creates a SingleFlight with no calls in flight."""
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, function: Callable[[], T]) -> T:
+        """
+        Runs the given function for the key unless a call for that key is already in flight, in which case its result is shared.
+
+        :param key: The key identifying the work (ex: a canonical URL).
+        :param function: The function doing the work. It is only called by the first caller of a key.
+        :return: The result of the function.
+        :raises: Any exception raised by the function, re-raised to every caller sharing the call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def in_flight(self) -> int:
+        """
+        Returns the number of keys which currently have a call in flight.
+
+        :return: The number of keys which currently have a call in flight.
+        """
+        with self._lock:
+            return len(self._calls)
+
+
+class HostLimiter:
+    """
+    Caps the number of requests in flight to each host, whichever thread sends them.
+
+    :param max_per_host: The maximum number of requests in flight to a single host.
+    """
+
+    def __init__(self, max_per_host: int):
+        """Creates the limiter with no requests in flight."""
+        if max_per_host < 1:
+            raise ValueError("max_per_host must be at least 1.")
+
+        self.max_per_host = max_per_host
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        """
+        Gets the semaphore of the given host, creating it on first use.
+
+        :param host: The host (ex: www.dawsoncollege.qc.ca).
+        :return: The semaphore of the host.
+        """
+        with self._lock:
+            if (semaphore := self._semaphores.get(host)) is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+
+            return semaphore
+
+    @contextmanager
+    def limit(self, url: str) -> Iterator[None]:
+        """
+        Blocks until a request to the host of the given URL can be sent and holds the slot within the context.
+
+        :param url: The URL of the request (ex: https://www.dawsoncollege.qc.ca/programs).
+        """
+        semaphore = self._semaphore(urlsplit(url).netloc.lower())
+        with semaphore:
+            yield
+
+
+def submit_in_context(executor: Executor, function: Callable[..., T], /, *args: Any, **kwargs: Any) -> "Future[T]":
+    """
+    Submits a task to an executor so that it runs in a copy of the context of the caller (ex: the transport of use_transport).
+
+    :param executor: The executor to run the task on.
+    :param function: The function of the task.
+    :param args: The positional arguments of the function.
+    :param kwargs: The keyword arguments of the function.
+    :return: The future of the task.
+    """
+    return executor.submit(contextvars.copy_context().run, function, *args, **kwargs)
@@ -0,0 +1,447 @@
+"""A module which contains the transport keeping warm connections to the scraped sites."""
+
+import ipaddress
+import logging
+import socket
+import ssl
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import HTTPError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.wait import wait_for_read
+
+from dawson_college_pyscrapper.concurrency import SingleFlight
+from dawson_college_pyscrapper.transport import Transport, use_transport
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DNS_TTL: float = 300.0
+DEFAULT_POOL_SIZE: int = 10
+
+
+class DNSCache:
+    """
+    Caches the addresses hosts resolve to, so connections opened again to the same host skip DNS resolution.
+
+    Concurrent resolutions of the same host share a single lookup. A host whose every address failed to connect is
+    resolved again on the next connection.
+
+    :param ttl: The number of seconds the addresses of a host are used before it is resolved again.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_DNS_TTL):
+        """Creates an empty cache."""
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._addresses: Dict[str, Tuple[float, List[str]]] = {}
+        self._lookups = SingleFlight()
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        """
+        Gets the addresses of a host, resolving it only if it is not cached or its addresses expired.
+
+        :param host: The host name (ex: www.dawsoncollege.qc.ca). IP addresses are returned as is.
+        :param port: The port the connection is opened to.
+        :return: The addresses of the host, in the order they should be tried.
+        :raises OSError: If the host cannot be resolved.
+        """
+        try:
+            ipaddress.ip_address(host.strip("[]"))
+            return [host]
+        except ValueError:
+            pass
+
+        with self._lock:
+            cached = self._addresses.get(host)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        return self._lookups.do(host, lambda: self._lookup(host, port))
+
+    def _lookup(self, host: str, port: int) -> List[str]:
+        """
+        Resolves a host the same way urllib3 does and caches its addresses.
+
+        :param host: The host name.
+        :param port: The port the connection is opened to.
+        :return: The addresses of the host.
+        """
+        addresses = []
+        for *_, socket_address in socket.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM):
+            if socket_address[0] not in addresses:
+                addresses.append(socket_address[0])
+
+        logger.debug("Resolved %s to %s", host, addresses)
+        with self._lock:
+            self._addresses[host] = (time.monotonic() + self.ttl, addresses)
+
+        return addresses
+
+    def forget(self, host: str):
+        """
+        Removes the addresses of a host from the cache.
+
+        :param host: The host name.
+        """
+        with self._lock:
+            self._addresses.pop(host, None)
+
+
+class TLSSessionCache:
+    """
+    Keeps the latest TLS session of every host so a new connection resumes it instead of doing a full handshake.
+
+    With TLS 1.3 the server only sends its session ticket after the handshake, so the sessions are collected from the
+    connections still open whenever one is needed and from every connection as it is closed.
+    """
+
+    def __init__(self):
+        """Creates an empty cache."""
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, ssl.SSLSession] = {}
+        self._sockets: Dict[str, weakref.WeakSet] = {}
+
+    def get(self, hostname: str) -> Optional[ssl.SSLSession]:
+        """
+        Gets the session to resume for a host.
+
+        :param hostname: The name of the server (ex: www.dawsoncollege.qc.ca).
+        :return: The latest session of the host or None if no connection to it got one yet.
+        """
+        with self._lock:
+            sockets = list(self._sockets.get(hostname, ()))
+        for ssl_socket in sockets:
+            self.save(hostname, ssl_socket.session)
+
+        with self._lock:
+            return self._sessions.get(hostname)
+
+    def save(self, hostname: str, session: Optional[ssl.SSLSession]):
+        """
+        Saves the session of a connection, unless it cannot be resumed and the saved one can.
+
+        :param hostname: The name of the server.
+        :param session: The session of the connection, if any.
+        """
+        if session is None:
+            return
+
+        with self._lock:
+            saved_session = self._sessions.get(hostname)
+            if session.has_ticket or saved_session is None or not saved_session.has_ticket:
+                self._sessions[hostname] = session
+
+    def remember(self, hostname: str, ssl_socket: ssl.SSLSocket):
+        """
+        Keeps track of an open connection to collect its session once the server sent it.
+
+        :param hostname: The name of the server.
+        :param ssl_socket: The socket of the connection. It is only referenced weakly.
+        """
+        with self._lock:
+            self._sockets.setdefault(hostname, weakref.WeakSet()).add(ssl_socket)
+        self.save(hostname, ssl_socket.session)
+
+
+class _SessionSavingSocket(ssl.SSLSocket):
+    """A TLS socket which saves its session to the cache of its context when it is closed."""
+
+    def close(self):
+        """Saves the session of the connection and closes it."""
+        if self.server_hostname and isinstance(self.context, _SessionReusingContext):
+            self.context.sessions.save(self.server_hostname, self.session)
+        super().close()
+
+
+class _SessionReusingContext(ssl.SSLContext):
+    """A client TLS context resuming the latest session of the server on every connection it opens."""
+
+    sslsocket_class = _SessionSavingSocket
+    sessions: TLSSessionCache
+
+    def wrap_socket(
+        self, sock, server_side=False, do_handshake_on_connect=True, suppress_ragged_eofs=True, server_hostname=None, session=None
+    ):
+        """Wraps the socket of a new connection, resuming the latest session of the server (see ssl.SSLContext.wrap_socket)."""
+        if session is None and not server_side and server_hostname:
+            session = self.sessions.get(server_hostname)
+
+        ssl_socket = super().wrap_socket(
+            sock,
+            server_side=server_side,
+            do_handshake_on_connect=do_handshake_on_connect,
+            suppress_ragged_eofs=suppress_ragged_eofs,
+            server_hostname=server_hostname,
+            session=session,
+        )
+        if server_hostname and not server_side:
+            self.sessions.remember(server_hostname, ssl_socket)
+
+        return ssl_socket
+
+
+def _session_reusing_context(sessions: TLSSessionCache) -> _SessionReusingContext:
+    """
+    Creates the TLS context of the connections of a SessionTransport.
+
+    The certificates and the hostname are still verified by urllib3, as with the context it creates by default.
+
+    :param sessions: The cache the sessions are resumed from.
+    :return: The TLS context.
+    """
+    context = _SessionReusingContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.sessions = sessions
+
+    return context
+
+
+class _ResolvingConnectionMixin:
+    """Opens the connection to the addresses of the host found in a DNSCache, trying each of them in turn."""
+
+    dns_cache: Optional[DNSCache] = None
+
+    def _new_conn(self):
+        """Opens the socket of the connection."""
+        if self.dns_cache is None:
+            return super()._new_conn()
+
+        host = self._dns_host
+        try:
+            addresses = self.dns_cache.resolve(host, self.port)
+        except OSError as error:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {error}")
+
+        connection_error = None
+        try:
+            for address in addresses:
+                # Only the address connected to changes: the Host header, SNI and certificate checks still use the host.
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except NewConnectionError as error:
+                    connection_error = error
+        finally:
+            self._dns_host = host
+
+        self.dns_cache.forget(host)
+        raise connection_error
+
+
+class _ResolvingHTTPConnection(_ResolvingConnectionMixin, HTTPConnection):
+    """An HTTP connection resolving its host through a DNSCache."""
+
+
+class _ResolvingHTTPSConnection(_ResolvingConnectionMixin, HTTPSConnection):
+    """An HTTPS connection resolving its host through a DNSCache."""
+
+
+class _ResolvingPoolMixin:
+    """Hands the DNSCache of the pool to every connection it creates."""
+
+    dns_cache: Optional[DNSCache] = None
+
+    def _new_conn(self):
+        """Creates a connection of the pool."""
+        connection = super()._new_conn()
+        connection.dns_cache = self.dns_cache
+        return connection
+
+
+class _ResolvingHTTPConnectionPool(_ResolvingPoolMixin, HTTPConnectionPool):
+    """A pool of HTTP connections resolving their host through a DNSCache."""
+
+    ConnectionCls = _ResolvingHTTPConnection
+
+
+class _ResolvingHTTPSConnectionPool(_ResolvingPoolMixin, HTTPSConnectionPool):
+    """A pool of HTTPS connections resolving their host through a DNSCache."""
+
+    ConnectionCls = _ResolvingHTTPSConnection
+
+
+class _ResolvingPoolManager(PoolManager):
+    """A PoolManager whose pools resolve their host through a DNSCache."""
+
+    def __init__(self, *args, dns_cache: DNSCache, **kwargs):
+        """Creates the manager (see urllib3.PoolManager)."""
+        super().__init__(*args, **kwargs)
+        self.dns_cache = dns_cache
+        self.pool_classes_by_scheme = {"http": _ResolvingHTTPConnectionPool, "https": _ResolvingHTTPSConnectionPool}
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        """Creates the pool of a host (see urllib3.PoolManager)."""
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        pool.dns_cache = self.dns_cache
+        return pool
+
+
+class _WarmAdapter(HTTPAdapter):
+    """A requests adapter whose connections resolve their host through a DNSCache and resume TLS sessions."""
+
+    def __init__(self, dns_cache: DNSCache, ssl_context: ssl.SSLContext, pool_size: int):
+        """Creates the adapter."""
+        self.dns_cache = dns_cache
+        self.ssl_context = ssl_context
+        super().__init__(pool_maxsize=pool_size)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        """Creates the pool manager of the adapter (see requests.adapters.HTTPAdapter)."""
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _ResolvingPoolManager(
+            num_pools=connections, maxsize=maxsize, block=block, ssl_context=self.ssl_context, dns_cache=self.dns_cache, **pool_kwargs
+        )
+
+
+def _receive_session_tickets(sock, wait: float):
+    """
+    Reads the session tickets a TLS 1.3 server sends once the handshake is done, before the connection sits idle in its pool.
+
+    urllib3 considers an idle connection with anything to read as dropped by the server, so a connection opened ahead of
+    the requests would otherwise be discarded instead of used. The tickets are also what lets the session be resumed.
+
+    :param sock: The socket of the connection. Nothing is read if it is not a TLS socket.
+    :param wait: The number of seconds to wait for the tickets (ex: the time the handshake took).
+    """
+    if not isinstance(sock, ssl.SSLSocket):
+        return
+
+    timeout = sock.gettimeout()
+    sock.settimeout(0)
+    try:
+        while wait_for_read(sock, timeout=wait):
+            try:
+                if not sock.recv(1):
+                    return
+            except ssl.SSLWantReadError:
+                continue
+    finally:
+        sock.settimeout(timeout)
+
+
+class SessionTransport(Transport):
+    """
+    A transport which sends the requests over pooled persistent connections which can be opened ahead of the requests.
+
+    Hosts are resolved once per dns_ttl and TLS sessions are resumed when a connection to a host is opened again, so
+    reconnecting costs an abbreviated handshake. See warm_up to open connections in the background.
+
+    :param pool_size: The maximum number of idle connections kept per host. It should be at least the number of program pages fetched concurrently.
+    :param dns_ttl: The number of seconds the addresses of a host are used before it is resolved again.
+    :param verify: Whether the certificates of the servers are verified, or the path of the CA bundle to verify them with (see requests).
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, dns_ttl: float = DEFAULT_DNS_TTL, verify: Union[bool, str] = True):
+        """Creates the transport. No connection is opened until a request or a warm up needs it."""
+        self.pool_size = pool_size
+        self.dns_cache = DNSCache(ttl=dns_ttl)
+        self.tls_sessions = TLSSessionCache()
+
+        self.session = requests.Session()
+        self.session.verify = verify
+        # Like the RequestsTransport, no cookie is kept from one request to the next.
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self._adapter = _WarmAdapter(self.dns_cache, _session_reusing_context(self.tls_sessions), pool_size)
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> requests.Response:
+        """
+        Sends the request over a pooled connection.
+
+        :param method: The HTTP method of the request (ex: GET).
+        :param url: The URL of the request.
+        :param headers: The headers of the request.
+        :param data: The form data of the request.
+        :param timeout: The number of seconds to wait for the server before giving up.
+        :return: The requests.Response.
+        """
+        # Passed explicitly, otherwise requests lets REQUESTS_CA_BUNDLE take precedence over the verify of the session.
+        return self.session.request(method, url, headers=headers, data=data, timeout=timeout, verify=self.session.verify)
+
+    def warm_up(self, urls: Iterable[str], connections: int = 1, timeout: Optional[float] = None) -> List[Future]:
+        """
+        Resolves the hosts of the URLs and opens connections to them in the background, ready for the next requests.
+
+        :param urls: URLs of the hosts to connect to (ex: https://www.dawsoncollege.qc.ca). Each host is only warmed up once.
+        :param connections: The number of connections opened to each host, in parallel. It is capped to the pool size.
+        :param timeout: The number of seconds to wait for each connection before giving up.
+        :return: One future per connection, resolving to whether it was opened. A connection which fails to open is only logged.
+        """
+        origins = {}
+        for url in urls:
+            scheme, netloc, *_ = urlsplit(url)
+            origins.setdefault((scheme.lower(), netloc.lower()), url)
+
+        connections = min(connections, self.pool_size)
+        if not origins or connections < 1:
+            return []
+
+        executor = ThreadPoolExecutor(max_workers=len(origins) * connections, thread_name_prefix="warm-up")
+        futures = [executor.submit(self._open_connection, url, timeout) for url in origins.values() for _ in range(connections)]
+        executor.shutdown(wait=False)
+
+        return futures
+
+    def _open_connection(self, url: str, timeout: Optional[float]) -> bool:
+        """
+        Opens a connection to the host of the URL and puts it in its pool.
+
+        :param url: A URL of the host.
+        :param timeout: The number of seconds to wait for the connection before giving up.
+        :return: True if the connection was opened.
+        """
+        # The same proxies and certificate verification as the requests sent to the host.
+        settings = self.session.merge_environment_settings(url, {}, None, self.session.verify, None)
+        try:
+            pool = self._adapter.get_connection(url, settings["proxies"])
+            self._adapter.cert_verify(pool, url, settings["verify"], settings["cert"])
+            connection = pool._get_conn()
+            if timeout is not None:
+                connection.timeout = timeout
+            try:
+                if connection.sock is None:
+                    started = time.monotonic()
+                    connection.connect()
+                    _receive_session_tickets(connection.sock, wait=time.monotonic() - started)
+            finally:
+                pool._put_conn(connection)
+        except (OSError, HTTPError, requests.RequestException):
+            logger.debug("Failed to warm up a connection to %s", url, exc_info=True)
+            return False
+
+        return True
+
+    def close(self):
+        """Closes every pooled connection."""
+        self.session.close()
+
+    def __enter__(self) -> "SessionTransport":
+        """Uses the transport for every request of the scrapper in the current context until the context exits (see use_transport)."""
+        self._using_transport = use_transport(self)
+        return self._using_transport.__enter__()
+
+    def __exit__(self, *exc_info):
+        """Restores the previous transport and closes the connections."""
+        self._using_transport.__exit__(*exc_info)
+        self.close()
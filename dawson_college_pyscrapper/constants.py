@@ -2,9 +2,15 @@
 
 from typing import Dict, Final
 
+from dawson_college_pyscrapper.models import Site
+
 PROGRAMS_LISTING_URL: Final[str] = "https://www.dawsoncollege.qc.ca/programs/alphabetical-listing"
 MAIN_WEBSITE_URL: Final[str] = "https://www.dawsoncollege.qc.ca"
 
+DAWSON_COLLEGE: Final[Site] = Site(
+    name="dawson-college", listing_url=PROGRAMS_LISTING_URL, base_url=MAIN_WEBSITE_URL, include_headcounts=True
+)
+
 DEFAULT_HEADERS: Final[Dict[str, str]] = {
     "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_6) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/56.0.2924.87 Safari/537.36",
     "referrer": "https://google.com",
@@ -0,0 +1,550 @@
+"""A module which contains the coordinator and the workers spreading the program pages of a scrape across threads and processes."""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Union
+
+from bs4 import BeautifulSoup
+
+from dawson_college_pyscrapper.aggregator import MetricsAggregator
+from dawson_college_pyscrapper.cache import PageCache
+from dawson_college_pyscrapper.checkpoint import Checkpoint
+from dawson_college_pyscrapper.concurrency import submit_in_context
+from dawson_college_pyscrapper.constants import DAWSON_COLLEGE
+from dawson_college_pyscrapper.exceptions import PageDetailsError
+from dawson_college_pyscrapper.models import GeneralMetrics, Program, ScrapeReport, Site
+from dawson_college_pyscrapper.profiling import stage
+from dawson_college_pyscrapper.scrapper import (
+    get_program_details,
+    list_programs,
+    scrape_headcounts,
+)
+from dawson_college_pyscrapper.util import bounded_timeout, release_soup, remaining_time
+
+logger = logging.getLogger(__name__)
+
+PENDING: str = "pending"
+LEASED: str = "leased"
+DONE: str = "done"
+FAILED: str = "failed"
+
+
+@dataclass(frozen=True)
+class Lease:
+    """
+    A task leased by a worker. The worker must complete (or fail) it before the lease expires or it is given to another worker.
+
+    :param task_id: The identifier of the task (the canonical URL of the program).
+    :param payload: The payload the task was enqueued with.
+    :param attempt: The number of times the task was leased, this one included.
+    """
+
+    task_id: str
+    payload: dict
+    attempt: int
+
+
+class WorkQueue:
+    """
+    The interface of the queues the coordinator shares the program pages of a scrape with the workers through.
+
+    A task is pending until a worker leases it. A leased task is done once a worker completes it, or pending again once it
+    fails or its lease expires (ex: the worker died), until it used up its attempts and is failed for good.
+    """
+
+    def clear(self):
+        """Removes every task, to start a new scrape."""
+        raise NotImplementedError
+
+    def enqueue(self, task_id: str, payload: dict):
+        """
+        Adds a pending task. Tasks are leased in the order they are enqueued.
+
+        :param task_id: The identifier of the task.
+        :param payload: The payload of the task. It must be serializable to JSON.
+        """
+        raise NotImplementedError
+
+    def lease(self, worker_id: str, lease_timeout: float) -> Optional[Lease]:
+        """
+        Leases the next pending task, or a task whose lease expired.
+
+        :param worker_id: The identifier of the worker leasing the task.
+        :param lease_timeout: The number of seconds the worker has to complete the task.
+        :return: The Lease or None if there is no task to lease right now.
+        """
+        raise NotImplementedError
+
+    def complete(self, task_id: str, worker_id: str, result: dict) -> bool:
+        """
+        Stores the result of a task. The first result stored wins, even if it comes from a worker whose lease expired.
+
+        :param task_id: The identifier of the task.
+        :param worker_id: The identifier of the worker.
+        :param result: The result of the task. It must be serializable to JSON.
+        :return: True if the result was stored, False if the task was already done.
+        """
+        raise NotImplementedError
+
+    def fail(self, task_id: str, worker_id: str, error: str):
+        """
+        Gives a leased task back so it is retried, unless it used up its attempts.
+
+        :param task_id: The identifier of the task.
+        :param worker_id: The identifier of the worker holding the lease.
+        :param error: A description of the error.
+        """
+        raise NotImplementedError
+
+    def results(self) -> Dict[str, Optional[dict]]:
+        """
+        Gets the results of the finished tasks.
+
+        :return: The result of every done task and None for every failed task, by task identifier.
+        """
+        raise NotImplementedError
+
+    def unfinished(self) -> int:
+        """
+        Counts the tasks which are neither done nor failed.
+
+        :return: The number of pending and leased tasks.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Releases the resources of the queue."""
+
+    def __enter__(self) -> "WorkQueue":
+        """Returns the queue."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Closes the queue."""
+        self.close()
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    A WorkQueue stored in a SQLite database, shared by the threads and processes of one host.
+
+    The database is in WAL mode, which relies on shared memory, so every worker must run on the host which owns the file:
+    it must not be opened over a network filesystem. Workers on other machines need a WorkQueue of their own (ex: Redis).
+
+    :param path: The path of the database. It is created if it does not exist.
+    :param name: The name of the queue, so many queues can share one database.
+    :param max_attempts: The number of times a task is leased before it is failed for good.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], name: str = "programs", max_attempts: int = 3):
+        """Opens (or creates) the queue in the database at the given path."""
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1.")
+
+        self.path = os.fspath(path)
+        self.name = name
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "queue TEXT NOT NULL, id TEXT NOT NULL, position INTEGER NOT NULL, payload TEXT NOT NULL, state TEXT NOT NULL, "
+            "worker TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0, result TEXT, error TEXT, PRIMARY KEY (queue, id))"
+        )
+
+    def _transaction(self, statements) -> list:
+        """
+        Runs statements in a single write transaction.
+
+        :param statements: A function given the connection which runs the statements and returns their result.
+        :return: The result of the function.
+        """
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self._connection)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+        return result
+
+    def clear(self):
+        """Removes every task, to start a new scrape."""
+        self._transaction(lambda connection: connection.execute("DELETE FROM tasks WHERE queue = ?", (self.name,)))
+
+    def enqueue(self, task_id: str, payload: dict):
+        """
+        Adds a pending task. Tasks are leased in the order they are enqueued.
+
+        :param task_id: The identifier of the task.
+        :param payload: The payload of the task. It must be serializable to JSON.
+        """
+        self._transaction(
+            lambda connection: connection.execute(
+                "INSERT OR REPLACE INTO tasks (queue, id, position, payload, state) "
+                "VALUES (?, ?, (SELECT COALESCE(MAX(position), 0) + 1 FROM tasks WHERE queue = ?), ?, ?)",
+                (self.name, task_id, self.name, json.dumps(payload), PENDING),
+            )
+        )
+
+    def lease(self, worker_id: str, lease_timeout: float) -> Optional[Lease]:
+        """
+        Leases the next pending task, or a task whose lease expired.
+
+        :param worker_id: The identifier of the worker leasing the task.
+        :param lease_timeout: The number of seconds the worker has to complete the task.
+        :return: The Lease or None if there is no task to lease right now.
+        """
+
+        def statements(connection: sqlite3.Connection) -> Optional[Lease]:
+            now = time.time()
+            connection.execute(
+                "UPDATE tasks SET state = ?, error = 'The lease expired too many times', worker = NULL "
+                "WHERE queue = ? AND state = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, self.name, LEASED, now, self.max_attempts),
+            )
+            row = connection.execute(
+                "SELECT id, payload, attempts FROM tasks WHERE queue = ? AND (state = ? OR (state = ? AND lease_expires < ?)) "
+                "ORDER BY position LIMIT 1",
+                (self.name, PENDING, LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+
+            task_id, payload, attempts = row
+            connection.execute(
+                "UPDATE tasks SET state = ?, worker = ?, lease_expires = ?, attempts = ? WHERE queue = ? AND id = ?",
+                (LEASED, worker_id, now + lease_timeout, attempts + 1, self.name, task_id),
+            )
+
+            return Lease(task_id=task_id, payload=json.loads(payload), attempt=attempts + 1)
+
+        return self._transaction(statements)
+
+    def complete(self, task_id: str, worker_id: str, result: dict) -> bool:
+        """
+        Stores the result of a task. The first result stored wins, even if it comes from a worker whose lease expired.
+
+        :param task_id: The identifier of the task.
+        :param worker_id: The identifier of the worker.
+        :param result: The result of the task. It must be serializable to JSON.
+        :return: True if the result was stored, False if the task was already done.
+        """
+        cursor = self._transaction(
+            lambda connection: connection.execute(
+                "UPDATE tasks SET state = ?, worker = ?, lease_expires = NULL, result = ?, error = NULL "
+                "WHERE queue = ? AND id = ? AND state != ?",
+                (DONE, worker_id, json.dumps(result), self.name, task_id, DONE),
+            )
+        )
+
+        return cursor.rowcount == 1
+
+    def fail(self, task_id: str, worker_id: str, error: str):
+        """
+        Gives a leased task back so it is retried, unless it used up its attempts.
+
+        :param task_id: The identifier of the task.
+        :param worker_id: The identifier of the worker holding the lease.
+        :param error: A description of the error.
+        """
+        self._transaction(
+            lambda connection: connection.execute(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, worker = NULL, lease_expires = NULL, error = ? "
+                "WHERE queue = ? AND id = ? AND state = ? AND worker = ?",
+                (self.max_attempts, FAILED, PENDING, error, self.name, task_id, LEASED, worker_id),
+            )
+        )
+
+    def results(self) -> Dict[str, Optional[dict]]:
+        """
+        Gets the results of the finished tasks.
+
+        :return: The result of every done task and None for every failed task, by task identifier.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, state, result FROM tasks WHERE queue = ? AND state IN (?, ?)", (self.name, DONE, FAILED)
+            ).fetchall()
+
+        return {task_id: json.loads(result) if state == DONE else None for task_id, state, result in rows}
+
+    def unfinished(self) -> int:
+        """
+        Counts the tasks which are neither done nor failed.
+
+        :return: The number of pending and leased tasks.
+        """
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM tasks WHERE queue = ? AND state IN (?, ?)", (self.name, PENDING, LEASED)
+            ).fetchone()
+
+        return count
+
+    def close(self):
+        """Closes the connection to the database."""
+        with self._lock:
+            self._connection.close()
+
+
+def enqueue_programs(
+    queue: WorkQueue,
+    site: Site = DAWSON_COLLEGE,
+    timeout: Optional[float] = None,
+    cache: Optional[PageCache] = None,
+    checkpoint: Optional[Checkpoint] = None,
+) -> List[Union[Program, str]]:
+    """
+    Parses the programs listing and enqueues a task for every program page to fetch, replacing any previous tasks.
+
+    The listing row of each program is serialized into its task so workers never fetch the listing themselves.
+
+    :param queue: The queue shared with the workers.
+    :param site: The site whose programs listing is scraped. Dawson College by default.
+    :param timeout: The number of seconds to wait for the server before giving up. If not provided, it will wait forever.
+    :param cache: An optional PageCache to fetch the listing through.
+    :param checkpoint: An optional Checkpoint journal. Programs already completed in it are not enqueued.
+    :return: In listing order, the Program already completed in the checkpoint or the URL of the program enqueued.
+    """
+    slots = list_programs(site, timeout=timeout, cache=cache, checkpoint=checkpoint)
+
+    queue.clear()
+    listed = []
+    for slot in slots:
+        if isinstance(slot, Program):
+            listed.append(slot)
+            continue
+
+        program_url, listed_program = slot
+        queue.enqueue(program_url, {"url": program_url, "listing": str(listed_program)})
+        listed_program.decompose()
+        listed.append(program_url)
+
+    logger.debug("Enqueued %s program pages", sum(1 for slot in listed if not isinstance(slot, Program)))
+
+    return listed
+
+
+def _collect_result(program_url: str, result: Optional[dict], checkpoint: Optional[Checkpoint]) -> Optional[Program]:
+    """
+    Gets the program of a finished task, recording it (or the failure) in the checkpoint if one is given.
+
+    :param program_url: The URL of the program of the task.
+    :param result: The result of the task, or None if it failed for good.
+    :param checkpoint: An optional Checkpoint journal to record the program (or the failure) in.
+    :return: The Program or None if it could not be scraped or is not a valid program.
+    """
+    if result is None or result["failed"]:
+        logger.debug("Failed to scrape %s", program_url)
+        if checkpoint:
+            checkpoint.record_failure(program_url)
+        return None
+
+    program = Program(**result["program"]) if result["program"] else None
+    if program and checkpoint:
+        checkpoint.record_program(program)
+
+    return program
+
+
+def collect_programs(
+    queue: WorkQueue,
+    listed: List[Union[Program, str]],
+    deadline: Optional[float] = None,
+    poll_interval: float = 1.0,
+    checkpoint: Optional[Checkpoint] = None,
+    report: Optional[ScrapeReport] = None,
+    on_program: Optional[Callable[[Optional[Program]], None]] = None,
+) -> List[Program]:
+    """
+    Waits for the workers to finish the tasks enqueued by enqueue_programs and merges their results.
+
+    :param queue: The queue shared with the workers.
+    :param listed: The programs returned by enqueue_programs.
+    :param deadline: An optional number of seconds to wait for. The programs still unfinished once it is reached are skipped.
+    :param poll_interval: The number of seconds between two checks of the queue.
+    :param checkpoint: An optional Checkpoint journal every program scraped (or failed) is appended to as soon as its task is finished.
+    :param report: An optional ScrapeReport filled in with the number of listed programs and the URLs skipped because of the deadline.
+    :param on_program: An optional function called with each listed program as soon as it is finished, or None if it could not be scraped or is not a valid program (see get_programs).
+    :return: The programs in listing order.
+    """
+    deadline_at = time.monotonic() + deadline if deadline is not None else None
+    if report is not None:
+        report.listed = len(listed)
+
+    if on_program:
+        for slot in listed:
+            if isinstance(slot, Program):
+                on_program(slot)
+
+    # Each result is journaled as soon as it is seen, so the work of the workers survives a crash of the coordinator.
+    finished: Dict[str, Optional[Program]] = {}
+    waiting = {slot for slot in listed if not isinstance(slot, Program)}
+    with stage("program_pages"):
+        while True:
+            results = queue.results()
+            for program_url in waiting & results.keys():
+                program = finished[program_url] = _collect_result(program_url, results[program_url], checkpoint)
+                if on_program:
+                    on_program(program)
+            waiting -= results.keys()
+
+            remaining = remaining_time(deadline_at)
+            if not waiting or remaining == 0:
+                break
+            time.sleep(poll_interval if remaining is None else min(poll_interval, remaining))
+
+    programs = []
+    skipped_urls = []
+    for slot in listed:
+        if isinstance(slot, Program):
+            programs.append(slot)
+        elif slot not in finished:
+            skipped_urls.append(slot)
+        elif finished[slot]:
+            programs.append(finished[slot])
+
+    if skipped_urls:
+        logger.warning("The deadline was reached before %s of the %s listed programs were scraped", len(skipped_urls), len(listed))
+
+    if report is not None:
+        report.skipped_urls = skipped_urls
+
+    return programs
+
+
+def scrape_distributed(
+    queue: WorkQueue,
+    site: Site = DAWSON_COLLEGE,
+    timeout: Optional[float] = None,
+    cache: Optional[PageCache] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    deadline: Optional[float] = None,
+    poll_interval: float = 1.0,
+) -> GeneralMetrics:
+    """
+    Scrapes like scrape but as the coordinator of workers running run_worker, possibly in other processes.
+
+    The coordinator fetches the listing (and the headcounts), enqueues the program pages and merges the results of the
+    workers into one GeneralMetrics. It does not fetch any program page itself.
+
+    :param queue: The queue shared with the workers.
+    :param site: The site to scrape. Dawson College by default.
+    :param timeout: The number of seconds to wait for the server on each request of the coordinator before giving up.
+    :param cache: An optional PageCache to fetch the listing through.
+    :param checkpoint: An optional Checkpoint journal. Programs already completed in it are not enqueued and the results of the workers are appended to it.
+    :param deadline: An optional number of seconds the scrape should complete in. Program pages still unfinished when it is reached are skipped.
+    :param poll_interval: The number of seconds between two checks of the queue.
+    :return: A GeneralMetrics object with all the data scrapped from the website.
+    """
+    aggregator = MetricsAggregator()
+    deadline_at = time.monotonic() + deadline if deadline is not None else None
+
+    if site.include_headcounts:
+        scrape_headcounts(aggregator, timeout=timeout, deadline_at=deadline_at)
+
+    listed = enqueue_programs(queue, site=site, timeout=bounded_timeout(timeout, deadline_at), cache=cache, checkpoint=checkpoint)
+
+    programs = collect_programs(
+        queue,
+        listed,
+        deadline=remaining_time(deadline_at),
+        poll_interval=poll_interval,
+        checkpoint=checkpoint,
+        report=aggregator.report,
+        on_program=aggregator.add,
+    )
+
+    with stage("aggregation"):
+        return aggregator.result(programs)
+
+
+def _run_task(payload: dict, timeout: Optional[float], cache: Optional[PageCache]) -> dict:
+    """
+    Scrapes the program page of a task.
+
+    :param payload: The payload of the task, as enqueued by enqueue_programs.
+    :param timeout: The number of seconds to wait for the server before giving up.
+    :param cache: An optional PageCache to fetch the program page through.
+    :return: The result of the task: the program as a dict (or None if it is not a valid program) and whether the page could not be fetched.
+    """
+    listing_soup = BeautifulSoup(payload["listing"], "html.parser")
+    try:
+        listed_program = listing_soup.find("tr") or listing_soup
+        program = get_program_details(payload["url"], listed_program, timeout=timeout, cache=cache)
+    except PageDetailsError:
+        return {"program": None, "failed": True}
+    finally:
+        release_soup(listing_soup)
+
+    return {"program": asdict(program) if program else None, "failed": False}
+
+
+def run_worker(
+    queue: WorkQueue,
+    worker_id: Optional[str] = None,
+    max_workers: int = 1,
+    lease_timeout: float = 60.0,
+    timeout: Optional[float] = None,
+    cache: Optional[PageCache] = None,
+    idle_timeout: float = 0.0,
+    poll_interval: float = 1.0,
+) -> int:
+    """
+    Leases program pages from the queue, scrapes them and pushes the results back until there is no work left.
+
+    A page which cannot be fetched is a result like any other (the program is failed). Any other error gives the task back
+    to be retried by any worker. If the worker dies, its tasks are leased again once their lease expires.
+
+    :param queue: The queue shared with the coordinator.
+    :param worker_id: The identifier of the worker. By default it is made of the host name and the process identifier.
+    :param max_workers: The number of program pages scraped concurrently by this worker.
+    :param lease_timeout: The number of seconds a task is leased for. It must be longer than a program page takes to scrape or the page will be scraped twice.
+    :param timeout: The number of seconds to wait for the server on each request before giving up. If not provided, it will wait forever.
+    :param cache: An optional PageCache to fetch the program pages through.
+    :param idle_timeout: The number of seconds to keep waiting for work once the queue is empty (ex: when started before the coordinator).
+    :param poll_interval: The number of seconds between two attempts to lease a task when there is none.
+    :return: The number of tasks completed by this worker.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+
+    def work(thread_number: int) -> int:
+        thread_worker_id = f"{worker_id}-{thread_number}"
+        completed = 0
+        idle_since = None
+        while True:
+            if not (lease := queue.lease(thread_worker_id, lease_timeout)):
+                idle_since = idle_since or time.monotonic()
+                if not queue.unfinished() and time.monotonic() - idle_since >= idle_timeout:
+                    return completed
+                time.sleep(poll_interval)
+                continue
+
+            idle_since = None
+            try:
+                result = _run_task(lease.payload, timeout=timeout, cache=cache)
+            except Exception as error:
+                logger.exception("Failed to scrape %s (attempt %s)", lease.task_id, lease.attempt)
+                queue.fail(lease.task_id, thread_worker_id, repr(error))
+                continue
+
+            if queue.complete(lease.task_id, thread_worker_id, result):
+                completed += 1
+
+    if max_workers == 1:
+        return work(0)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [submit_in_context(executor, work, index) for index in range(max_workers)]
+        return sum(future.result() for future in futures)
@@ -11,3 +11,49 @@ class PageDetailsError(Exception):
         :return: A string representation of the exception.
         """
         return "Could not get page details."
+
+
+class RecordingNotFoundError(PageDetailsError):
+    """An exception which is used to indicate that a replayed request was never recorded."""
+
+    def __init__(self, method: str, url: str):
+        """
+        Creates the exception for the request which was not recorded.
+
+        :param method: The HTTP method of the request (ex: GET).
+        :param url: The URL of the request.
+        """
+        super().__init__(method, url)
+        self.method = method
+        self.url = url
+
+    def __str__(self) -> str:
+        """
+        A string representation of the exception.
+
+        :return: A string representation of the exception.
+        """
+        return f"No recorded response for {self.method} {self.url}."
+
+
+class SnapshotFormatError(Exception):
+    """An exception which is used to indicate that a file is not a readable metrics snapshot."""
+
+    def __init__(self, path: str, reason: str):
+        """
+        Creates the exception for the snapshot which could not be read.
+
+        :param path: The path of the snapshot file.
+        :param reason: Why the snapshot could not be read.
+        """
+        super().__init__(path, reason)
+        self.path = path
+        self.reason = reason
+
+    def __str__(self) -> str:
+        """
+        A string representation of the exception.
+
+        :return: A string representation of the exception.
+        """
+        return f"Could not read the snapshot {self.path}: {self.reason}."
@@ -0,0 +1,190 @@
+"""A module which contains the engine extracting many fields from a page in a single traversal."""
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import chain
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from bs4 import BeautifulSoup, Tag
+
+# A selector is an optional tag name followed by any number of .class and [attribute], [attribute=value] or [attribute^=prefix] parts.
+_SELECTOR_PART = re.compile(r"""\.(?P<class_name>[\w-]+)|\[(?P<attribute>[\w-]+)(?:(?P<operator>\^?=)["']?(?P<value>[^\]"']*)["']?)?\]""")
+_TAG_NAME = re.compile(r"[a-zA-Z][\w-]*")
+
+
+@dataclass(frozen=True)
+class Selector:
+    """
+    A compiled selector matching a single element, a small subset of CSS selectors (no combinators).
+
+    :param tag: The name of the tag to match or None to match any tag.
+    :param classes: The classes the element must all have.
+    :param attributes: The (name, operator, value) of the attributes the element must have. The operator is None to only require the attribute, = for an exact value or ^= for a prefix.
+    """
+
+    tag: Optional[str] = None
+    classes: FrozenSet[str] = frozenset()
+    attributes: Tuple[Tuple[str, Optional[str], Optional[str]], ...] = ()
+
+    def matches(self, element: Tag) -> bool:
+        """
+        Whether the element matches the selector.
+
+        :param element: The element to test.
+        :return: True if the element matches the selector.
+        """
+        if self.tag is not None and element.name != self.tag:
+            return False
+
+        if self.classes and not self.classes.issubset(element.get("class") or ()):
+            return False
+
+        for name, operator, value in self.attributes:
+            if (actual := element.get(name)) is None:
+                return False
+            if isinstance(actual, list):
+                actual = " ".join(actual)
+            if operator == "=" and actual != value:
+                return False
+            if operator == "^=" and not actual.startswith(value):
+                return False
+
+        return True
+
+
+@lru_cache(maxsize=None)
+def compile_selector(selector: str) -> Selector:
+    """
+    Compiles a selector such as h1, .page-mod-date, meta[name=description] or a[href^=mailto:]. Compiled selectors are cached.
+
+    :param selector: The selector to compile.
+    :return: The compiled Selector.
+    :raises ValueError: If the selector is not supported.
+    """
+    text = selector.strip()
+    tag = None
+    if tag_match := _TAG_NAME.match(text):
+        tag = tag_match.group(0).lower()
+        text = text[tag_match.end() :]
+
+    classes = []
+    attributes = []
+    position = 0
+    while position < len(text):
+        if not (part := _SELECTOR_PART.match(text, position)):
+            raise ValueError(f"Unsupported selector: {selector}")
+
+        if part.group("class_name"):
+            classes.append(part.group("class_name"))
+        else:
+            attributes.append((part.group("attribute").lower(), part.group("operator"), part.group("value")))
+        position = part.end()
+
+    if tag is None and not classes and not attributes:
+        raise ValueError(f"Unsupported selector: {selector}")
+
+    return Selector(tag=tag, classes=frozenset(classes), attributes=tuple(attributes))
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    A field to extract from a page.
+
+    :param name: The name of the field.
+    :param selector: The selector of the elements the field is extracted from (ex: meta[name=description]).
+    :param attribute: The attribute holding the value. If None the text of the element is used.
+    :param many: Whether every matching element is extracted (as a list) or only the first one.
+    :param transform: An optional function applied to every extracted value.
+    """
+
+    name: str
+    selector: str
+    attribute: Optional[str] = None
+    many: bool = False
+    transform: Optional[Callable[[str], str]] = None
+    compiled: Selector = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        """Compiles the selector once, when the field is defined."""
+        object.__setattr__(self, "compiled", compile_selector(self.selector))
+
+    def value_of(self, element: Tag) -> Optional[str]:
+        """
+        Gets the value of the field from a matching element.
+
+        :param element: The matching element.
+        :return: The value or None if the element has no value for the field.
+        """
+        if self.attribute is None:
+            value = element.get_text(" ", strip=True)
+        elif (value := element.get(self.attribute)) is None:
+            return None
+        elif isinstance(value, list):
+            value = " ".join(value)
+
+        value = value.strip()
+        if self.transform:
+            value = self.transform(value)
+
+        return value or None
+
+
+class Extractor:
+    """
+    Extracts many fields from a page in a single traversal of its tree.
+
+    The fields are indexed by tag name when they are defined so every element is only tested against the fields which
+    can match it. The traversal stops early once every single-valued field is found, unless a field collects many values.
+
+    :param fields: The fields to extract.
+    """
+
+    def __init__(self, fields: List[Field]):
+        """Creates the extractor and indexes the fields."""
+        if len({extracted_field.name for extracted_field in fields}) != len(fields):
+            raise ValueError("The names of the fields must be unique.")
+
+        self.fields = list(fields)
+        self._fields_by_tag: Dict[str, List[Field]] = {}
+        self._fields_for_any_tag: List[Field] = []
+        for extracted_field in self.fields:
+            if extracted_field.compiled.tag is None:
+                self._fields_for_any_tag.append(extracted_field)
+            else:
+                self._fields_by_tag.setdefault(extracted_field.compiled.tag, []).append(extracted_field)
+        self._collects_many = any(extracted_field.many for extracted_field in self.fields)
+
+    def extract(self, html_soup: Union[BeautifulSoup, Tag]) -> Dict[str, Union[Optional[str], List[str]]]:
+        """
+        Extracts the fields from the given tree.
+
+        :param html_soup: The tree to extract the fields from.
+        :return: The value of every field by name: the first value (or None) for single-valued fields, the list of values for the others.
+        """
+        values: Dict[str, Union[Optional[str], List[str]]] = {
+            extracted_field.name: [] if extracted_field.many else None for extracted_field in self.fields
+        }
+        missing = sum(1 for extracted_field in self.fields if not extracted_field.many)
+
+        for element in html_soup.descendants:
+            if not isinstance(element, Tag):
+                continue
+
+            for extracted_field in chain(self._fields_by_tag.get(element.name, ()), self._fields_for_any_tag):
+                if not extracted_field.many and values[extracted_field.name] is not None:
+                    continue
+                if not extracted_field.compiled.matches(element) or (value := extracted_field.value_of(element)) is None:
+                    continue
+
+                if extracted_field.many:
+                    values[extracted_field.name].append(value)
+                else:
+                    values[extracted_field.name] = value
+                    missing -= 1
+
+            if not missing and not self._collects_many:
+                break
+
+        return values
@@ -1,8 +1,25 @@
 """Data models for Dawson College PyScrapper."""
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from typing import List
+from typing import List, Tuple
+
+
+@dataclass(frozen=True)
+class Site:
+    """
+    Represents a website listing programs with the same layout as the Dawson College programs listing.
+
+    :param name: Name of the site (ex: dawson-college). It is used as the key of the results of a batch scrape.
+    :param listing_url: URL of the page listing all the programs (ex: https://www.dawsoncollege.qc.ca/programs/alphabetical-listing)
+    :param base_url: URL the relative program URLs of the listing are resolved against (ex: https://www.dawsoncollege.qc.ca)
+    :param include_headcounts: Whether the number of students and faculty of Dawson College should be scraped along with the programs.
+    """
+
+    name: str
+    listing_url: str
+    base_url: str
+    include_headcounts: bool = False
 
 
 @dataclass(frozen=True)
@@ -14,12 +31,20 @@ class Program:
     :param modified_date: Date when the program was last modified (ex: 2021-01-01).
     :param program_type: Type of the program (ex: Certificate, Diploma, etc.).
     :param url: URL of the program (ex: https://www.dawsoncollege.qc.ca/programs/program-name)
+    :param description: Description of the program from its page, if any.
+    :param program_code: Code of the program (ex: 420.B0), if shown on its page.
+    :param campus: Campus the program is given at, if shown on its page.
+    :param contact: Email address to contact about the program, if shown on its page.
     """
 
     name: str
     modified_date: str
     program_type: str
     url: str
+    description: str = ""
+    program_code: str = ""
+    campus: str = ""
+    contact: str = ""
 
 
 @dataclass(frozen=True)
@@ -38,6 +63,8 @@ class GeneralMetrics:
     :param number_of_faculty: Number of faculty at Dawson College.
     :param total_year_counts: Number of programs offered per year. This will be a dict object formatted as follows: {year: number_of_programs_offered}.
     :param programs: List of programs offered at Dawson College with additional details.
+    :param completeness: Share (from 0 to 1) of the listed programs whose page was scraped before the deadline of the scrape.
+    :param skipped_urls: URLs of the listed programs which were skipped because the deadline of the scrape was reached.
     """
 
     date: datetime
@@ -54,6 +81,9 @@ class GeneralMetrics:
     total_year_counts: dict
     programs: List[Program]
 
+    completeness: float = 1.0
+    skipped_urls: List[str] = field(default_factory=list)
+
     def __post_init__(self):
         """Ran after the __init__ method. This is used to convert the programs list to a list of Program objects."""
         for i in range(len(self.programs)):
@@ -65,10 +95,24 @@ class GeneralMetrics:
         """
         Returns the number of students per faculty at Dawson College.
 
-        :return: Number of students per faculty ratio at Dawson College rounded to 2 decimal places.
+        :return: Number of students per faculty ratio at Dawson College rounded to 2 decimal places, or 0.0 if the number of faculty is unknown (ex: a site without headcounts).
         """
+        if not self.number_of_faculty:
+            return 0.0
+
         return round((self.number_of_students / self.number_of_faculty), 2)
 
+    def to_dict(self) -> dict:
+        """
+        Returns the metrics as a dict which can be serialized to JSON.
+
+        :return: The metrics as a dict with the date formatted in ISO 8601 and the programs as dicts.
+        """
+        data = asdict(self)
+        data["date"] = self.date.isoformat()
+
+        return data
+
     @property
     def programs_sorted(self) -> List[Program]:
         """
@@ -83,12 +127,49 @@ class GeneralMetrics:
         )
 
 
+@dataclass
+class ScrapeReport:
+    """
+    Collects how much of the listing a scrape got through. It is filled in by get_programs as the scrape goes.
+
+    :param listed: Number of distinct programs listed.
+    :param skipped_urls: URLs of the listed programs which were skipped because the deadline was reached.
+    """
+
+    listed: int = 0
+    skipped_urls: List[str] = field(default_factory=list)
+
+    @property
+    def completeness(self) -> float:
+        """
+        Returns the share of the listed programs which were not skipped.
+
+        :return: The share (from 0 to 1) of the listed programs which were not skipped. 1 if no programs were listed.
+        """
+        if not self.listed:
+            return 1.0
+
+        return round((self.listed - len(self.skipped_urls)) / self.listed, 4)
+
+
 @dataclass(frozen=True)
 class ProgramPageData:
     """
     A dataclass that represents the data that is scraped from a program page.
 
     :param date: Date when the page was modified (ex: 2021-01-01).
+    :param title: Title of the page.
+    :param description: Description of the page (from its description meta tag).
+    :param program_code: Code of the program (ex: 420.B0).
+    :param campus: Campus the program is given at.
+    :param contact: Email address to contact about the program.
+    :param outbound_links: Canonical URLs of the links on the page which lead to other websites, in the order they appear.
     """
 
     date: str
+    title: str = ""
+    description: str = ""
+    program_code: str = ""
+    campus: str = ""
+    contact: str = ""
+    outbound_links: Tuple[str, ...] = ()
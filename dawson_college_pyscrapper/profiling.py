@@ -0,0 +1,75 @@
+"""A module which contains helpers to time the stages of a scrape."""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+_current_timer: ContextVar[Optional["StageTimer"]] = ContextVar("current_stage_timer", default=None)
+
+
+class StageTimer:
+    """Accumulates the wall clock time spent in each named stage of a scrape."""
+
+    def __init__(self):
+        """Creates a timer with no stages recorded."""
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str, duration: float):
+        """
+        Adds the duration of one run of a stage.
+
+        :param name: The name of the stage (ex: program_pages).
+        :param duration: The number of seconds the stage took.
+        """
+        self.durations[name] = self.durations.get(name, 0.0) + duration
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def report(self) -> str:
+        """
+        Returns a human readable breakdown of the time spent per stage.
+
+        :return: One line per stage with its total time, number of runs and share of the total time.
+        """
+        total = sum(self.durations.values()) or 1.0
+        width = max((len(name) for name in self.durations), default=0)
+        lines = [
+            f"{name:<{width}}  {duration:9.3f}s  {self.counts[name]:6d} run(s)  {duration / total:6.1%}"
+            for name, duration in sorted(self.durations.items(), key=lambda item: item[1], reverse=True)
+        ]
+
+        return "\n".join(lines)
+
+
+@contextmanager
+def record_stages() -> Iterator[StageTimer]:
+    """
+    Records the duration of every stage ran within the context.
+
+    :return: The StageTimer which the stages are recorded in.
+    """
+    timer = StageTimer()
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Times the code within the context as the given stage. This is a no-op unless stages are being recorded.
+
+    :param name: The name of the stage (ex: listing_page).
+    """
+    if (timer := _current_timer.get()) is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - start)
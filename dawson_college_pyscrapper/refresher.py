@@ -0,0 +1,217 @@
+"""A module which contains a background refresher keeping the latest metrics in memory."""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Union
+
+from dawson_college_pyscrapper.concurrency import SingleFlight
+from dawson_college_pyscrapper.models import GeneralMetrics
+from dawson_college_pyscrapper.scrapper import scrape
+from dawson_college_pyscrapper.snapshot import write_snapshot
+
+logger = logging.getLogger(__name__)
+
+_REFRESH_KEY: str = "refresh"
+
+
+class MetricsRefresher:
+    """
+    Keeps the latest GeneralMetrics in memory and refreshes them on a schedule in a background thread.
+
+    Reads always return the current snapshot right away, even while a refresh is running (stale-while-revalidate).
+    Refreshes triggered while another one is in flight wait for it and share its result instead of starting a second
+    crawl. A failed refresh is logged and the previous snapshot is kept.
+
+    :param interval: The number of seconds between the end of a refresh and the start of the next one.
+    :param snapshot_path: An optional path every new snapshot is published to (see write_snapshot) so that other processes can map it with SnapshotReader instead of scraping on their own.
+    :param scrape_kwargs: The keyword arguments passed to scrape on every refresh (ex: max_workers=8, deadline=60). The programs of the current snapshot are passed as known_programs.
+    """
+
+    def __init__(self, interval: float, snapshot_path: Optional[Union[str, os.PathLike]] = None, **scrape_kwargs):
+        """Creates the refresher. Nothing is scraped until start or refresh is called."""
+        self.interval = interval
+        self.snapshot_path = snapshot_path
+        self.scrape_kwargs = scrape_kwargs
+        self.last_refreshed: Optional[float] = None
+        self.last_error: Optional[BaseException] = None
+
+        self._snapshot: Optional[GeneralMetrics] = None
+        self._has_snapshot = threading.Event()
+        self._flight = SingleFlight()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def get(self) -> Optional[GeneralMetrics]:
+        """
+        Gets the current snapshot without waiting.
+
+        :return: The latest GeneralMetrics or None if no refresh completed yet.
+        """
+        return self._snapshot
+
+    def wait_for_snapshot(self, timeout: Optional[float] = None) -> Optional[GeneralMetrics]:
+        """
+        Waits until a first snapshot is available.
+
+        :param timeout: The maximum number of seconds to wait. If None it waits forever.
+        :return: The latest GeneralMetrics or None if there is still none once the timeout expired.
+        """
+        self._has_snapshot.wait(timeout)
+        return self._snapshot
+
+    @property
+    def age(self) -> Optional[float]:
+        """
+        The number of seconds since the current snapshot was refreshed.
+
+        :return: The age of the snapshot in seconds or None if there is no snapshot.
+        """
+        if self.last_refreshed is None:
+            return None
+
+        return time.monotonic() - self.last_refreshed
+
+    def refresh(self) -> GeneralMetrics:
+        """
+        Refreshes the snapshot now and waits for it. If a refresh is already in flight its result is shared.
+
+        :return: The refreshed GeneralMetrics.
+        :raises: Any exception raised by the scrape. The previous snapshot is kept.
+        """
+        return self._flight.do(_REFRESH_KEY, self._scrape)
+
+    def trigger(self) -> bool:
+        """
+        Starts a refresh in the background without waiting for it, unless one is already in flight.
+
+        :return: True if a refresh was started, False if one was already in flight.
+        """
+        if self._flight.in_flight():
+            return False
+
+        # Like the scrapes of the calling thread, the background scrape uses its transport (see transport.use_transport).
+        threading.Thread(target=contextvars.copy_context().run, args=(self._refresh_quietly,), name="metrics-refresh", daemon=True).start()
+        return True
+
+    def _scrape(self) -> GeneralMetrics:
+        """
+        Scrapes the website and replaces the snapshot.
+
+        :return: The new GeneralMetrics.
+        """
+        known_programs = self._snapshot.programs if self._snapshot else None
+        try:
+            metrics = scrape(known_programs=known_programs, **self.scrape_kwargs)
+            if self.snapshot_path is not None:
+                write_snapshot(metrics, self.snapshot_path)
+        except Exception as error:
+            self.last_error = error
+            raise
+
+        self._snapshot = metrics
+        self.last_refreshed = time.monotonic()
+        self.last_error = None
+        self._has_snapshot.set()
+
+        return metrics
+
+    def _refresh_quietly(self):
+        """Refreshes the snapshot, logging instead of raising any error so the background thread keeps going."""
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Failed to refresh the metrics, keeping the previous snapshot")
+
+    def _run(self):
+        """The loop of the background thread."""
+        while not self._stop.is_set():
+            self._refresh_quietly()
+            self._stop.wait(self.interval)
+
+    def start(self) -> "MetricsRefresher":
+        """
+        Starts refreshing the snapshot in a background thread, right away and then every interval.
+
+        :return: The refresher.
+        """
+        if self._thread and self._thread.is_alive():
+            return self
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._run,), name="metrics-refresher", daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stops the background thread and the HTTP endpoint, if any. A refresh in flight is not interrupted.
+
+        :param timeout: The maximum number of seconds to wait for the background thread to finish.
+        """
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+        """
+        Serves the current snapshot as JSON over HTTP in a background thread so other processes can read it.
+
+        GET / (or /metrics) returns the snapshot with an Age header, or a 503 if there is no snapshot yet.
+
+        :param host: The host to listen on. Only the local host by default.
+        :param port: The port to listen on. A free port is picked if 0, see server_address on the returned server.
+        :return: The running HTTP server.
+        """
+        refresher = self
+
+        class SnapshotHandler(BaseHTTPRequestHandler):
+            """Serves the snapshot of the refresher."""
+
+            def do_GET(self):
+                """Responds with the current snapshot."""
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+
+                if (snapshot := refresher.get()) is None:
+                    self.send_error(503, "No metrics scraped yet")
+                    return
+
+                body = json.dumps(snapshot.to_dict(), ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Age", str(int(refresher.age or 0)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                """Logs the requests at debug level instead of writing them to standard error."""
+                logger.debug(format, *args)
+
+        self._server = ThreadingHTTPServer((host, port), SnapshotHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+
+        return self._server
+
+    def __enter__(self) -> "MetricsRefresher":
+        """Starts the refresher."""
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        """Stops the refresher."""
+        self.stop()
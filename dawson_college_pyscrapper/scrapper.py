@@ -1,62 +1,139 @@
 """A module that contains useful functions in regards to Dawson College."""
 
+import concurrent.futures
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import requests
 from bs4 import BeautifulSoup, Tag
-import pandas as pd
 import logging
 
-from dawson_college_pyscrapper.constants import PROGRAMS_LISTING_URL, MAIN_WEBSITE_URL
+from dawson_college_pyscrapper.aggregator import MetricsAggregator
+from dawson_college_pyscrapper.cache import PageCache
+from dawson_college_pyscrapper.checkpoint import Checkpoint
+from dawson_college_pyscrapper.concurrency import HostLimiter, submit_in_context
+from dawson_college_pyscrapper.constants import DAWSON_COLLEGE, MAIN_WEBSITE_URL
 from dawson_college_pyscrapper.exceptions import PageDetailsError
-from dawson_college_pyscrapper.models import Program, GeneralMetrics
-from dawson_college_pyscrapper.util import get_number_of_type, get_soup_of_page, parse_program_page
+from dawson_college_pyscrapper.models import Program, GeneralMetrics, ScrapeReport, Site
+from dawson_college_pyscrapper.profiling import stage
+from dawson_college_pyscrapper.transport import LimitedTransport, get_transport, use_transport
+from dawson_college_pyscrapper.util import (
+    bounded_timeout,
+    canonicalize_url,
+    get_soup_of_page,
+    parse_modified_date,
+    parse_program_page,
+    release_soup,
+    remaining_time,
+)
 
 
 logger = logging.getLogger(__name__)
 
+STUDENTS_SEARCH_URL: str = "https://www.google.ca/search?q=How+Many+Students+does+Dawson+College+have%3F&sxsrf=AJOqlzXG6QAv21OAKIauoknY8WvZK09WdQ%3A1676260186748&ei=WrPpY8CoLbar5NoP7aaTkA4&ved=0ahUKEwjAve3ny5H9AhW2FVkFHW3TBOIQ4dUDCA8&uact=5&oq=How+Many+Students+does+Dawson+College+have%3F&gs_lcp=Cgxnd3Mtd2l6LXNlcnAQAzIFCCEQoAEyBQghEKABMgUIIRCgATIFCCEQoAEyBQghEKABOgoIABBHENYEELADOgQIIxAnOgUIABCRAjoLCAAQgAQQsQMQgwE6CwguEIMBELEDEIAEOhEILhCABBCxAxCDARDHARDRAzoOCC4QxwEQsQMQ0QMQgAQ6CAgAELEDEIMBOg4ILhCABBCxAxDHARDRAzoICAAQgAQQsQM6BQgAEIAEOgsILhCABBCxAxCDAToFCC4QgAQ6BwgAEIAEEAo6BwguEIAEEAo6BQgAELEDOgoIABCABBBGEPsBOgkIABAWEB4Q8QQ6BQgAEIYDOgsIIRAWEB4Q8QQQHToGCAAQHhANOgQIIRAVOgcIIRCgARAKSgQIQRgASgQIRhgAUL8HWNQ1YKk7aANwAXgAgAGMAYgB7xiSAQQzOS40mAEAoAEByAEIwAEB&sclient=gws-wiz-serp"
 
-def get_program_details(program_url: str, listed_program: Tag) -> Optional[Program]:
+
+def get_program_details(
+    program_url: str, listed_program: Tag, timeout: Optional[float] = None, cache: Optional[PageCache] = None
+) -> Optional[Program]:
     """
     Gets the details of the program at the given URL.
 
     :param program_url: The URL of the program to get the details of (ex: https://www.dawsoncollege.qc.ca/programs/program-name)
     :param listed_program: The BeautifulSoup Tag object of the program that is listed on the programs page.
+    :param timeout: The number of seconds to wait for the server before giving up. If not provided, it will wait forever.
+    :param cache: An optional PageCache to fetch the program page through.
     :return: A Program object with the details of the program at the given URL. If the program is not a valid program, None will be returned.
     """
     if not (program_type := listed_program.find(class_="program-type")):
-        logger.debug(f"Failed to get the program type for {program_url}, and listed_program: {listed_program}")
+        logger.debug("Failed to get the program type for %s, and listed_program: %s", program_url, listed_program)
         return None
 
     if not program_type.contents:
-        logger.debug(f"Failed to get the program type contents for {program_url}, and listed_program: {listed_program}")
+        logger.debug("Failed to get the program type contents for %s, and listed_program: %s", program_url, listed_program)
         return None
 
     program_type_data = program_type.contents[0].strip()
     program_name = listed_program.find(class_="program-name").find("a").contents[0].strip()
-    program_page_data = parse_program_page(program_url=program_url)
+    program_page_data = parse_program_page(program_url=program_url, timeout=timeout, cache=cache)
 
     return Program(
         name=program_name,
         modified_date=program_page_data.date,
         program_type=program_type_data,
         url=program_url,
+        description=program_page_data.description,
+        program_code=program_page_data.program_code,
+        campus=program_page_data.campus,
+        contact=program_page_data.contact,
     )
 
 
-def get_programs() -> List[Program]:
+def _scrape_listed_program(
+    program_url: str,
+    listed_program: Tag,
+    checkpoint: Optional[Checkpoint],
+    timeout: Optional[float],
+    cache: Optional[PageCache],
+    deadline_at: Optional[float] = None,
+) -> Optional[Program]:
     """
-    Gets a list of all the programs listed on the programs page.
+    Gets the details of a program listed on the programs page, recording the outcome in the checkpoint if one is given.
 
-    :return: A list of all the programs listed on the programs page. If not programs are found it will return an empty list.
+    :param program_url: The canonical URL of the program (ex: https://www.dawsoncollege.qc.ca/programs/program-name)
+    :param listed_program: The BeautifulSoup Tag object of the program that is listed on the programs page.
+    :param checkpoint: An optional Checkpoint journal to record the program (or the failure) in.
+    :param timeout: The number of seconds to wait for the server before giving up.
+    :param cache: An optional PageCache to fetch the program page through.
+    :param deadline_at: The deadline of the scrape as a time.monotonic() value, or None if there is no deadline. The request is bounded by the time left when it starts.
+    :return: The Program or None if it is not a valid program or its details could not be retrieved.
+    :raises requests.Timeout: If the request was cut short by the deadline.
     """
-    all_programs_listed_html_soup = get_soup_of_page(PROGRAMS_LISTING_URL)
+    timeout = bounded_timeout(timeout, deadline_at)
+    try:
+        program_details = get_program_details(program_url=program_url, listed_program=listed_program, timeout=timeout, cache=cache)
+    except (PageDetailsError, requests.RequestException) as error:
+        if isinstance(error, requests.Timeout) and remaining_time(deadline_at) == 0:
+            # Cut short by the deadline: the page is reported as skipped rather than failed (see get_programs).
+            raise
+
+        logger.error("Error occurred while get details from %s", program_url)
+        if checkpoint:
+            checkpoint.record_failure(program_url)
+        return None
+    finally:
+        # The program only holds plain strings so the listing row is not needed anymore.
+        listed_program.decompose()
 
-    entry_content = all_programs_listed_html_soup.find(class_="entry-content")
-    listed_programs = entry_content.find_all("tr")
+    if program_details and checkpoint:
+        checkpoint.record_program(program_details)
 
-    programs = []
+    return program_details
+
+
+def list_programs(
+    site: Site, timeout: Optional[float], cache: Optional[PageCache], checkpoint: Optional[Checkpoint]
+) -> List[Union[Program, Tuple[str, Tag]]]:
+    """
+    Gets the programs listed on the programs page of the site, once each.
+
+    :param site: The site whose programs listing is scraped.
+    :param timeout: The number of seconds to wait for the server before giving up.
+    :param cache: An optional PageCache to fetch the listing through.
+    :param checkpoint: An optional Checkpoint journal. Programs already completed in it are returned as is.
+    :return: In listing order, the Program already completed in the checkpoint or the canonical URL and the detached listing row of each program to fetch.
+    """
+    with stage("listing_page"):
+        all_programs_listed_html_soup = get_soup_of_page(site.listing_url, timeout=timeout, cache=cache)
+
+        entry_content = all_programs_listed_html_soup.find(class_="entry-content")
+        listed_programs = entry_content.find_all("tr")
+
+    # Each slot is either a Program already completed in the checkpoint or the (url, listing) of a program to fetch.
+    slots = []
+    seen_program_urls = set()
     for listed_program in listed_programs:
         if not (program_name := listed_program.find(class_="program-name")):
             logger.debug("Skipping since program name is not present.")
@@ -67,30 +144,154 @@ def get_programs() -> List[Program]:
             logger.debug("Skipping since program path is a general education path.")
             continue
 
-        program_url = f"{MAIN_WEBSITE_URL}/{program_path}"
-        try:
-            if program_details := get_program_details(program_url=program_url, listed_program=listed_program):
-                # Only add the program if it is a valid program and can be found. If None it will never be added.
-                programs.append(program_details)
+        program_url = canonicalize_url(program_path, base_url=site.base_url)
+        if program_url in seen_program_urls:
+            logger.debug("Skipping since %s was already listed.", program_url)
+            continue
 
-        except PageDetailsError:
-            logger.error(f"Error occurred while get details from {program_url}")
+        seen_program_urls.add(program_url)
+        if checkpoint and (checkpointed_program := checkpoint.get(program_url)):
+            logger.debug("Skipping fetch since %s was already completed in %s", program_url, checkpoint.path)
+            slots.append(checkpointed_program)
             continue
 
+        # Detach the row so the rest of the listing can be released while the program pages are fetched.
+        slots.append((program_url, listed_program.extract()))
+
+    release_soup(all_programs_listed_html_soup)
+
+    return slots
+
+
+def get_programs(
+    checkpoint: Optional[Checkpoint] = None,
+    max_workers: int = 1,
+    timeout: Optional[float] = None,
+    cache: Optional[PageCache] = None,
+    site: Site = DAWSON_COLLEGE,
+    executor: Optional[Executor] = None,
+    deadline: Optional[float] = None,
+    known_programs: Optional[Iterable[Program]] = None,
+    report: Optional[ScrapeReport] = None,
+    on_program: Optional[Callable[[Optional[Program]], None]] = None,
+) -> List[Program]:
+    """
+    Gets a list of all the programs listed on the programs page.
+
+    Program URLs are canonicalized and a program listed more than once is only fetched and returned once.
+
+    Program pages are fetched by priority: programs which are not known yet first, then known programs from the stalest
+    modified date to the freshest. When a deadline is given the pages which are still pending once it is reached are
+    cancelled and the programs scraped so far are returned, the skipped URLs being added to the report.
+
+    :param checkpoint: An optional Checkpoint journal. Programs already completed in it are not fetched again and every program scraped (or failed) is appended to it as the scrape goes.
+    :param max_workers: The number of program pages fetched concurrently. With 1 and no executor the pages are fetched in the calling thread.
+    :param timeout: The number of seconds to wait for the server on each request before giving up. If not provided, it will wait forever.
+    :param cache: An optional PageCache to fetch the pages through.
+    :param site: The site whose programs listing is scraped. Dawson College by default.
+    :param executor: An optional executor shared with other scrapes to fetch the program pages on. If provided max_workers is ignored.
+    :param deadline: An optional number of seconds after which the pending program pages are skipped.
+    :param known_programs: Programs from a previous scrape used to prioritize the program pages (ex: the programs of the last GeneralMetrics).
+    :param report: An optional ScrapeReport filled in with the number of listed programs (as soon as the listing is parsed) and the URLs skipped because of the deadline.
+    :param on_program: An optional function called in the calling thread with each listed program as soon as it is finished, or None if it could not be scraped or is not a valid program (ex: MetricsAggregator.add). It is not called for the programs skipped because of the deadline.
+    :return: A list of all the programs listed on the programs page. If not programs are found it will return an empty list.
+    """
+    deadline_at = time.monotonic() + deadline if deadline is not None else None
+
+    slots = list_programs(site, timeout=bounded_timeout(timeout, deadline_at), cache=cache, checkpoint=checkpoint)
+    if report is not None:
+        report.listed = len(slots)
+    if on_program:
+        for slot in slots:
+            if isinstance(slot, Program):
+                on_program(slot)
+
+    known_modified_dates = {program.url: parse_modified_date(program.modified_date) for program in known_programs or []}
+
+    def priority(index: int) -> Tuple:
+        """New programs first in listing order, then known ones from the stalest (or unknown) modified date."""
+        program_url = slots[index][0]
+        if program_url not in known_modified_dates:
+            return (0, datetime.min, index)
+
+        return (1, known_modified_dates[program_url] or datetime.min, index)
+
+    pages_to_fetch = sorted((index for index, slot in enumerate(slots) if not isinstance(slot, Program)), key=priority)
+    # A single page at a time is fetched in the calling thread, so profiling it (ex: dawson-scrape --profile) shows the pages.
+    in_calling_thread = executor is None and max_workers == 1
+    pages_executor = executor or (None if in_calling_thread else ThreadPoolExecutor(max_workers=max_workers))
+    with stage("program_pages"):
+        futures = {}
+        done = set()
+        if in_calling_thread:
+            for index in pages_to_fetch:
+                future = futures[index] = Future()
+                if remaining_time(deadline_at) == 0:
+                    future.cancel()
+                    continue
+
+                try:
+                    future.set_result(_scrape_listed_program(*slots[index], checkpoint, timeout, cache, deadline_at))
+                except Exception as error:
+                    future.set_exception(error)
+                done.add(future)
+                if on_program and not future.exception():
+                    on_program(future.result())
+        else:
+            for index in pages_to_fetch:
+                futures[index] = submit_in_context(
+                    pages_executor, _scrape_listed_program, *slots[index], checkpoint, timeout, cache, deadline_at
+                )
+
+            try:
+                for future in as_completed(futures.values(), timeout=remaining_time(deadline_at)):
+                    done.add(future)
+                    if on_program and not future.exception():
+                        on_program(future.result())
+            except concurrent.futures.TimeoutError:
+                pass
+
+        not_done = set(futures.values()) - done
+        if remaining_time(deadline_at) == 0:
+            # Pages whose request was cut short by the deadline are skipped like the pages still pending.
+            not_done |= {future for future in done if isinstance(future.exception(), requests.Timeout)}
+        for future in not_done:
+            future.cancel()
+
+        if not executor and not in_calling_thread:
+            # Pages still being fetched when the deadline was reached finish in the background.
+            pages_executor.shutdown(wait=not not_done)
+
+    skipped_urls = [slots[index][0] for index, future in futures.items() if future in not_done]
+    if skipped_urls:
+        logger.warning("The deadline was reached before %s of the %s listed programs were scraped", len(skipped_urls), len(slots))
+
+    if report is not None:
+        report.skipped_urls = skipped_urls
+
+    # Only add the program if it is a valid program and can be found. If None it will never be added.
+    programs = []
+    for index, slot in enumerate(slots):
+        if isinstance(slot, Program):
+            programs.append(slot)
+        elif futures[index] not in not_done and (program := futures[index].result()):
+            programs.append(program)
+
     return programs
 
 
-def get_total_number_of_students() -> int:
+def get_total_number_of_students(timeout: Optional[float] = None) -> int:
     """
     Gets the total number of students at Dawson College (this is mainly an estimate).
 
+    :param timeout: The number of seconds to wait for the server before giving up. If not provided, it will wait forever.
     :return: The total number of students at Dawson College.
     :raises: ValueError if the number of students cannot be parsed to an int.
     :raises AttributeError: If the content containing the number of students cannot be found.
     """
     # TODO should use something more reliable than google here.
-    url = "https://www.google.ca/search?q=How+Many+Students+does+Dawson+College+have%3F&sxsrf=AJOqlzXG6QAv21OAKIauoknY8WvZK09WdQ%3A1676260186748&ei=WrPpY8CoLbar5NoP7aaTkA4&ved=0ahUKEwjAve3ny5H9AhW2FVkFHW3TBOIQ4dUDCA8&uact=5&oq=How+Many+Students+does+Dawson+College+have%3F&gs_lcp=Cgxnd3Mtd2l6LXNlcnAQAzIFCCEQoAEyBQghEKABMgUIIRCgATIFCCEQoAEyBQghEKABOgoIABBHENYEELADOgQIIxAnOgUIABCRAjoLCAAQgAQQsQMQgwE6CwguEIMBELEDEIAEOhEILhCABBCxAxCDARDHARDRAzoOCC4QxwEQsQMQ0QMQgAQ6CAgAELEDEIMBOg4ILhCABBCxAxDHARDRAzoICAAQgAQQsQM6BQgAEIAEOgsILhCABBCxAxCDAToFCC4QgAQ6BwgAEIAEEAo6BwguEIAEEAo6BQgAELEDOgoIABCABBBGEPsBOgkIABAWEB4Q8QQ6BQgAEIYDOgsIIRAWEB4Q8QQQHToGCAAQHhANOgQIIRAVOgcIIRCgARAKSgQIQRgASgQIRhgAUL8HWNQ1YKk7aANwAXgAgAGMAYgB7xiSAQQzOS40mAEAoAEByAEIwAEB&sclient=gws-wiz-serp"
-    soup = BeautifulSoup(requests.get(url).text.strip(), "html.parser")
+    url = STUDENTS_SEARCH_URL
+    soup = BeautifulSoup(get_transport().get(url, timeout=timeout).text.strip(), "html.parser")
 
     tags = soup.find_all(class_="BNeawe")
 
@@ -102,10 +303,11 @@ def get_total_number_of_students() -> int:
     return int(content.replace(",", ""))
 
 
-def get_total_number_of_faculty() -> int:
+def get_total_number_of_faculty(timeout: Optional[float] = None) -> int:
     """
     Gets the total number of faculty at Dawson College.
 
+    :param timeout: The number of seconds to wait for the server before giving up. If not provided, it will wait forever.
     :return: The total number of faculty at Dawson College.
     """
     params = {"position": "Faculty", "search": "Search"}
@@ -116,7 +318,7 @@ def get_total_number_of_faculty() -> int:
         "X-Requested-With": "XMLHttpRequest",
     }
 
-    response = requests.post(f"{MAIN_WEBSITE_URL}/phone-directory", data=params, headers=headers)
+    response = get_transport().post(f"{MAIN_WEBSITE_URL}/phone-directory", data=params, headers=headers, timeout=timeout)
     response_soup = BeautifulSoup(response.text, "html.parser")
 
     tags = response_soup.find_all("b")
@@ -124,47 +326,128 @@ def get_total_number_of_faculty() -> int:
     return int(tags[0].contents[0])
 
 
-def scrape() -> GeneralMetrics:
+def scrape_headcounts(aggregator: MetricsAggregator, timeout: Optional[float] = None, deadline_at: Optional[float] = None):
+    """
+    Scrapes the number of students and faculty of Dawson College into the aggregator.
+
+    A count whose request is cut short by the deadline (or which is not started before it) is left at 0, so the scrape can
+    still return the metrics of its programs.
+
+    :param aggregator: The MetricsAggregator the counts are set on.
+    :param timeout: The number of seconds to wait for the server on each request before giving up.
+    :param deadline_at: The deadline of the scrape as a time.monotonic() value, or None if there is no deadline.
+    :raises requests.Timeout: If a request timed out before the deadline.
+    """
+    for name, get_total_number in (("students", get_total_number_of_students), ("faculty", get_total_number_of_faculty)):
+        with stage(name):
+            try:
+                if remaining_time(deadline_at) == 0:
+                    raise requests.Timeout(f"The deadline was reached before the number of {name} was requested.")
+                setattr(aggregator, f"number_of_{name}", get_total_number(timeout=bounded_timeout(timeout, deadline_at)))
+            except requests.Timeout:
+                if remaining_time(deadline_at) != 0:
+                    raise
+                logger.warning("The deadline was reached before the number of %s was scraped, leaving it at 0", name)
+
+
+def scrape(
+    checkpoint: Optional[Checkpoint] = None,
+    max_workers: int = 1,
+    timeout: Optional[float] = None,
+    cache: Optional[PageCache] = None,
+    site: Site = DAWSON_COLLEGE,
+    executor: Optional[Executor] = None,
+    deadline: Optional[float] = None,
+    known_programs: Optional[Iterable[Program]] = None,
+    aggregator: Optional[MetricsAggregator] = None,
+    warm_up: int = 0,
+) -> GeneralMetrics:
     """
     A general purpose scrape method which will scrape all the data from the website and return it as a GeneralMetrics object.
 
     This is mainly a wrapper of the other methods offered and some nice to have metrics.
 
+    :param checkpoint: An optional Checkpoint journal used to resume the scrape of the programs (see get_programs).
+    :param max_workers: The number of program pages fetched concurrently.
+    :param timeout: The number of seconds to wait for the server on each request before giving up. If not provided, it will wait forever.
+    :param cache: An optional PageCache to fetch the program pages through.
+    :param site: The site to scrape. Dawson College by default. The number of students and faculty are 0 unless the site includes headcounts.
+    :param executor: An optional executor shared with other scrapes to fetch the program pages on (see get_programs).
+    :param deadline: An optional number of seconds the scrape should complete in. Program pages still pending when it is reached are skipped and the metrics are computed from the programs scraped so far.
+    :param known_programs: Programs from a previous scrape used to prioritize the program pages (see get_programs).
+    :param aggregator: An optional MetricsAggregator the programs are added to as they are scraped, so that another thread can follow the progress of the scrape with its snapshot method.
+    :param warm_up: The number of connections to the site opened in the background while the headcounts and the listing download, so the first program pages do not wait on DNS and TLS handshakes. It needs a transport which keeps connections (ex: SessionTransport), see Transport.warm_up.
     :return: A GeneralMetrics object with all the data scrapped from the website.
     """
-    number_of_students = get_total_number_of_students()
-    number_of_faculty = get_total_number_of_faculty()
-
-    programs = get_programs()
-    programs_data_frame = pd.DataFrame(programs)
-
-    # Change date to actual Timestamp type
-    programs_data_frame["date"] = pd.to_datetime(programs_data_frame["modified_date"])
-
-    total_programs_offered = len(programs_data_frame)
-    number_of_programs = get_number_of_type(programs_data_frame, "Program")
-    number_of_profiles = get_number_of_type(programs_data_frame, "Profile")
-    number_of_disciplines = get_number_of_type(programs_data_frame, "Discipline")
-    number_of_special_studies = get_number_of_type(programs_data_frame, "Special Area of Study")
-    number_of_general_education = get_number_of_type(programs_data_frame, "General Education")
-
-    years = []
-    for date in programs_data_frame["date"]:
-        years.append(str(date.year))
-
-    programs_data_frame["year"] = years
-    total_year_counts = programs_data_frame["year"].value_counts()
-
-    return GeneralMetrics(
-        date=datetime.now(),
-        total_programs_offered=total_programs_offered,
-        number_of_programs=number_of_programs,
-        number_of_profiles=number_of_profiles,
-        number_of_disciplines=number_of_disciplines,
-        number_of_special_studies=number_of_special_studies,
-        number_of_general_studies=number_of_general_education,
-        total_year_counts=total_year_counts.to_dict(),
-        programs=programs,
-        number_of_students=number_of_students,
-        number_of_faculty=number_of_faculty,
+    aggregator = aggregator or MetricsAggregator()
+    deadline_at = time.monotonic() + deadline if deadline is not None else None
+
+    if warm_up:
+        get_transport().warm_up([site.listing_url, site.base_url], connections=warm_up, timeout=timeout)
+        if site.include_headcounts:
+            get_transport().warm_up([STUDENTS_SEARCH_URL], timeout=timeout)
+
+    if site.include_headcounts:
+        scrape_headcounts(aggregator, timeout=timeout, deadline_at=deadline_at)
+
+    programs = get_programs(
+        checkpoint=checkpoint,
+        max_workers=max_workers,
+        timeout=timeout,
+        cache=cache,
+        site=site,
+        executor=executor,
+        deadline=remaining_time(deadline_at),
+        known_programs=known_programs,
+        report=aggregator.report,
+        on_program=aggregator.add,
     )
+
+    # The counts are already up to date, only the programs are put back in listing order.
+    with stage("aggregation"):
+        return aggregator.result(programs)
+
+
+def scrape_sites(
+    sites: List[Site],
+    max_workers: int = 4,
+    max_connections_per_host: int = 2,
+    timeout: Optional[float] = None,
+    cache: Optional[PageCache] = None,
+) -> Dict[str, GeneralMetrics]:
+    """
+    Scrapes many sites concurrently, sharing one pool of workers for all of their program pages.
+
+    The requests of every site go through the current transport with at most max_connections_per_host requests in flight
+    to any single host, so sites hosted together do not overload their server. A site which fails to be scraped is
+    logged and left out of the results.
+
+    :param sites: The sites to scrape. Their names must be unique.
+    :param max_workers: The number of program pages fetched concurrently across all the sites.
+    :param max_connections_per_host: The maximum number of requests in flight to a single host.
+    :param timeout: The number of seconds to wait for the server on each request before giving up. If not provided, it will wait forever.
+    :param cache: An optional PageCache to fetch the pages through.
+    :return: The GeneralMetrics of every site which was scraped, keyed by the name of the site.
+    """
+    if len({site.name for site in sites}) != len(sites):
+        raise ValueError("The names of the sites must be unique.")
+
+    limited_transport = LimitedTransport(get_transport(), HostLimiter(max_connections_per_host))
+
+    # The sites are orchestrated on their own threads so they never hold a worker the program pages are waiting for.
+    with use_transport(limited_transport), ThreadPoolExecutor(max_workers=max_workers) as pages_executor, ThreadPoolExecutor(
+        max_workers=max(len(sites), 1)
+    ) as sites_executor:
+        futures = {
+            site.name: submit_in_context(sites_executor, scrape, timeout=timeout, cache=cache, site=site, executor=pages_executor)
+            for site in sites
+        }
+
+        metrics_per_site = {}
+        for name, future in futures.items():
+            try:
+                metrics_per_site[name] = future.result()
+            except Exception:
+                logger.exception("Failed to scrape the site %s", name)
+
+    return metrics_per_site
@@ -0,0 +1,405 @@
+"""A module which contains the memory-mapped snapshot of the metrics shared by many processes."""
+
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from dataclasses import fields
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from dawson_college_pyscrapper.exceptions import SnapshotFormatError
+from dawson_college_pyscrapper.models import GeneralMetrics, Program
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC: bytes = b"DCSNAP\x00\x00"
+SNAPSHOT_VERSION: int = 1
+PROGRAM_FIELDS: Tuple[str, ...] = tuple(program_field.name for program_field in fields(Program))
+COUNT_FIELDS: Tuple[str, ...] = (
+    "total_programs_offered",
+    "number_of_programs",
+    "number_of_profiles",
+    "number_of_disciplines",
+    "number_of_special_studies",
+    "number_of_general_studies",
+    "number_of_students",
+    "number_of_faculty",
+)
+
+# Every string is stored once in the string table and referred to by its (offset, length) in the table.
+_STRING_REFERENCE = struct.Struct("<II")
+_YEAR_COUNT = struct.Struct("<IIq")
+# magic, version, number of fields per program, number of programs, year counts and skipped URLs, completeness, the counts
+# of COUNT_FIELDS, the reference to the date and the offsets of the programs, year counts, skipped URLs and string table.
+_HEADER = struct.Struct(f"<8sHHIIId{len(COUNT_FIELDS)}qIIQQQQQ")
+
+
+class SnapshotHeader(NamedTuple):
+    """
+    The fixed-layout header at the start of a snapshot file.
+
+    :param version: The version of the layout of the file.
+    :param program_fields: The number of fields stored for every program.
+    :param program_count: The number of programs in the snapshot.
+    :param year_count: The number of entries of total_year_counts.
+    :param skipped_count: The number of skipped URLs.
+    :param completeness: The completeness of the scrape.
+    :param counts: The values of COUNT_FIELDS, in the same order.
+    :param date_reference: The (offset, length) of the ISO 8601 date of the metrics in the string table.
+    :param programs_offset: The offset of the table of programs in the file.
+    :param years_offset: The offset of the table of year counts in the file.
+    :param skipped_offset: The offset of the table of skipped URLs in the file.
+    :param strings_offset: The offset of the string table in the file.
+    :param strings_size: The size of the string table in bytes.
+    """
+
+    version: int
+    program_fields: int
+    program_count: int
+    year_count: int
+    skipped_count: int
+    completeness: float
+    counts: Tuple[int, ...]
+    date_reference: Tuple[int, int]
+    programs_offset: int
+    years_offset: int
+    skipped_offset: int
+    strings_offset: int
+    strings_size: int
+
+
+class _StringTable:
+    """Builds the string table of a snapshot, storing every distinct string once."""
+
+    def __init__(self):
+        """Creates an empty string table."""
+        self.data = bytearray()
+        self._references: Dict[str, Tuple[int, int]] = {}
+
+    def add(self, text: str) -> Tuple[int, int]:
+        """
+        Adds a string to the table.
+
+        :param text: The string to add.
+        :return: The (offset, length) of the UTF-8 encoded string in the table.
+        """
+        if (reference := self._references.get(text)) is None:
+            encoded = text.encode("utf-8")
+            reference = self._references[text] = (len(self.data), len(encoded))
+            self.data += encoded
+
+        return reference
+
+
+def write_snapshot(metrics: GeneralMetrics, path: Union[str, os.PathLike]):
+    """
+    Publishes the metrics to a snapshot file which any number of processes can map read-only with SnapshotReader.
+
+    The file is written next to the path and then renamed over it so readers either see the previous snapshot or the new
+    one, never a partial file. Readers which still have the previous snapshot mapped keep reading it until they reload.
+
+    :param metrics: The metrics to publish.
+    :param path: The path of the snapshot file.
+    """
+    path = os.fspath(path)
+    strings = _StringTable()
+
+    programs = bytearray()
+    for program in metrics.programs:
+        for program_field in PROGRAM_FIELDS:
+            programs += _STRING_REFERENCE.pack(*strings.add(getattr(program, program_field)))
+
+    years = bytearray()
+    for year, count in metrics.total_year_counts.items():
+        years += _YEAR_COUNT.pack(*strings.add(str(year)), int(count))
+
+    skipped = bytearray()
+    for skipped_url in metrics.skipped_urls:
+        skipped += _STRING_REFERENCE.pack(*strings.add(skipped_url))
+
+    date_reference = strings.add(metrics.date.isoformat())
+
+    programs_offset = _HEADER.size
+    years_offset = programs_offset + len(programs)
+    skipped_offset = years_offset + len(years)
+    strings_offset = skipped_offset + len(skipped)
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_VERSION,
+        len(PROGRAM_FIELDS),
+        len(metrics.programs),
+        len(metrics.total_year_counts),
+        len(metrics.skipped_urls),
+        metrics.completeness,
+        *(int(getattr(metrics, count_field)) for count_field in COUNT_FIELDS),
+        *date_reference,
+        programs_offset,
+        years_offset,
+        skipped_offset,
+        strings_offset,
+        len(strings.data),
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "wb") as temporary_file:
+            for section in (header, programs, years, skipped, strings.data):
+                temporary_file.write(section)
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+    logger.debug("Published a snapshot of %s programs to %s", len(metrics.programs), path)
+
+
+class _MappedSnapshot:
+    """A snapshot file mapped in memory. It never changes once mapped, a new one is mapped when the file is replaced."""
+
+    def __init__(self, path: str):
+        """
+        Maps the snapshot file at the given path and reads its header.
+
+        :param path: The path of the snapshot file.
+        :raises SnapshotFormatError: If the file is not a snapshot written by write_snapshot.
+        """
+        with open(path, "rb") as snapshot_file:
+            status = os.fstat(snapshot_file.fileno())
+            if status.st_size < _HEADER.size:
+                raise SnapshotFormatError(path, "the file is too small")
+            self.mapping = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.identity = (status.st_dev, status.st_ino)
+        self.view = memoryview(self.mapping)
+
+        magic, version, program_fields, program_count, year_count, skipped_count, completeness, *rest = _HEADER.unpack_from(self.view)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotFormatError(path, "the file is not a snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotFormatError(path, f"the version {version} is not supported")
+
+        counts, (date_offset, date_length, *offsets) = rest[: len(COUNT_FIELDS)], rest[len(COUNT_FIELDS) :]
+        self.header = SnapshotHeader(
+            version,
+            program_fields,
+            program_count,
+            year_count,
+            skipped_count,
+            completeness,
+            tuple(counts),
+            (date_offset, date_length),
+            *offsets,
+        )
+        if self.header.strings_offset + self.header.strings_size > status.st_size:
+            raise SnapshotFormatError(path, "the file is truncated")
+
+        self.program_size = _STRING_REFERENCE.size * program_fields
+
+    def bytes_at(self, offset: int, length: int) -> memoryview:
+        """
+        Gets a string of the string table without copying it.
+
+        :param offset: The offset of the string in the string table.
+        :param length: The length of the string in bytes.
+        :return: A read-only view of the UTF-8 encoded string in the mapped file.
+        """
+        start = self.header.strings_offset + offset
+        return self.view[start : start + length]
+
+    def string_at(self, offset: int, length: int) -> str:
+        """
+        Gets a string of the string table.
+
+        :param offset: The offset of the string in the string table.
+        :param length: The length of the string in bytes.
+        :return: The decoded string.
+        """
+        return str(self.bytes_at(offset, length), "utf-8")
+
+    def reference_of(self, offset: int) -> Tuple[int, int]:
+        """
+        Reads a string reference.
+
+        :param offset: The offset of the reference in the file.
+        :return: The (offset, length) of the string in the string table.
+        """
+        return _STRING_REFERENCE.unpack_from(self.view, offset)
+
+    def release(self):
+        """Unmaps the file, unless views of it are still in use in which case it is unmapped once they are released."""
+        self.view.release()
+        try:
+            self.mapping.close()
+        except BufferError:
+            logger.debug("The previous snapshot is still in use, it will be unmapped once released")
+
+
+class SnapshotReader:
+    """
+    Reads a snapshot published by write_snapshot from a read-only memory mapping of the file.
+
+    Every process mapping the same file shares the same pages of memory, so the memory used does not grow with the number
+    of processes reading it. Programs are only decoded when they are read and program_field gives the raw bytes without
+    any copy. When the file is replaced by a newer snapshot, reload maps the new one; reads already in progress keep
+    using the previous mapping.
+
+    :param path: The path of the snapshot file.
+    :raises SnapshotFormatError: If the file is not a snapshot written by write_snapshot.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        """Maps the snapshot file at the given path."""
+        self.path = os.fspath(path)
+        self._snapshot: Optional[_MappedSnapshot] = _MappedSnapshot(self.path)
+
+    def _current(self) -> _MappedSnapshot:
+        """
+        Gets the snapshot currently mapped.
+
+        :return: The mapped snapshot.
+        :raises ValueError: If the reader was closed.
+        """
+        if (snapshot := self._snapshot) is None:
+            raise ValueError("The snapshot reader is closed.")
+
+        return snapshot
+
+    @property
+    def header(self) -> SnapshotHeader:
+        """
+        The header of the snapshot currently mapped.
+
+        :return: The SnapshotHeader.
+        """
+        return self._current().header
+
+    def reload(self) -> bool:
+        """
+        Maps the snapshot file again if it was replaced since it was mapped.
+
+        :return: True if a new snapshot was mapped, False if the file did not change.
+        """
+        snapshot = self._current()
+        status = os.stat(self.path)
+        if (status.st_dev, status.st_ino) == snapshot.identity:
+            return False
+
+        # The previous mapping is not released here since other threads may still be reading it, it is unmapped as soon as
+        # the last of them is done with it.
+        self._snapshot = _MappedSnapshot(self.path)
+        logger.debug("Mapped the new snapshot at %s", self.path)
+
+        return True
+
+    def __len__(self) -> int:
+        """
+        The number of programs in the snapshot.
+
+        :return: The number of programs.
+        """
+        return self.header.program_count
+
+    def _program_reference(self, snapshot: _MappedSnapshot, index: int, program_field: int) -> Tuple[int, int]:
+        """
+        Reads the reference to a field of a program.
+
+        :param snapshot: The mapped snapshot.
+        :param index: The index of the program.
+        :param program_field: The index of the field in PROGRAM_FIELDS.
+        :return: The (offset, length) of the field in the string table.
+        :raises IndexError: If there is no program at the given index.
+        """
+        if not 0 <= index < snapshot.header.program_count:
+            raise IndexError(f"There is no program at index {index}.")
+
+        offset = snapshot.header.programs_offset + index * snapshot.program_size + program_field * _STRING_REFERENCE.size
+        return snapshot.reference_of(offset)
+
+    def program_field(self, index: int, name: str) -> memoryview:
+        """
+        Gets a field of a program without copying or decoding it.
+
+        :param index: The index of the program.
+        :param name: The name of the field (ex: url).
+        :return: A read-only view of the UTF-8 encoded value in the mapped file. Empty if the snapshot does not have the field.
+        :raises IndexError: If there is no program at the given index.
+        """
+        snapshot = self._current()
+        program_field = PROGRAM_FIELDS.index(name)
+        if program_field >= snapshot.header.program_fields:
+            return memoryview(b"")
+
+        return snapshot.bytes_at(*self._program_reference(snapshot, index, program_field))
+
+    def program(self, index: int) -> Program:
+        """
+        Gets a program of the snapshot.
+
+        :param index: The index of the program.
+        :return: The decoded Program.
+        :raises IndexError: If there is no program at the given index.
+        """
+        snapshot = self._current()
+        stored_fields = min(snapshot.header.program_fields, len(PROGRAM_FIELDS))
+
+        return Program(
+            **{
+                PROGRAM_FIELDS[program_field]: snapshot.string_at(*self._program_reference(snapshot, index, program_field))
+                for program_field in range(stored_fields)
+            }
+        )
+
+    def __iter__(self) -> Iterator[Program]:
+        """
+        Iterates over the programs of the snapshot.
+
+        :return: An iterator of the decoded programs.
+        """
+        return (self.program(index) for index in range(len(self)))
+
+    def metrics(self) -> GeneralMetrics:
+        """
+        Decodes the whole snapshot. Prefer reading only the programs needed when serving many processes.
+
+        :return: The GeneralMetrics which were published.
+        """
+        snapshot = self._current()
+        header = snapshot.header
+
+        total_year_counts = {}
+        for index in range(header.year_count):
+            year_offset, year_length, count = _YEAR_COUNT.unpack_from(snapshot.view, header.years_offset + index * _YEAR_COUNT.size)
+            total_year_counts[snapshot.string_at(year_offset, year_length)] = count
+
+        skipped_urls: List[str] = [
+            snapshot.string_at(*snapshot.reference_of(header.skipped_offset + index * _STRING_REFERENCE.size))
+            for index in range(header.skipped_count)
+        ]
+
+        return GeneralMetrics(
+            date=datetime.fromisoformat(snapshot.string_at(*header.date_reference)),
+            **dict(zip(COUNT_FIELDS, header.counts)),
+            total_year_counts=total_year_counts,
+            programs=list(self),
+            completeness=header.completeness,
+            skipped_urls=skipped_urls,
+        )
+
+    def close(self):
+        """Unmaps the snapshot. The reader cannot be used afterwards."""
+        if self._snapshot is not None:
+            self._snapshot.release()
+            self._snapshot = None
+
+    def __enter__(self) -> "SnapshotReader":
+        """Returns the reader."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Closes the reader."""
+        self.close()
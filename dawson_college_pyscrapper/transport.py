@@ -0,0 +1,483 @@
+"""A module which contains the transports every request of the scrapper goes through."""
+
+import json
+import logging
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from dawson_college_pyscrapper.concurrency import HostLimiter
+from dawson_college_pyscrapper.exceptions import RecordingNotFoundError
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_INDEX_NAME: str = "index.json"
+ARCHIVE_FORMAT_VERSION: int = 1
+
+
+class Transport:
+    """The base class of the transports which send the requests of the scrapper and return their responses."""
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Sends a request.
+
+        :param method: The HTTP method of the request (ex: GET).
+        :param url: The URL of the request.
+        :param headers: The headers of the request.
+        :param data: The form data of the request.
+        :param timeout: The number of seconds to wait for the server before giving up.
+        :return: The response which has at least the ok, status_code, headers, content and text attributes of a requests.Response.
+        """
+        raise NotImplementedError
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None):
+        """
+        Sends a GET request (see request).
+
+        :param url: The URL of the request.
+        :param headers: The headers of the request.
+        :param timeout: The number of seconds to wait for the server before giving up.
+        :return: The response.
+        """
+        return self.request("GET", url, headers=headers, timeout=timeout)
+
+    def post(
+        self, url: str, data: Optional[Dict[str, str]] = None, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None
+    ):
+        """
+        Sends a POST request (see request).
+
+        :param url: The URL of the request.
+        :param data: The form data of the request.
+        :param headers: The headers of the request.
+        :param timeout: The number of seconds to wait for the server before giving up.
+        :return: The response.
+        """
+        return self.request("POST", url, headers=headers, data=data, timeout=timeout)
+
+    def warm_up(self, urls: Iterable[str], connections: int = 1, timeout: Optional[float] = None) -> List[Future]:
+        """
+        Opens connections to the hosts of the URLs in the background, ahead of the requests which will need them.
+
+        Transports which do not keep connections between requests have nothing to warm up.
+
+        :param urls: URLs of the hosts to connect to (ex: https://www.dawsoncollege.qc.ca).
+        :param connections: The number of connections opened to each host.
+        :param timeout: The number of seconds to wait for each connection before giving up.
+        :return: One future per connection being opened, resolving to whether it was opened.
+        """
+        return []
+
+
+class RequestsTransport(Transport):
+    """The default transport which sends the requests over the network with requests."""
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> requests.Response:
+        """
+        Sends the request with requests.
+
+        :param method: The HTTP method of the request (ex: GET).
+        :param url: The URL of the request.
+        :param headers: The headers of the request.
+        :param data: The form data of the request.
+        :param timeout: The number of seconds to wait for the server before giving up.
+        :return: The requests.Response.
+        """
+        if method == "GET":
+            return requests.get(url, headers=headers, timeout=timeout)
+
+        if method == "POST":
+            return requests.post(url, data=data, headers=headers, timeout=timeout)
+
+        return requests.request(method, url, headers=headers, data=data, timeout=timeout)
+
+
+class LimitedTransport(Transport):
+    """
+    A transport which caps the number of requests in flight to each host before sending them through another transport.
+
+    :param transport: The transport the requests are sent through.
+    :param limiter: The HostLimiter holding the per host caps.
+    """
+
+    def __init__(self, transport: Transport, limiter: HostLimiter):
+        """Creates the transport."""
+        self.transport = transport
+        self.limiter = limiter
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Waits for a free slot for the host of the URL and sends the request through the wrapped transport.
+
+        :param method: The HTTP method of the request (ex: GET).
+        :param url: The URL of the request.
+        :param headers: The headers of the request.
+        :param data: The form data of the request.
+        :param timeout: The number of seconds to wait for the server before giving up.
+        :return: The response of the wrapped transport.
+        """
+        with self.limiter.limit(url):
+            return self.transport.request(method, url, headers=headers, data=data, timeout=timeout)
+
+    def warm_up(self, urls: Iterable[str], connections: int = 1, timeout: Optional[float] = None) -> List[Future]:
+        """
+        Warms up the connections of the wrapped transport (see Transport.warm_up).
+
+        :param urls: URLs of the hosts to connect to.
+        :param connections: The number of connections opened to each host.
+        :param timeout: The number of seconds to wait for each connection before giving up.
+        :return: One future per connection being opened.
+        """
+        return self.transport.warm_up(urls, connections=connections, timeout=timeout)
+
+
+_transport: Transport = RequestsTransport()
+# The transport of the innermost use_transport of the current context, if any. Executors pass it on to their tasks
+# through concurrency.submit_in_context.
+_context_transport: ContextVar[Optional[Transport]] = ContextVar("transport", default=None)
+
+
+def get_transport() -> Transport:
+    """
+    Gets the transport every request of the scrapper currently goes through.
+
+    :return: The transport of the innermost use_transport of the current context, or the transport set with set_transport.
+    """
+    context_transport = _context_transport.get()
+
+    return context_transport if context_transport is not None else _transport
+
+
+def set_transport(transport: Transport):
+    """
+    Sets the transport every request of the scrapper goes through, in every thread, unless use_transport overrides it.
+
+    :param transport: The transport to use.
+    """
+    global _transport
+    _transport = transport
+
+
+@contextmanager
+def use_transport(transport: Transport) -> Iterator[Transport]:
+    """
+    Uses the given transport for every request of the scrapper within the context.
+
+    Only the current context sees the transport, so overlapping uses from other threads do not affect each other. Tasks
+    submitted to an executor through concurrency.submit_in_context see it as well.
+
+    :param transport: The transport to use.
+    :return: The transport.
+    """
+    token = _context_transport.set(transport)
+    try:
+        yield transport
+    finally:
+        _context_transport.reset(token)
+
+
+def _request_key(method: str, url: str, data: Optional[Dict[str, str]]) -> str:
+    """
+    Gets the key identifying a request in an archive.
+
+    :param method: The HTTP method of the request (ex: GET).
+    :param url: The URL of the request.
+    :param data: The form data of the request.
+    :return: The key of the request.
+    """
+    encoded_data = json.dumps(sorted((data or {}).items()))
+
+    return f"{method.upper()} {url} {encoded_data}"
+
+
+@dataclass(frozen=True)
+class RecordedExchange:
+    """
+    The index entry of a request and its response in an archive.
+
+    :param method: The HTTP method of the request (ex: GET).
+    :param url: The URL of the request.
+    :param data: The form data of the request.
+    :param status_code: The status code of the response.
+    :param headers: The headers of the response.
+    :param encoding: The encoding of the body of the response, if known.
+    :param elapsed: The number of seconds the original request took.
+    :param body: The name of the archive member holding the body of the response.
+    """
+
+    method: str
+    url: str
+    data: Dict[str, str]
+    status_code: int
+    headers: Dict[str, str]
+    encoding: Optional[str]
+    elapsed: float
+    body: str
+
+    @property
+    def key(self) -> str:
+        """
+        The key identifying the request of this exchange.
+
+        :return: The key of the request.
+        """
+        return _request_key(self.method, self.url, self.data)
+
+
+@dataclass
+class RecordedResponse:
+    """
+    A response served from an archive. It mimics the parts of requests.Response used by the scrapper.
+
+    :param url: The URL of the request.
+    :param status_code: The status code of the response.
+    :param content: The body of the response.
+    :param headers: The headers of the response.
+    :param encoding: The encoding of the body, if known. UTF-8 is used otherwise.
+    """
+
+    url: str
+    status_code: int
+    content: bytes
+    headers: CaseInsensitiveDict = field(default_factory=CaseInsensitiveDict)
+    encoding: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether the status code of the response is not an error.
+
+        :return: True if the status code is lower than 400.
+        """
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        """
+        The body of the response decoded to a string.
+
+        :return: The decoded body of the response.
+        """
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class RecordingTransport(Transport):
+    """
+    A transport which records every request and response going through another transport into an archive.
+
+    The archive is a zip file with one deflate-compressed member per response body and an index.json member, written
+    when the transport is closed, which maps every request to its response so it can be served by a ReplayTransport.
+
+    :param path: The path of the archive to write.
+    :param transport: The transport the requests are sent through. The RequestsTransport is used if not provided.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], transport: Optional[Transport] = None):
+        """Creates the transport and opens the archive at the given path for writing."""
+        self.path = os.fspath(path)
+        self.transport = transport or RequestsTransport()
+        self._archive = zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_DEFLATED)
+        self._exchanges: List[RecordedExchange] = []
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Sends the request through the wrapped transport and records its response.
+
+        :param method: The HTTP method of the request (ex: GET).
+        :param url: The URL of the request.
+        :param headers: The headers of the request.
+        :param data: The form data of the request.
+        :param timeout: The number of seconds to wait for the server before giving up.
+        :return: The response of the wrapped transport.
+        """
+        start = time.perf_counter()
+        response = self.transport.request(method, url, headers=headers, data=data, timeout=timeout)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            body_name = f"bodies/{len(self._exchanges):08d}"
+            self._archive.writestr(body_name, response.content)
+            self._exchanges.append(
+                RecordedExchange(
+                    method=method.upper(),
+                    url=url,
+                    data=dict(data or {}),
+                    status_code=response.status_code,
+                    headers=dict(response.headers),
+                    encoding=response.encoding,
+                    elapsed=elapsed,
+                    body=body_name,
+                )
+            )
+
+        return response
+
+    def warm_up(self, urls: Iterable[str], connections: int = 1, timeout: Optional[float] = None) -> List[Future]:
+        """
+        Warms up the connections of the wrapped transport (see Transport.warm_up).
+
+        :param urls: URLs of the hosts to connect to.
+        :param connections: The number of connections opened to each host.
+        :param timeout: The number of seconds to wait for each connection before giving up.
+        :return: One future per connection being opened.
+        """
+        return self.transport.warm_up(urls, connections=connections, timeout=timeout)
+
+    def close(self):
+        """Writes the index and closes the archive."""
+        with self._lock:
+            if self._archive.fp is None:
+                return
+
+            index = {"version": ARCHIVE_FORMAT_VERSION, "exchanges": [asdict(exchange) for exchange in self._exchanges]}
+            self._archive.writestr(ARCHIVE_INDEX_NAME, json.dumps(index))
+            self._archive.close()
+
+        logger.debug("Recorded %s exchanges to %s", len(self._exchanges), self.path)
+
+    def __enter__(self) -> "RecordingTransport":
+        """Uses the transport for every request of the scrapper in the current context until the context exits (see use_transport)."""
+        self._using_transport = use_transport(self)
+        return self._using_transport.__enter__()
+
+    def __exit__(self, *exc_info):
+        """Restores the previous transport and closes the archive."""
+        self._using_transport.__exit__(*exc_info)
+        self.close()
+
+
+class ReplayTransport(Transport):
+    """
+    A transport which serves every request from an archive written by a RecordingTransport, without any network.
+
+    A request recorded more than once is answered with its recorded responses in order, then with the last one again.
+
+    :param path: The path of the archive to read.
+    :param replay_latency: Whether to sleep for the time each request originally took before returning its response.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], replay_latency: bool = False):
+        """Creates the transport and loads the index of the archive at the given path."""
+        self.path = os.fspath(path)
+        self.replay_latency = replay_latency
+        self._archive = zipfile.ZipFile(self.path, "r")
+        self._lock = threading.Lock()
+
+        index = json.loads(self._archive.read(ARCHIVE_INDEX_NAME))
+        self._exchanges: Dict[str, List[RecordedExchange]] = {}
+        for exchange_data in index["exchanges"]:
+            exchange = RecordedExchange(**exchange_data)
+            self._exchanges.setdefault(exchange.key, []).append(exchange)
+        self._served: Dict[str, int] = {}
+
+    def _next_exchange(self, method: str, url: str, data: Optional[Dict[str, str]]) -> RecordedExchange:
+        """
+        Gets the recorded exchange answering the next request for the given method, URL and data.
+
+        :param method: The HTTP method of the request (ex: GET).
+        :param url: The URL of the request.
+        :param data: The form data of the request.
+        :return: The recorded exchange.
+        :raises RecordingNotFoundError: If the request was never recorded.
+        """
+        key = _request_key(method, url, data)
+        if not (exchanges := self._exchanges.get(key)):
+            raise RecordingNotFoundError(method.upper(), url)
+
+        with self._lock:
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+
+        return exchanges[min(served, len(exchanges) - 1)]
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> RecordedResponse:
+        """
+        Serves the request from the archive.
+
+        :param method: The HTTP method of the request (ex: GET).
+        :param url: The URL of the request.
+        :param headers: The headers of the request (ignored).
+        :param data: The form data of the request.
+        :param timeout: The number of seconds to wait for the server before giving up (ignored).
+        :return: The recorded response.
+        :raises RecordingNotFoundError: If the request was never recorded.
+        """
+        exchange = self._next_exchange(method, url, data)
+        if self.replay_latency:
+            time.sleep(exchange.elapsed)
+
+        return RecordedResponse(
+            url=exchange.url,
+            status_code=exchange.status_code,
+            content=self._archive.read(exchange.body),
+            headers=CaseInsensitiveDict(exchange.headers),
+            encoding=exchange.encoding,
+        )
+
+    def recorded_urls(self) -> List[Tuple[str, str]]:
+        """
+        Gets the requests recorded in the archive.
+
+        :return: The (method, URL) of every distinct request recorded in the archive.
+        """
+        return [(exchanges[0].method, exchanges[0].url) for exchanges in self._exchanges.values()]
+
+    def close(self):
+        """Closes the archive."""
+        self._archive.close()
+
+    def __enter__(self) -> "ReplayTransport":
+        """Uses the transport for every request of the scrapper in the current context until the context exits (see use_transport)."""
+        self._using_transport = use_transport(self)
+        return self._using_transport.__enter__()
+
+    def __exit__(self, *exc_info):
+        """Restores the previous transport and closes the archive."""
+        self._using_transport.__exit__(*exc_info)
+        self.close()
@@ -1,37 +1,235 @@
 """A module which contains utils used by the scrapper for Dawson College."""
 
-from typing import Dict, List, Optional
+import codecs
+import time
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional
+from urllib.parse import urlencode, parse_qsl, urljoin, urlsplit, urlunsplit
+import re
 
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 import logging
 
 from pandas import DataFrame
 
-from dawson_college_pyscrapper.constants import DEFAULT_HEADERS
+from dawson_college_pyscrapper.cache import PageCache
+from dawson_college_pyscrapper.concurrency import SingleFlight
+from dawson_college_pyscrapper.constants import DEFAULT_HEADERS, MAIN_WEBSITE_URL
 from dawson_college_pyscrapper.exceptions import PageDetailsError
+from dawson_college_pyscrapper.extractors import Extractor, Field
 from dawson_college_pyscrapper.models import ProgramPageData
+from dawson_college_pyscrapper.transport import get_transport
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PORTS: Dict[str, int] = {"http": 80, "https": 443}
+MODIFIED_DATE_FORMAT: str = "%B %d, %Y"
+DEFAULT_ENCODING: str = "utf-8"
+# Browsers look for a meta charset in the first 1024 bytes of a page.
+ENCODING_SNIFF_BYTES: int = 1024
 
-def get_soup_of_page(url: str, header: Optional[Dict[str, str]] = None) -> BeautifulSoup:
+_HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+
+# Compiled once per process and shared by every program page parsed.
+PROGRAM_PAGE_EXTRACTOR: Extractor = Extractor(
+    [
+        Field("date", ".page-mod-date", transform=lambda text: text.replace("Last Modified: ", "")),
+        Field("title", "h1"),
+        Field("description", "meta[name=description]", attribute="content"),
+        Field("program_code", ".program-code"),
+        Field("campus", ".program-campus"),
+        Field("contact", "a[href^=mailto:]", attribute="href", transform=lambda href: href[len("mailto:") :].split("?", 1)[0]),
+        Field("links", "a[href]", attribute="href", many=True),
+    ]
+)
+
+# Shared by every thread so that concurrent requests for the same program page only fetch and parse it once.
+_program_page_flight = SingleFlight()
+
+
+def canonicalize_url(url: str, base_url: str = MAIN_WEBSITE_URL) -> str:
+    """
+    Canonicalizes the given URL so that different spellings of the same page compare equal.
+
+    Relative URLs are resolved against the base URL, the scheme and host are lower cased, default ports, fragments and
+    duplicate or trailing slashes are removed and query parameters are sorted.
+
+    :param url: The URL or path to canonicalize (ex: /programs/program-name or https://www.dawsoncollege.qc.ca//programs/program-name/)
+    :param base_url: The URL relative URLs are resolved against (ex: https://www.dawsoncollege.qc.ca)
+    :return: The canonical URL (ex: https://www.dawsoncollege.qc.ca/programs/program-name)
+    """
+    url = url.strip()
+    if url.startswith("//") and not urlsplit(url).netloc.count("."):
+        # Paths such as //programs/name are paths with a doubled slash, not protocol relative URLs.
+        url = "/" + url.lstrip("/")
+
+    scheme, netloc, path, query, _ = urlsplit(urljoin(f"{base_url.rstrip('/')}/", url))
+    scheme = scheme.lower()
+    netloc = netloc.lower()
+
+    if ":" in netloc:
+        host, _, port = netloc.rpartition(":")
+        if port.isdigit() and DEFAULT_PORTS.get(scheme) == int(port):
+            netloc = host
+
+    path = re.sub(r"/{2,}", "/", path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, netloc, path or "/", query, ""))
+
+
+def _known_encoding(name: Optional[str]) -> Optional[str]:
+    """
+    Normalizes the name of an encoding.
+
+    :param name: The name of the encoding (ex: UTF8).
+    :return: The normalized name of the encoding (ex: utf-8) or None if Python does not know it.
+    """
+    if not name:
+        return None
+
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def sniff_encoding(content: bytes, headers: Optional[Mapping[str, str]] = None) -> Optional[str]:
+    """
+    Finds the encoding a page declares, without running a charset detector over its body.
+
+    The charset of the Content-Type header wins, then the meta charset in the first ENCODING_SNIFF_BYTES bytes of the page.
+
+    :param content: The body of the page.
+    :param headers: The headers returned with the page, if any.
+    :return: The normalized name of the declared encoding (ex: utf-8) or None if the page does not declare a known one.
+    """
+    if headers and (header_match := _HEADER_CHARSET.search(headers.get("Content-Type") or "")):
+        if encoding := _known_encoding(header_match.group(1)):
+            return encoding
+
+    if meta_match := _META_CHARSET.search(content, 0, ENCODING_SNIFF_BYTES):
+        return _known_encoding(meta_match.group(1).decode("ascii", errors="ignore"))
+
+    return None
+
+
+def soup_from_content(content: bytes, headers: Optional[Mapping[str, str]] = None) -> BeautifulSoup:
+    """
+    Parses the body of a page, decoding it only once with the encoding it declares (see sniff_encoding) or UTF-8.
+
+    :param content: The body of the page.
+    :param headers: The headers returned with the page, if any.
+    :return: The BeautifulSoup object of the page.
+    """
+    return BeautifulSoup(content, "html.parser", from_encoding=sniff_encoding(content, headers) or DEFAULT_ENCODING)
+
+
+def remaining_time(deadline_at: Optional[float]) -> Optional[float]:
+    """
+    Gets the number of seconds left before the deadline.
+
+    :param deadline_at: The deadline as a time.monotonic() value, or None if there is no deadline.
+    :return: The number of seconds left (never negative), or None if there is no deadline.
+    """
+    if deadline_at is None:
+        return None
+
+    return max(deadline_at - time.monotonic(), 0.0)
+
+
+def bounded_timeout(timeout: Optional[float], deadline_at: Optional[float]) -> Optional[float]:
+    """
+    Gets the timeout of a request so that it does not outlive the deadline.
+
+    :param timeout: The timeout of the request, or None to wait forever.
+    :param deadline_at: The deadline as a time.monotonic() value, or None if there is no deadline.
+    :return: The smallest of the timeout and the time left before the deadline.
+    """
+    if (remaining := remaining_time(deadline_at)) is None:
+        return timeout
+
+    # A request needs some time to fail, even once the deadline is reached.
+    remaining = max(remaining, 0.001)
+
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def get_soup_of_page(
+    url: str, header: Optional[Dict[str, str]] = None, timeout: Optional[float] = None, cache: Optional[PageCache] = None
+) -> BeautifulSoup:
     """
     Gets the BeautifulSoup object of the page at the given URL.
 
     :param url: The URL of the page to get the BeautifulSoup object of (ex: https://www.dawsoncollege.qc.ca/programs)
     :param header: The header to use when making the request. If not provided, the default header will be used.
+    :param timeout: The number of seconds to wait for the server before giving up. If not provided, it will wait forever.
+    :param cache: An optional PageCache. Fresh cached pages are used as is and stale ones are revalidated with a conditional request.
     :return: The BeautifulSoup object of the page at the given URL.
+
+    The body is handed to the parser as bytes along with the encoding the page declares (see sniff_encoding), or UTF-8 if it
+    declares none, so it is decoded only once and the charset detector of requests never runs. The body is only decoded to a
+    string up front when it has to be stored in the cache.
     """
     header_to_use = header or DEFAULT_HEADERS
 
-    response = requests.get(url, headers=header_to_use)
+    cached_page = cache.get(url) if cache else None
+    if cached_page and cache.is_fresh(cached_page):
+        logger.debug("Using the cached page for %s", url)
+        return BeautifulSoup(cached_page.text.strip(), "html.parser")
+
+    if cached_page:
+        header_to_use = {**header_to_use, **cached_page.validators()}
+
+    response = get_transport().get(url, headers=header_to_use, timeout=timeout)
 
-    if not response.ok:
-        logger.debug(f"Failed to get the page at {url}. Got response code {response.status_code}")
+    if cached_page and response.status_code == 304:
+        logger.debug("The cached page for %s is still valid", url)
+        text = cached_page.text
+        # Resets the freshness of the page, keeping its validators unless the server sent new ones.
+        cache.set(
+            url,
+            text,
+            etag=response.headers.get("ETag") or cached_page.etag,
+            last_modified=response.headers.get("Last-Modified") or cached_page.last_modified,
+        )
+    elif not response.ok:
+        logger.debug("Failed to get the page at %s. Got response code %s", url, response.status_code)
         raise PageDetailsError
+    else:
+        content = response.content
+        if not cache:
+            return soup_from_content(content, response.headers)
+
+        encoding = sniff_encoding(content, response.headers) or DEFAULT_ENCODING
+
+        text = content.decode(encoding, errors="replace")
+        cache.set(url, text, etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"))
 
-    return BeautifulSoup(response.text.strip(), "html.parser")
+    return BeautifulSoup(text.strip(), "html.parser")
+
+
+def release_soup(html_soup: BeautifulSoup):
+    """
+    Destroys the whole tree of the given BeautifulSoup object so its memory is given back right away.
+
+    A parse tree is full of reference cycles (parents, siblings, next and previous elements) which would otherwise only be
+    reclaimed whenever the cyclic garbage collector runs. Calling decompose on the BeautifulSoup object alone only clears the
+    root so every top level element is decomposed first.
+
+    :param html_soup: The BeautifulSoup object to destroy. It must not be used afterwards.
+    """
+    for element in list(html_soup.contents):
+        if isinstance(element, Tag):
+            element.decompose()
+        else:
+            element.extract()
+
+    html_soup.decompose()
 
 
 def get_date_of_modification(html_soup: BeautifulSoup) -> str:
@@ -43,7 +241,7 @@ def get_date_of_modification(html_soup: BeautifulSoup) -> str:
     """
     default_return = ""
     if not (html_found := html_soup.find(class_="page-mod-date")):
-        logger.debug(f"Failed to get the date of modification for {html_soup}")
+        logger.debug("Failed to get the date of modification for %s", html_soup)
         return default_return
 
     date_modified_text = html_found.contents[0].strip()
@@ -51,17 +249,77 @@ def get_date_of_modification(html_soup: BeautifulSoup) -> str:
     return date_modified_text.replace("Last Modified: ", default_return)
 
 
-def parse_program_page(program_url: str) -> ProgramPageData:
+def extract_program_page(html_soup: BeautifulSoup, page_url: str) -> ProgramPageData:
+    """
+    Extracts every field of a program page in a single traversal of its tree (see PROGRAM_PAGE_EXTRACTOR).
+
+    :param html_soup: The BeautifulSoup object of the program page.
+    :param page_url: The URL of the program page, used to resolve its links (ex: https://www.dawsoncollege.qc.ca/programs/program-name)
+    :return: A ProgramPageData with the fields found on the page. Missing fields are left empty.
+    """
+    values = PROGRAM_PAGE_EXTRACTOR.extract(html_soup)
+    if values["date"] is None:
+        logger.debug("Failed to get the date of modification for %s", page_url)
+
+    page_host = urlsplit(page_url).netloc.lower()
+    outbound_links = {}
+    for href in values["links"]:
+        try:
+            link = canonicalize_url(href, base_url=page_url)
+        except ValueError:
+            logger.debug("Ignoring the malformed link %s on %s", href, page_url)
+            continue
+
+        scheme, netloc, *_ = urlsplit(link)
+        if scheme in DEFAULT_PORTS and netloc != page_host:
+            outbound_links.setdefault(link, None)
+
+    return ProgramPageData(
+        date=values["date"] or "",
+        title=values["title"] or "",
+        description=values["description"] or "",
+        program_code=values["program_code"] or "",
+        campus=values["campus"] or "",
+        contact=values["contact"] or "",
+        outbound_links=tuple(outbound_links),
+    )
+
+
+def parse_program_page(program_url: str, timeout: Optional[float] = None, cache: Optional[PageCache] = None) -> ProgramPageData:
     """
     A helper function to parse the program page url and return an expected data structure.
 
+    Concurrent calls for the same page (once canonicalized) share a single fetch and parse. The parse tree is decomposed
+    as soon as the data is extracted so only the extracted strings outlive the call.
+
     :param program_url: The URL of the program page to parse (ex: https://www.dawsoncollege.qc.ca/programs/program-name)
+    :param timeout: The number of seconds to wait for the server before giving up. If not provided, it will wait forever.
+    :param cache: An optional PageCache to fetch the page through (see get_soup_of_page).
     :return: A ProgramPageData from the given url.
     """
-    html_soup = get_soup_of_page(program_url)
-    date_modified = get_date_of_modification(html_soup=html_soup)
+    canonical_url = canonicalize_url(program_url)
+
+    def fetch_and_parse() -> ProgramPageData:
+        html_soup = get_soup_of_page(canonical_url, timeout=timeout, cache=cache)
+        try:
+            return extract_program_page(html_soup, canonical_url)
+        finally:
+            release_soup(html_soup)
+
+    return _program_page_flight.do(canonical_url, fetch_and_parse)
 
-    return ProgramPageData(date=date_modified)
+
+def parse_modified_date(modified_date: str) -> Optional[datetime]:
+    """
+    Parses the date a program was last modified.
+
+    :param modified_date: The date as shown on the program page (ex: January 20, 2023).
+    :return: The parsed date or None if it cannot be parsed.
+    """
+    try:
+        return datetime.strptime(modified_date.strip(), MODIFIED_DATE_FORMAT)
+    except (AttributeError, ValueError):
+        return None
 
 
 def get_number_of_type(data_frame: DataFrame, wanted_type: str):
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `aggregator` package in dawson_college_pyscrapper."""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from freezegun import freeze_time
+
+from dawson_college_pyscrapper.aggregator import MetricsAggregator
+from dawson_college_pyscrapper.models import ScrapeReport
+from tests.utils import get_program
+
+
+def test_MetricsAggregator_counts_programs_as_they_are_added():
+    aggregator = MetricsAggregator(number_of_students=1000, number_of_faculty=100)
+
+    aggregator.add(get_program("program-1", "Program"))
+    aggregator.add(get_program("program-2", "Profile", "March 2, 2021"))
+    aggregator.add(None)
+    aggregator.add(get_program("program-3", "Special Area of Study", "2021-05-05"))
+    aggregator.add(get_program("program-4", "General Education", ""))
+    aggregator.add(get_program("program-5", "Discipline"))
+    snapshot = aggregator.snapshot()
+
+    assert aggregator.finished == 6
+    assert snapshot.total_programs_offered == 5
+    assert snapshot.number_of_programs == 1
+    assert snapshot.number_of_profiles == 1
+    assert snapshot.number_of_disciplines == 1
+    assert snapshot.number_of_special_studies == 1
+    assert snapshot.number_of_general_studies == 1
+    assert snapshot.total_year_counts == {"2023": 2, "2021": 2}
+    assert snapshot.number_of_students_per_faculty == 10
+
+
+def test_MetricsAggregator_snapshot_reports_progress():
+    report = ScrapeReport()
+    aggregator = MetricsAggregator(report=report)
+
+    assert aggregator.snapshot().completeness == 1.0
+
+    report.listed = 4
+    aggregator.add(get_program("program-1"))
+    aggregator.add(None)
+    first = aggregator.snapshot()
+    aggregator.add(get_program("program-2"))
+
+    assert first.completeness == 0.5
+    assert first.programs == [get_program("program-1")]
+    assert aggregator.snapshot().completeness == 0.75
+
+
+@freeze_time("2023-01-20")
+def test_MetricsAggregator_result_uses_report_and_given_order():
+    report = ScrapeReport(listed=3, skipped_urls=["https://www.dawsoncollege.qc.ca/programs/program-3"])
+    aggregator = MetricsAggregator(report=report)
+    aggregator.add(get_program("program-2"))
+    aggregator.add(get_program("program-1"))
+
+    result = aggregator.result([get_program("program-1"), get_program("program-2")])
+
+    assert result.date == datetime(2023, 1, 20)
+    assert result.programs == [get_program("program-1"), get_program("program-2")]
+    assert result.completeness == 0.6667
+    assert result.skipped_urls == ["https://www.dawsoncollege.qc.ca/programs/program-3"]
+    assert aggregator.result().programs == [get_program("program-2"), get_program("program-1")]
+
+
+def test_MetricsAggregator_is_thread_safe():
+    aggregator = MetricsAggregator()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(aggregator.add, [get_program(f"program-{number}") for number in range(1000)]))
+
+    assert aggregator.snapshot().number_of_programs == 1000
+    assert aggregator.finished == 1000
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `archive` package in dawson_college_pyscrapper."""
+
+import os
+
+import pytest
+
+pytest.importorskip("zstandard")
+
+from dawson_college_pyscrapper.archive import (  # noqa: E402
+    INDEX_FILE_NAME,
+    NO_DICTIONARY,
+    ArchivingTransport,
+    PageArchive,
+    parse_archived_program_pages,
+)
+from dawson_college_pyscrapper.transport import RequestsTransport, get_transport, use_transport  # noqa: E402
+from dawson_college_pyscrapper.util import parse_program_page  # noqa: E402
+
+PROGRAM_URL = "https://www.dawsoncollege.qc.ca/programs/program-name"
+
+
+def get_program_page(index: int) -> bytes:
+    return f"""
+    <html><head><meta charset="utf-8"><meta name="description" content="Programme numéro {index}"></head>
+    <body>
+        <nav><a href="/programs">Programs</a><a href="/about">About</a><a href="/admissions">Admissions</a></nav>
+        <h1>Program {index}</h1>
+        <div class="program-code">{index:03d}.A0</div>
+        <a href="https://example.com/partner-{index}">Partner</a>
+        <div class="page-mod-date">Last Modified: January {index % 28 + 1}, 2023</div>
+    </body></html>
+    """.encode(
+        "utf-8"
+    )
+
+
+def test_PageArchive_round_trips_pages(tmp_path):
+    with PageArchive(tmp_path, train_after=0) as archive:
+        archive.add(PROGRAM_URL, get_program_page(1), content_type="text/html; charset=utf-8", fetched_at=100.0)
+
+        page = archive.get(PROGRAM_URL)
+
+        assert len(archive) == 1
+        assert page.url == PROGRAM_URL
+        assert page.fetched_at == 100.0
+        assert page.content == get_program_page(1)
+        assert page.content_type == "text/html; charset=utf-8"
+        assert archive.get(f"{PROGRAM_URL}-missing") is None
+
+
+def test_PageArchive_keeps_every_version_by_fetch_time(tmp_path):
+    with PageArchive(tmp_path, train_after=0) as archive:
+        archive.add(PROGRAM_URL, get_program_page(2), fetched_at=200.0)
+        archive.add(PROGRAM_URL, get_program_page(1), fetched_at=100.0)
+
+        assert archive.fetch_times(PROGRAM_URL) == [100.0, 200.0]
+        assert archive.get(PROGRAM_URL).content == get_program_page(2)
+        assert archive.get(PROGRAM_URL, at=150.0).content == get_program_page(1)
+        assert archive.get(PROGRAM_URL, at=99.0) is None
+
+
+def test_PageArchive_trains_a_dictionary_and_reads_pages_compressed_before_and_after(tmp_path):
+    with PageArchive(tmp_path, dictionary_size=4096, train_after=20) as archive:
+        for index in range(40):
+            archive.add(f"{PROGRAM_URL}-{index}", get_program_page(index))
+
+        dictionaries = os.listdir(tmp_path / "dictionaries")
+        assert dictionaries == ["1.zdict"]
+
+        for index in range(40):
+            assert archive.get(f"{PROGRAM_URL}-{index}").content == get_program_page(index)
+
+
+def test_PageArchive_dictionary_makes_pages_smaller(tmp_path):
+    def archived_size(directory):
+        with PageArchive(directory, dictionary_size=4096, train_after=0) as archive:
+            for index in range(20):
+                archive.add(f"{PROGRAM_URL}-{index}", get_program_page(index))
+            archive.train_dictionary()
+            pages_size = os.path.getsize(directory / "pages.bin")
+            for index in range(20, 120):
+                archive.add(f"{PROGRAM_URL}-{index}", get_program_page(index))
+
+        return os.path.getsize(directory / "pages.bin") - pages_size
+
+    with PageArchive(tmp_path / "plain", train_after=0) as archive:
+        for index in range(20, 120):
+            archive.add(f"{PROGRAM_URL}-{index}", get_program_page(index))
+    plain_size = os.path.getsize(tmp_path / "plain" / "pages.bin")
+
+    assert archived_size(tmp_path / "dictionary") < plain_size / 2
+
+
+def test_PageArchive_train_dictionary_without_enough_pages(tmp_path):
+    with PageArchive(tmp_path, train_after=0) as archive:
+        archive.add(PROGRAM_URL, get_program_page(1))
+
+        assert archive.train_dictionary() is False
+        assert archive.get(PROGRAM_URL).content == get_program_page(1)
+
+
+def test_PageArchive_is_loaded_again_from_its_directory(tmp_path):
+    with PageArchive(tmp_path, dictionary_size=4096, train_after=20) as archive:
+        for index in range(30):
+            archive.add(f"{PROGRAM_URL}-{index}", get_program_page(index), fetched_at=float(index))
+
+    with PageArchive(tmp_path, dictionary_size=4096, train_after=20) as archive:
+        archive.add(f"{PROGRAM_URL}-30", get_program_page(30), fetched_at=30.0)
+
+        assert len(archive) == 31
+        assert archive._dictionary_id != NO_DICTIONARY
+        assert archive.get(f"{PROGRAM_URL}-5").content == get_program_page(5)
+        assert archive.get(f"{PROGRAM_URL}-30").content == get_program_page(30)
+        assert os.listdir(tmp_path / "dictionaries") == ["1.zdict"]
+
+
+def test_PageArchive_loads_the_latest_dictionary_by_number(tmp_path):
+    with PageArchive(tmp_path, dictionary_size=4096, train_after=20) as archive:
+        for index in range(20):
+            archive.add(f"{PROGRAM_URL}-{index}", get_program_page(index))
+
+    dictionary = (tmp_path / "dictionaries" / "1.zdict").read_bytes()
+    for dictionary_id in range(2, 11):
+        (tmp_path / "dictionaries" / f"{dictionary_id}.zdict").write_bytes(dictionary)
+    (tmp_path / "dictionaries" / "backup.zdict").write_bytes(b"not a dictionary")
+    (tmp_path / "dictionaries" / "notes.txt").write_bytes(b"not a dictionary")
+
+    with PageArchive(tmp_path, dictionary_size=4096, train_after=20) as archive:
+        archive.add(f"{PROGRAM_URL}-20", get_program_page(20))
+
+        assert archive._dictionary_id == 10
+        assert archive.get(f"{PROGRAM_URL}-5").content == get_program_page(5)
+        assert archive.get(f"{PROGRAM_URL}-20").content == get_program_page(20)
+
+
+def test_PageArchive_drops_partially_written_index_record(tmp_path):
+    with PageArchive(tmp_path, train_after=0) as archive:
+        archive.add(PROGRAM_URL, get_program_page(1))
+        archive.add(f"{PROGRAM_URL}-2", get_program_page(2))
+
+    index_path = tmp_path / INDEX_FILE_NAME
+    os.truncate(index_path, os.path.getsize(index_path) - 5)
+
+    with PageArchive(tmp_path, train_after=0) as archive:
+        assert len(archive) == 1
+        assert archive.get(f"{PROGRAM_URL}-2") is None
+
+        archive.add(f"{PROGRAM_URL}-2", get_program_page(2))
+
+        assert archive.get(PROGRAM_URL).content == get_program_page(1)
+        assert archive.get(f"{PROGRAM_URL}-2").content == get_program_page(2)
+
+
+def test_PageArchive_rejects_other_files(tmp_path):
+    (tmp_path / INDEX_FILE_NAME).write_bytes(b"not an archive index")
+
+    with pytest.raises(ValueError):
+        PageArchive(tmp_path)
+
+
+def test_ArchivingTransport_archives_pages_fetched_by_the_scrapper(requests_mock, tmp_path):
+    requests_mock.get(PROGRAM_URL, content=get_program_page(1), headers={"Content-Type": "text/html; charset=utf-8"})
+    requests_mock.get(f"{PROGRAM_URL}-missing", status_code=404)
+    previous_transport = get_transport()
+
+    with PageArchive(tmp_path, train_after=0) as archive:
+        with ArchivingTransport(archive):
+            parse_program_page(f"{PROGRAM_URL}/")
+            get_transport().get(f"{PROGRAM_URL}-missing")
+
+        assert get_transport() is previous_transport
+        assert len(archive) == 1
+        assert archive.get(PROGRAM_URL).content_type == "text/html; charset=utf-8"
+
+
+def test_ArchivingTransport_is_used_inside_use_transport(tmp_path):
+    with PageArchive(tmp_path, train_after=0) as archive, use_transport(RequestsTransport()) as outer_transport:
+        with ArchivingTransport(archive) as transport:
+            assert get_transport() is transport
+        assert get_transport() is outer_transport
+
+    assert get_transport() is not outer_transport
+
+
+def test_parse_archived_program_pages_extracts_the_latest_version_of_every_page(tmp_path):
+    with PageArchive(tmp_path, train_after=0) as archive:
+        archive.add(PROGRAM_URL, get_program_page(1), fetched_at=100.0)
+        archive.add(f"{PROGRAM_URL}-2", get_program_page(2), fetched_at=100.0)
+        archive.add(PROGRAM_URL, get_program_page(3), fetched_at=200.0)
+        archive.add("https://www.dawsoncollege.qc.ca/about", get_program_page(4), fetched_at=100.0)
+
+        parsed = dict(parse_archived_program_pages(archive, base_url="https://www.dawsoncollege.qc.ca/programs/"))
+
+    assert sorted(parsed) == [PROGRAM_URL, f"{PROGRAM_URL}-2"]
+    assert parsed[PROGRAM_URL].title == "Program 3"
+    assert parsed[PROGRAM_URL].description == "Programme numéro 3"
+    assert parsed[PROGRAM_URL].program_code == "003.A0"
+    assert parsed[PROGRAM_URL].date == "January 4, 2023"
+    assert parsed[PROGRAM_URL].outbound_links == ("https://example.com/partner-3",)
+    assert parsed[f"{PROGRAM_URL}-2"].title == "Program 2"
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `cache` package in dawson_college_pyscrapper."""
+
+from freezegun import freeze_time
+
+from dawson_college_pyscrapper.cache import CachedPage, PageCache
+
+
+def test_PageCache_get_missing_page(tmp_path):
+    assert PageCache(tmp_path).get("https://www.dawsoncollege.qc.ca/programs") is None
+
+
+def test_PageCache_set_and_get(tmp_path):
+    cache = PageCache(tmp_path)
+    cache.set("https://www.dawsoncollege.qc.ca/programs", "<html></html>", etag='"abc"', last_modified="Fri, 20 Jan 2023 00:00:00 GMT")
+
+    page = cache.get("https://www.dawsoncollege.qc.ca/programs")
+
+    assert page.text == "<html></html>"
+    assert page.validators() == {"If-None-Match": '"abc"', "If-Modified-Since": "Fri, 20 Jan 2023 00:00:00 GMT"}
+
+
+def test_PageCache_ignores_unreadable_entry(tmp_path):
+    cache = PageCache(tmp_path)
+    cache.set("https://www.dawsoncollege.qc.ca/programs", "<html></html>")
+    with open(cache._path("https://www.dawsoncollege.qc.ca/programs"), "w") as cached_file:
+        cached_file.write("{not json")
+
+    assert cache.get("https://www.dawsoncollege.qc.ca/programs") is None
+
+
+def test_PageCache_is_fresh(tmp_path):
+    with freeze_time("2023-01-20 00:00:00"):
+        page = PageCache(tmp_path).set("https://www.dawsoncollege.qc.ca/programs", "<html></html>")
+
+    with freeze_time("2023-01-20 00:00:30"):
+        assert PageCache(tmp_path, max_age=60).is_fresh(page)
+        assert not PageCache(tmp_path, max_age=10).is_fresh(page)
+        assert not PageCache(tmp_path).is_fresh(page)
+
+
+def test_CachedPage_validators_empty():
+    assert CachedPage(url="https://www.dawsoncollege.qc.ca/programs", text="", fetched_at=0).validators() == {}
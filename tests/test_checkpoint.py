@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `checkpoint` package in dawson_college_pyscrapper."""
+
+from dawson_college_pyscrapper.checkpoint import Checkpoint
+from tests.utils import get_program
+
+
+def test_Checkpoint_starts_empty_when_journal_does_not_exist(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "journal.jsonl")
+
+    assert checkpoint.completed == {}
+    assert checkpoint.failed == set()
+    assert checkpoint.get("https://www.dawsoncollege.qc.ca/programs/program-1") is None
+
+
+def test_Checkpoint_records_are_loaded_when_resuming(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    checkpoint = Checkpoint(path)
+    checkpoint.record_program(get_program("program-1"))
+    checkpoint.record_failure("https://www.dawsoncollege.qc.ca/programs/program-2")
+
+    resumed = Checkpoint(path)
+
+    assert resumed.get("https://www.dawsoncollege.qc.ca/programs/program-1") == get_program("program-1")
+    assert resumed.failed == {"https://www.dawsoncollege.qc.ca/programs/program-2"}
+
+
+def test_Checkpoint_completed_program_clears_earlier_failure(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    checkpoint = Checkpoint(path)
+    checkpoint.record_failure("https://www.dawsoncollege.qc.ca/programs/program-1")
+    checkpoint.record_program(get_program("program-1"))
+
+    resumed = Checkpoint(path)
+
+    assert resumed.failed == set()
+    assert resumed.get("https://www.dawsoncollege.qc.ca/programs/program-1") == get_program("program-1")
+
+
+def test_Checkpoint_ignores_partially_written_last_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    Checkpoint(path).record_program(get_program("program-1"))
+    with open(path, "a", encoding="utf-8") as journal:
+        journal.write('{"type": "program", "program": {"name": "progr')
+
+    resumed = Checkpoint(path)
+
+    assert list(resumed.completed) == ["https://www.dawsoncollege.qc.ca/programs/program-1"]
+
+
+def test_Checkpoint_appends_after_partially_written_last_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    Checkpoint(path).record_program(get_program("program-1"))
+    with open(path, "a", encoding="utf-8") as journal:
+        journal.write('{"type": "program", "program": {"name": "progr')
+
+    Checkpoint(path).record_program(get_program("program-2"))
+    resumed = Checkpoint(path)
+
+    assert resumed.completed == {program.url: program for program in (get_program("program-1"), get_program("program-2"))}
+    assert path.read_text(encoding="utf-8").count("\n") == 2
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `cli` package in dawson_college_pyscrapper."""
+
+import json
+
+import pandas as pd
+import pytest
+
+from dawson_college_pyscrapper.cache import PageCache
+from dawson_college_pyscrapper.checkpoint import Checkpoint
+from dawson_college_pyscrapper.cli import main
+from dawson_college_pyscrapper.connections import SessionTransport
+from dawson_college_pyscrapper.models import Program
+from dawson_college_pyscrapper.profiling import stage
+from dawson_college_pyscrapper.transport import RecordingTransport, ReplayTransport, RequestsTransport, get_transport
+from tests.utils import get_metrics
+
+
+def test_main_passes_performance_controls_to_scrape(mocker, tmp_path):
+    mocked_scrape = mocker.patch("dawson_college_pyscrapper.cli.scrape", return_value=get_metrics())
+
+    exit_code = main(
+        [
+            "--concurrency",
+            "8",
+            "--timeout",
+            "5",
+            "--deadline",
+            "60",
+            "--cache-dir",
+            str(tmp_path / "cache"),
+            "--checkpoint",
+            str(tmp_path / "journal.jsonl"),
+            "--output",
+            str(tmp_path / "metrics.json"),
+        ]
+    )
+
+    assert exit_code == 0
+    kwargs = mocked_scrape.call_args.kwargs
+    assert kwargs["max_workers"] == 8
+    assert kwargs["timeout"] == 5.0
+    assert kwargs["deadline"] == 60.0
+    assert isinstance(kwargs["cache"], PageCache)
+    assert isinstance(kwargs["checkpoint"], Checkpoint)
+
+
+def test_main_writes_json_to_stdout(mocker, capsys):
+    mocker.patch("dawson_college_pyscrapper.cli.scrape", return_value=get_metrics())
+
+    main([])
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["number_of_students"] == 1000
+    assert output["programs"][0]["name"] == "Program 1"
+
+
+def test_main_writes_csv_file(mocker, tmp_path):
+    mocker.patch("dawson_college_pyscrapper.cli.scrape", return_value=get_metrics())
+    output = tmp_path / "programs.csv"
+
+    main(["--format", "csv", "--output", str(output)])
+
+    programs_data_frame = pd.read_csv(output)
+    assert list(programs_data_frame.columns) == [
+        "name",
+        "modified_date",
+        "program_type",
+        "url",
+        "description",
+        "program_code",
+        "campus",
+        "contact",
+    ]
+    assert programs_data_frame["name"].tolist() == ["Program 1"]
+
+
+def test_main_parquet_requires_output(mocker):
+    mocker.patch("dawson_college_pyscrapper.cli.scrape", return_value=get_metrics())
+
+    with pytest.raises(SystemExit):
+        main(["--format", "parquet"])
+
+
+def test_main_parquet_without_pyarrow_fails_before_scraping(mocker, tmp_path):
+    mocked_scrape = mocker.patch("dawson_college_pyscrapper.cli.scrape", return_value=get_metrics())
+    mocker.patch.dict("sys.modules", {"pyarrow": None})
+
+    with pytest.raises(SystemExit):
+        main(["--format", "parquet", "--output", str(tmp_path / "programs.parquet")])
+
+    mocked_scrape.assert_not_called()
+
+
+def test_main_rejects_invalid_concurrency():
+    with pytest.raises(SystemExit):
+        main(["--concurrency", "0"])
+
+
+def test_main_writes_profile(mocker, tmp_path):
+    def fake_scrape(**kwargs):
+        with stage("program_pages"):
+            pass
+        return get_metrics()
+
+    mocker.patch("dawson_college_pyscrapper.cli.scrape", side_effect=fake_scrape)
+    profile_directory = tmp_path / "profile"
+
+    main(["--profile", str(profile_directory), "--output", str(tmp_path / "metrics.json")])
+
+    assert (profile_directory / "scrape.pstats").stat().st_size > 0
+    assert "program_pages" in (profile_directory / "stages.txt").read_text()
+
+
+def test_main_records_and_replays(mocker, tmp_path):
+    def fake_scrape(**kwargs):
+        assert isinstance(get_transport(), expected_transport)
+        return get_metrics()
+
+    mocker.patch("dawson_college_pyscrapper.cli.scrape", side_effect=fake_scrape)
+    archive_path = tmp_path / "crawl.zip"
+
+    expected_transport = RecordingTransport
+    main(["--record", str(archive_path), "--output", str(tmp_path / "metrics.json")])
+
+    expected_transport = ReplayTransport
+    main(["--replay", str(archive_path), "--output", str(tmp_path / "metrics.json")])
+
+    assert isinstance(get_transport(), RequestsTransport)
+
+
+def test_main_warms_up_pooled_connections(mocker, tmp_path):
+    def fake_scrape(**kwargs):
+        assert isinstance(get_transport(), SessionTransport)
+        assert get_transport().pool_size == 12
+        return get_metrics()
+
+    mocked_scrape = mocker.patch("dawson_college_pyscrapper.cli.scrape", side_effect=fake_scrape)
+
+    main(["--warm-up", "4", "--concurrency", "12", "--output", str(tmp_path / "metrics.json")])
+
+    assert mocked_scrape.call_args.kwargs["warm_up"] == 4
+    assert isinstance(get_transport(), RequestsTransport)
+
+
+def test_main_rejects_warm_up_with_replay(tmp_path):
+    with pytest.raises(SystemExit):
+        main(["--warm-up", "2", "--replay", str(tmp_path / "crawl.zip")])
+
+
+def test_main_rejects_record_with_replay(tmp_path):
+    with pytest.raises(SystemExit):
+        main(["--record", str(tmp_path / "a.zip"), "--replay", str(tmp_path / "b.zip")])
+
+
+def test_main_coordinates_workers_through_queue(mocker, tmp_path):
+    mocked_scrape_distributed = mocker.patch("dawson_college_pyscrapper.cli.scrape_distributed", return_value=get_metrics())
+    mocked_scrape = mocker.patch("dawson_college_pyscrapper.cli.scrape")
+
+    main(["--queue", str(tmp_path / "queue.sqlite"), "--deadline", "60", "--output", str(tmp_path / "metrics.json")])
+
+    mocked_scrape.assert_not_called()
+    assert mocked_scrape_distributed.call_args.kwargs["deadline"] == 60
+    assert json.loads((tmp_path / "metrics.json").read_text())["number_of_students"] == 1000
+
+
+def test_main_runs_worker(mocker, tmp_path):
+    mocked_run_worker = mocker.patch("dawson_college_pyscrapper.cli.run_worker", return_value=3)
+
+    assert main(["--queue", str(tmp_path / "queue.sqlite"), "--worker", "-c", "4", "--lease-timeout", "30"]) == 0
+
+    assert mocked_run_worker.call_args.kwargs["max_workers"] == 4
+    assert mocked_run_worker.call_args.kwargs["lease_timeout"] == 30
+
+
+def test_main_rejects_worker_without_queue():
+    with pytest.raises(SystemExit):
+        main(["--worker"])
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `concurrency` package in dawson_college_pyscrapper."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dawson_college_pyscrapper.concurrency import HostLimiter, SingleFlight
+
+
+def test_SingleFlight_coalesces_concurrent_calls_for_the_same_key():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_work():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        leader = executor.submit(flight.do, "key", slow_work)
+        started.wait(timeout=5)
+        followers = [executor.submit(flight.do, "key", slow_work) for _ in range(4)]
+        # Give every follower time to block on the in-flight call before letting the leader finish.
+        time.sleep(0.2)
+        release.set()
+        results = [leader.result()] + [follower.result() for follower in followers]
+
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_SingleFlight_does_the_work_again_once_a_call_completed():
+    flight = SingleFlight()
+    calls = []
+
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 1
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 2
+
+
+def test_SingleFlight_shares_exceptions_and_forgets_the_key():
+    flight = SingleFlight()
+
+    def failing_work():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", failing_work)
+
+    assert flight.in_flight() == 0
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+
+def test_HostLimiter_caps_requests_in_flight_per_host():
+    limiter = HostLimiter(max_per_host=2)
+    lock = threading.Lock()
+    in_flight = {}
+    peak = {}
+
+    def request(url):
+        host = url.split("/")[2]
+        with limiter.limit(url):
+            with lock:
+                in_flight[host] = in_flight.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), in_flight[host])
+            time.sleep(0.02)
+            with lock:
+                in_flight[host] -= 1
+
+    urls = [f"https://{host}/page-{index}" for host in ("a.example.com", "b.example.com") for index in range(6)]
+    with ThreadPoolExecutor(max_workers=12) as executor:
+        list(executor.map(request, urls))
+
+    assert peak == {"a.example.com": 2, "b.example.com": 2}
+
+
+def test_HostLimiter_rejects_invalid_limit():
+    with pytest.raises(ValueError):
+        HostLimiter(max_per_host=0)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `connections` package in dawson_college_pyscrapper."""
+
+import datetime
+import ipaddress
+import socket
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dawson_college_pyscrapper.concurrency import HostLimiter
+from dawson_college_pyscrapper.connections import DNSCache, SessionTransport
+from dawson_college_pyscrapper.models import Site
+from dawson_college_pyscrapper.scrapper import scrape
+from dawson_college_pyscrapper.transport import LimitedTransport, RequestsTransport, Transport, get_transport, use_transport
+
+# Stands in for the round trips of the TCP and TLS handshakes of every new connection to a remote server.
+CONNECT_DELAY = 0.3
+LISTING_DELAY = 0.5
+NUMBER_OF_PROGRAMS = 2
+
+LISTING_PAGE = (
+    '<div class="entry-content"><table>'
+    + "".join(
+        f'<tr><td class="program-type">Program</td><td class="program-name"><a href="/programs/program-{index}">Program {index}</a></td></tr>'
+        for index in range(NUMBER_OF_PROGRAMS)
+    )
+    + "</table></div>"
+)
+PROGRAM_PAGE = '<h1>Program</h1><div class="page-mod-date">Last Modified: January 20, 2023</div>'
+
+
+def write_certificate(directory):
+    x509 = pytest.importorskip("cryptography.x509")
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost"), x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), True)
+        .sign(key, hashes.SHA256())
+    )
+
+    certificate_path = directory / "certificate.pem"
+    key_path = directory / "key.pem"
+    certificate_path.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+
+    return str(certificate_path), str(key_path)
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/programs/alphabetical-listing":
+            time.sleep(LISTING_DELAY)
+            body = LISTING_PAGE
+        else:
+            self.server.program_page_times.append(time.monotonic())
+            body = PROGRAM_PAGE
+
+        content = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TLSServer(ThreadingHTTPServer):
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(self, certificate_path, key_path):
+        super().__init__(("127.0.0.1", 0), SiteHandler)
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(certificate_path, key_path)
+        self.handshakes = []
+        self.program_page_times = []
+
+    def finish_request(self, request, client_address):
+        time.sleep(CONNECT_DELAY)
+        try:
+            tls_request = self.context.wrap_socket(request, server_side=True)
+        except (ssl.SSLError, OSError):
+            return
+
+        self.handshakes.append(tls_request.session_reused)
+        try:
+            self.RequestHandlerClass(tls_request, client_address, self)
+        except OSError:
+            pass
+        finally:
+            tls_request.close()
+
+
+@pytest.fixture
+def tls_server(tmp_path):
+    certificate_path, key_path = write_certificate(tmp_path)
+    server = TLSServer(certificate_path, key_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server, certificate_path
+
+    server.shutdown()
+    server.server_close()
+
+
+def get_site(port: int) -> Site:
+    # The listing and the program pages are served by different hosts, so the program pages need connections of their own.
+    return Site(name="local", listing_url=f"https://localhost:{port}/programs/alphabetical-listing", base_url=f"https://127.0.0.1:{port}")
+
+
+def time_to_first_program_page(server, certificate_path, warm_up: int) -> float:
+    server.program_page_times.clear()
+    with SessionTransport(verify=certificate_path):
+        start = time.monotonic()
+        metrics = scrape(site=get_site(server.server_address[1]), warm_up=warm_up, timeout=10)
+
+    assert metrics.total_programs_offered == NUMBER_OF_PROGRAMS
+    return min(server.program_page_times) - start
+
+
+def test_warm_up_lowers_time_to_first_program_page(tls_server):
+    server, certificate_path = tls_server
+
+    cold = time_to_first_program_page(server, certificate_path, warm_up=0)
+    warm = time_to_first_program_page(server, certificate_path, warm_up=2)
+
+    # Cold: connect to the listing host, download the listing, then connect to the program host.
+    assert cold >= 2 * CONNECT_DELAY + LISTING_DELAY
+    # Warm: the connection to the program host was opened while the listing downloaded.
+    assert warm < cold - CONNECT_DELAY / 2
+
+
+def test_SessionTransport_warm_up_opens_pooled_connections(tls_server):
+    server, certificate_path = tls_server
+    url = f"https://127.0.0.1:{server.server_address[1]}"
+
+    with SessionTransport(verify=certificate_path) as transport:
+        futures = transport.warm_up([url, f"{url}/programs"], connections=3)
+
+        assert [future.result(timeout=10) for future in futures] == [True, True, True]
+
+        for index in range(3):
+            assert transport.get(f"{url}/programs/program-{index}").ok
+        assert len(server.handshakes) == 3
+
+
+def test_SessionTransport_warm_up_logs_failed_connections():
+    with SessionTransport() as transport:
+        futures = transport.warm_up(["https://127.0.0.1:9"], connections=2, timeout=1)
+
+        assert [future.result(timeout=10) for future in futures] == [False, False]
+
+
+def test_SessionTransport_resumes_tls_session_on_reconnect(tls_server):
+    server, certificate_path = tls_server
+    url = f"https://localhost:{server.server_address[1]}/programs/program-0"
+
+    with SessionTransport(verify=certificate_path) as transport:
+        assert transport.get(url).ok
+        transport.close()
+        assert transport.get(url).ok
+
+    assert server.handshakes == [False, True]
+
+
+def test_SessionTransport_resolves_hosts_once(tls_server, mocker):
+    server, certificate_path = tls_server
+    url = f"https://localhost:{server.server_address[1]}/programs/program-0"
+    getaddrinfo = mocker.spy(socket, "getaddrinfo")
+
+    with SessionTransport(verify=certificate_path) as transport:
+        assert transport.get(url).ok
+        transport.close()
+        assert transport.get(url).ok
+
+    assert [call.args[0] for call in getaddrinfo.call_args_list].count("localhost") == 1
+
+
+def test_SessionTransport_tries_every_address_of_a_host(tls_server, mocker):
+    server, certificate_path = tls_server
+    url = f"https://localhost:{server.server_address[1]}/programs/program-0"
+
+    with SessionTransport(verify=certificate_path) as transport:
+        # Nothing listens on 127.0.0.2 so the connection is refused before the next address is tried.
+        mocker.patch.object(transport.dns_cache, "resolve", return_value=["127.0.0.2", "127.0.0.1"])
+
+        assert transport.get(url).ok
+
+
+def test_DNSCache_resolves_again_once_expired(mocker):
+    getaddrinfo = mocker.patch(
+        "socket.getaddrinfo", return_value=[(None, None, None, "", ("10.0.0.1", 443)), (None, None, None, "", ("10.0.0.1", 443))]
+    )
+    dns_cache = DNSCache(ttl=0)
+
+    assert dns_cache.resolve("www.dawsoncollege.qc.ca", 443) == ["10.0.0.1"]
+    assert dns_cache.resolve("www.dawsoncollege.qc.ca", 443) == ["10.0.0.1"]
+    assert dns_cache.resolve("10.0.0.2", 443) == ["10.0.0.2"]
+    assert getaddrinfo.call_count == 2
+
+
+def test_warm_up_is_forwarded_to_the_wrapped_transport(mocker):
+    transport = SessionTransport()
+    warm_up = mocker.patch.object(transport, "warm_up", return_value=[])
+
+    LimitedTransport(transport, HostLimiter(2)).warm_up(["https://www.dawsoncollege.qc.ca"], connections=4)
+
+    warm_up.assert_called_once_with(["https://www.dawsoncollege.qc.ca"], connections=4, timeout=None)
+    assert Transport().warm_up(["https://www.dawsoncollege.qc.ca"]) == []
+    assert RequestsTransport().warm_up(["https://www.dawsoncollege.qc.ca"]) == []
+    assert isinstance(get_transport(), RequestsTransport)
+
+
+def test_SessionTransport_is_used_inside_use_transport():
+    with use_transport(RequestsTransport()) as outer_transport:
+        with SessionTransport() as transport:
+            assert get_transport() is transport
+        assert get_transport() is outer_transport
+
+    assert get_transport() is not outer_transport
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `distributed` package in dawson_college_pyscrapper."""
+
+import threading
+from dataclasses import asdict
+
+import pytest
+
+from dawson_college_pyscrapper.checkpoint import Checkpoint
+from dawson_college_pyscrapper.distributed import (
+    SQLiteWorkQueue,
+    collect_programs,
+    enqueue_programs,
+    run_worker,
+    scrape_distributed,
+)
+from dawson_college_pyscrapper.models import Program, ScrapeReport, Site
+from tests.utils import get_listing_html, get_program
+
+SITE = Site(name="other-college", listing_url="https://www.other-college.ca/en/programs", base_url="https://www.other-college.ca")
+
+
+def get_scraped_program(number: int) -> Program:
+    return get_program(
+        f"/en/programs/program-{number}", modified_date="May 5, 2022", url=f"https://www.other-college.ca/en/programs/program-{number}"
+    )
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return tmp_path / "queue.sqlite"
+
+
+@pytest.fixture
+def mock_site(requests_mock):
+    requests_mock.get(SITE.listing_url, text=get_listing_html(*(f"/en/programs/program-{number}" for number in range(4))))
+    for number in range(4):
+        requests_mock.get(
+            f"https://www.other-college.ca/en/programs/program-{number}", text='<p class="page-mod-date">Last Modified: May 5, 2022</p>'
+        )
+
+    return requests_mock
+
+
+def test_SQLiteWorkQueue_leases_tasks_in_order(queue_path):
+    with SQLiteWorkQueue(queue_path) as queue:
+        queue.enqueue("b", {"number": 1})
+        queue.enqueue("a", {"number": 2})
+
+        first = queue.lease("worker-1", lease_timeout=60)
+        second = queue.lease("worker-2", lease_timeout=60)
+
+        assert (first.task_id, first.payload, first.attempt) == ("b", {"number": 1}, 1)
+        assert second.task_id == "a"
+        assert queue.lease("worker-3", lease_timeout=60) is None
+        assert queue.unfinished() == 2
+
+        assert queue.complete("b", "worker-1", {"value": 1})
+        assert not queue.complete("b", "worker-3", {"value": 2})
+        assert queue.results() == {"b": {"value": 1}}
+        assert queue.unfinished() == 1
+
+
+def test_SQLiteWorkQueue_releases_expired_leases(queue_path):
+    with SQLiteWorkQueue(queue_path, max_attempts=2) as queue:
+        queue.enqueue("a", {})
+
+        assert queue.lease("lost-worker", lease_timeout=-1).attempt == 1
+        assert queue.lease("worker", lease_timeout=-1).attempt == 2
+        # The lease expired as many times as there are attempts so the task is failed for good.
+        assert queue.lease("worker", lease_timeout=60) is None
+        assert queue.unfinished() == 0
+        assert queue.results() == {"a": None}
+
+
+def test_SQLiteWorkQueue_retries_failed_tasks(queue_path):
+    with SQLiteWorkQueue(queue_path, max_attempts=2) as queue:
+        queue.enqueue("a", {})
+
+        queue.fail(queue.lease("worker", lease_timeout=60).task_id, "worker", "ConnectionError()")
+        queue.fail(queue.lease("worker", lease_timeout=60).task_id, "worker", "ConnectionError()")
+
+        assert queue.lease("worker", lease_timeout=60) is None
+        assert queue.results() == {"a": None}
+
+
+def test_SQLiteWorkQueue_is_shared_between_connections(queue_path):
+    with SQLiteWorkQueue(queue_path) as coordinator, SQLiteWorkQueue(queue_path) as worker, SQLiteWorkQueue(
+        queue_path, name="other"
+    ) as other:
+        coordinator.enqueue("a", {"number": 1})
+
+        assert other.lease("worker", lease_timeout=60) is None
+        assert worker.lease("worker", lease_timeout=60).payload == {"number": 1}
+        worker.complete("a", "worker", {"value": 1})
+        assert coordinator.results() == {"a": {"value": 1}}
+
+
+def test_SQLiteWorkQueue_rejects_invalid_max_attempts(queue_path):
+    with pytest.raises(ValueError):
+        SQLiteWorkQueue(queue_path, max_attempts=0)
+
+
+def test_workers_scrape_enqueued_programs(queue_path, mock_site, tmp_path):
+    checkpoint = Checkpoint(tmp_path / "journal.jsonl")
+    checkpoint.record_program(get_scraped_program(2))
+    mock_site.get("https://www.other-college.ca/en/programs/program-1", status_code=404)
+    report = ScrapeReport()
+
+    with SQLiteWorkQueue(queue_path) as queue:
+        listed = enqueue_programs(queue, site=SITE, checkpoint=checkpoint)
+
+        with SQLiteWorkQueue(queue_path) as worker_queue:
+            assert run_worker(worker_queue, max_workers=2, poll_interval=0.01) == 3
+
+        programs = collect_programs(queue, listed, poll_interval=0.01, checkpoint=checkpoint, report=report)
+
+    assert listed[2] == get_scraped_program(2)
+    assert programs == [get_scraped_program(0), get_scraped_program(2), get_scraped_program(3)]
+    assert report.listed == 4
+    assert checkpoint.failed == {"https://www.other-college.ca/en/programs/program-1"}
+    assert set(checkpoint.completed) == {program.url for program in programs}
+    assert sum(request.url.endswith("program-2") for request in mock_site.request_history) == 0
+
+
+def test_collect_programs_skips_unfinished_programs_at_deadline(queue_path, mock_site):
+    report = ScrapeReport()
+
+    with SQLiteWorkQueue(queue_path) as queue:
+        listed = enqueue_programs(queue, site=SITE)
+        lease = queue.lease("worker", lease_timeout=60)
+        queue.complete(lease.task_id, "worker", {"program": asdict(get_scraped_program(0)), "failed": False})
+
+        programs = collect_programs(queue, listed, deadline=0.05, poll_interval=0.01, report=report)
+
+    assert programs == [get_scraped_program(0)]
+    assert report.skipped_urls == [f"https://www.other-college.ca/en/programs/program-{number}" for number in range(1, 4)]
+    assert report.completeness == 0.25
+
+
+def test_restarted_coordinator_keeps_results_journaled_before_crash(queue_path, mock_site, tmp_path):
+    journal_path = tmp_path / "journal.jsonl"
+
+    def crash(program):
+        raise RuntimeError("The coordinator died")
+
+    with SQLiteWorkQueue(queue_path) as queue:
+        listed = enqueue_programs(queue, site=SITE, checkpoint=Checkpoint(journal_path))
+        lease = queue.lease("worker", lease_timeout=60)
+        queue.complete(lease.task_id, "worker", {"program": asdict(get_scraped_program(0)), "failed": False})
+
+        with pytest.raises(RuntimeError):
+            collect_programs(queue, listed, poll_interval=0.01, checkpoint=Checkpoint(journal_path), on_program=crash)
+
+    with SQLiteWorkQueue(queue_path) as queue:
+        listed = enqueue_programs(queue, site=SITE, checkpoint=Checkpoint(journal_path))
+
+        assert listed[0] == get_scraped_program(0)
+        assert queue.unfinished() == 3
+
+
+def test_scrape_distributed(queue_path, mock_site):
+    with SQLiteWorkQueue(queue_path) as worker_queue:
+        worker = threading.Thread(target=run_worker, args=(worker_queue,), kwargs={"idle_timeout": 0.5, "poll_interval": 0.01})
+        worker.start()
+        with SQLiteWorkQueue(queue_path) as queue:
+            metrics = scrape_distributed(queue, site=SITE, poll_interval=0.01)
+        worker.join(timeout=10)
+
+    assert metrics.programs == [get_scraped_program(number) for number in range(4)]
+    assert metrics.number_of_programs == 4
+    assert metrics.total_year_counts == {"2022": 4}
+    assert metrics.completeness == 1.0
@@ -5,7 +5,7 @@
 
 import pytest
 
-from dawson_college_pyscrapper.exceptions import PageDetailsError
+from dawson_college_pyscrapper.exceptions import PageDetailsError, RecordingNotFoundError, SnapshotFormatError
 
 
 def test_PageDetailsError_exception():
@@ -13,3 +13,19 @@ def test_PageDetailsError_exception():
         raise PageDetailsError()
 
     assert str(exc_info.value) == "Could not get page details."
+
+
+def test_RecordingNotFoundError_exception():
+    with pytest.raises(PageDetailsError) as exc_info:
+        raise RecordingNotFoundError("GET", "https://www.dawsoncollege.qc.ca/programs")
+
+    assert exc_info.value.url == "https://www.dawsoncollege.qc.ca/programs"
+    assert str(exc_info.value) == "No recorded response for GET https://www.dawsoncollege.qc.ca/programs."
+
+
+def test_SnapshotFormatError_exception():
+    with pytest.raises(SnapshotFormatError) as exc_info:
+        raise SnapshotFormatError("metrics.snapshot", "the file is too small")
+
+    assert exc_info.value.path == "metrics.snapshot"
+    assert str(exc_info.value) == "Could not read the snapshot metrics.snapshot: the file is too small."
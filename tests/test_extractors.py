@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `extractors` package in dawson_college_pyscrapper."""
+
+import pytest
+from bs4 import BeautifulSoup
+
+from dawson_college_pyscrapper.extractors import Extractor, Field, Selector, compile_selector
+
+PAGE = (
+    "<html><head><meta name='description' content=' A program. '></head><body>"
+    "<h1>First <em>title</em></h1><h1>Second title</h1>"
+    "<p class='page-mod-date note'>Last Modified: May 5, 2022</p>"
+    "<a href='mailto:info@example.com'>Contact</a><a href='/a'>A</a><a>No link</a><a href='/b'>B</a>"
+    "</body></html>"
+)
+
+
+@pytest.mark.parametrize(
+    "selector, expected",
+    [
+        ("h1", Selector(tag="h1")),
+        (".page-mod-date", Selector(classes=frozenset({"page-mod-date"}))),
+        ("p.page-mod-date.note", Selector(tag="p", classes=frozenset({"page-mod-date", "note"}))),
+        ("meta[name=description]", Selector(tag="meta", attributes=(("name", "=", "description"),))),
+        ('a[href^="mailto:"]', Selector(tag="a", attributes=(("href", "^=", "mailto:"),))),
+        ("a[href]", Selector(tag="a", attributes=(("href", None, None),))),
+    ],
+)
+def test_compile_selector(selector, expected):
+    assert compile_selector(selector) == expected
+
+
+@pytest.mark.parametrize("selector", ["", "div > p", "a[href", "#main"])
+def test_compile_selector_unsupported(selector):
+    with pytest.raises(ValueError):
+        compile_selector(selector)
+
+
+def test_compile_selector_is_cached():
+    assert compile_selector("h2.cached") is compile_selector("h2.cached")
+
+
+def test_Extractor_extracts_every_field():
+    extractor = Extractor(
+        [
+            Field("date", ".page-mod-date", transform=lambda text: text.replace("Last Modified: ", "")),
+            Field("title", "h1"),
+            Field("description", "meta[name=description]", attribute="content"),
+            Field("contact", "a[href^=mailto:]", attribute="href"),
+            Field("links", "a[href]", attribute="href", many=True),
+            Field("missing", ".missing"),
+        ]
+    )
+
+    assert extractor.extract(BeautifulSoup(PAGE, "html.parser")) == {
+        "date": "May 5, 2022",
+        "title": "First title",
+        "description": "A program.",
+        "contact": "mailto:info@example.com",
+        "links": ["mailto:info@example.com", "/a", "/b"],
+        "missing": None,
+    }
+
+
+def test_Extractor_stops_once_every_field_is_found(mocker):
+    soup = BeautifulSoup(PAGE, "html.parser")
+    matches = mocker.spy(Selector, "matches")
+
+    assert Extractor([Field("title", "h1")]).extract(soup) == {"title": "First title"}
+    assert matches.call_count == 1
+
+
+def test_Extractor_rejects_duplicate_field_names():
+    with pytest.raises(ValueError):
+        Extractor([Field("title", "h1"), Field("title", "h2")])
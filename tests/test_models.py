@@ -7,7 +7,7 @@ import pytest
 from datetime import datetime
 from typing import List
 
-from dawson_college_pyscrapper.models import Program, GeneralMetrics, ProgramPageData
+from dawson_college_pyscrapper.models import Program, GeneralMetrics, ProgramPageData, ScrapeReport, Site
 
 
 def test_Program_model():
@@ -74,6 +74,24 @@ def test_GeneralMetrics_model():
     assert sorted_programs[1].name == "Program 2"
 
 
+def test_GeneralMetrics_number_of_students_per_faculty_without_faculty():
+    metrics = GeneralMetrics(
+        date=datetime.now(),
+        total_programs_offered=0,
+        number_of_programs=0,
+        number_of_profiles=0,
+        number_of_disciplines=0,
+        number_of_special_studies=0,
+        number_of_general_studies=0,
+        number_of_students=0,
+        number_of_faculty=0,
+        total_year_counts={},
+        programs=[],
+    )
+
+    assert metrics.number_of_students_per_faculty == 0.0
+
+
 def test_post_init_converts_programs_to_Program_objects_in_post_init():
     programs_data = [
         {
@@ -110,3 +128,56 @@ def test_ProgramPageData_model():
     data = ProgramPageData(date="January 01, 2021")
 
     assert data.date == "January 01, 2021"
+
+
+def test_GeneralMetrics_to_dict():
+    program = Program(
+        name="Program 1",
+        modified_date="January 01, 2021",
+        program_type="Program",
+        url="https://www.dawsoncollege.qc.ca/programs/program-1",
+    )
+    metrics = GeneralMetrics(
+        date=datetime(2023, 1, 20),
+        total_programs_offered=1,
+        number_of_programs=1,
+        number_of_profiles=0,
+        number_of_disciplines=0,
+        number_of_special_studies=0,
+        number_of_general_studies=0,
+        number_of_students=1000,
+        number_of_faculty=50,
+        total_year_counts={"2021": 1},
+        programs=[program],
+    )
+
+    data = metrics.to_dict()
+
+    assert data["date"] == "2023-01-20T00:00:00"
+    assert data["total_year_counts"] == {"2021": 1}
+    assert data["programs"] == [
+        {
+            "name": "Program 1",
+            "modified_date": "January 01, 2021",
+            "program_type": "Program",
+            "url": "https://www.dawsoncollege.qc.ca/programs/program-1",
+            "description": "",
+            "program_code": "",
+            "campus": "",
+            "contact": "",
+        }
+    ]
+
+
+def test_Site_model():
+    site = Site(name="dawson-college", listing_url="https://www.dawsoncollege.qc.ca/programs", base_url="https://www.dawsoncollege.qc.ca")
+
+    assert site.name == "dawson-college"
+    assert site.listing_url == "https://www.dawsoncollege.qc.ca/programs"
+    assert site.base_url == "https://www.dawsoncollege.qc.ca"
+    assert site.include_headcounts is False
+
+
+def test_ScrapeReport_completeness():
+    assert ScrapeReport().completeness == 1.0
+    assert ScrapeReport(listed=4, skipped_urls=["https://www.dawsoncollege.qc.ca/programs/program-1"]).completeness == 0.75
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `profiling` package in dawson_college_pyscrapper."""
+
+from dawson_college_pyscrapper.profiling import StageTimer, record_stages, stage
+
+
+def test_stage_is_recorded_within_record_stages():
+    with record_stages() as timer:
+        with stage("listing_page"):
+            pass
+        with stage("program_pages"):
+            pass
+        with stage("program_pages"):
+            pass
+
+    assert set(timer.durations) == {"listing_page", "program_pages"}
+    assert timer.counts == {"listing_page": 1, "program_pages": 2}
+
+
+def test_stage_is_a_no_op_outside_record_stages():
+    with record_stages() as timer:
+        pass
+
+    with stage("listing_page"):
+        pass
+
+    assert timer.durations == {}
+
+
+def test_StageTimer_report():
+    timer = StageTimer()
+    timer.add("program_pages", 3.0)
+    timer.add("listing_page", 1.0)
+
+    lines = timer.report().splitlines()
+
+    assert lines[0].startswith("program_pages")
+    assert "75.0%" in lines[0]
+    assert lines[1].startswith("listing_page")
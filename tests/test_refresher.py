@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `refresher` package in dawson_college_pyscrapper."""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dawson_college_pyscrapper.models import Program
+from dawson_college_pyscrapper.refresher import MetricsRefresher
+from dawson_college_pyscrapper.snapshot import SnapshotReader
+from tests.utils import get_metrics
+
+
+def test_MetricsRefresher_has_no_snapshot_before_refresh(mocker):
+    mocked_scrape = mocker.patch("dawson_college_pyscrapper.refresher.scrape", return_value=get_metrics())
+    refresher = MetricsRefresher(interval=60)
+
+    assert refresher.get() is None
+    assert refresher.age is None
+    mocked_scrape.assert_not_called()
+
+
+def test_MetricsRefresher_refresh_passes_known_programs_and_options(mocker):
+    mocked_scrape = mocker.patch("dawson_college_pyscrapper.refresher.scrape", side_effect=[get_metrics(1000), get_metrics(2000)])
+    refresher = MetricsRefresher(interval=60, max_workers=4, deadline=30)
+
+    first = refresher.refresh()
+    second = refresher.refresh()
+
+    assert first.number_of_students == 1000
+    assert refresher.get() is second
+    assert mocked_scrape.call_args_list[0].kwargs == {"known_programs": None, "max_workers": 4, "deadline": 30}
+    assert mocked_scrape.call_args_list[1].kwargs["known_programs"] == first.programs
+
+
+def test_MetricsRefresher_collapses_concurrent_refreshes(mocker):
+    release = threading.Event()
+    calls = []
+
+    def slow_scrape(**kwargs):
+        calls.append(1)
+        release.wait(timeout=5)
+        return get_metrics()
+
+    mocker.patch("dawson_college_pyscrapper.refresher.scrape", side_effect=slow_scrape)
+    refresher = MetricsRefresher(interval=60)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(refresher.refresh) for _ in range(5)]
+        time.sleep(0.2)
+        assert refresher.trigger() is False
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_MetricsRefresher_keeps_stale_snapshot_when_refresh_fails(mocker):
+    mocker.patch("dawson_college_pyscrapper.refresher.scrape", side_effect=[get_metrics(), RuntimeError("network down")])
+    refresher = MetricsRefresher(interval=60)
+    snapshot = refresher.refresh()
+
+    with pytest.raises(RuntimeError):
+        refresher.refresh()
+
+    assert refresher.get() is snapshot
+    assert isinstance(refresher.last_error, RuntimeError)
+
+
+def test_MetricsRefresher_refreshes_in_background(mocker):
+    mocked_scrape = mocker.patch("dawson_college_pyscrapper.refresher.scrape", return_value=get_metrics())
+
+    with MetricsRefresher(interval=0.05) as refresher:
+        assert refresher.wait_for_snapshot(timeout=5) is not None
+        time.sleep(0.2)
+
+    assert mocked_scrape.call_count >= 2
+    calls_after_stop = mocked_scrape.call_count
+    time.sleep(0.1)
+    assert mocked_scrape.call_count == calls_after_stop
+
+
+def test_MetricsRefresher_trigger_refreshes_without_waiting(mocker):
+    mocker.patch("dawson_college_pyscrapper.refresher.scrape", return_value=get_metrics())
+    refresher = MetricsRefresher(interval=60)
+
+    assert refresher.trigger() is True
+    assert refresher.wait_for_snapshot(timeout=5) is not None
+
+
+def test_MetricsRefresher_serves_snapshot_over_http(mocker):
+    mocker.patch("dawson_college_pyscrapper.refresher.scrape", return_value=get_metrics())
+    refresher = MetricsRefresher(interval=60)
+    server = refresher.serve()
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+
+    try:
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            urllib.request.urlopen(url, timeout=5)
+        assert exc_info.value.code == 503
+
+        refresher.refresh()
+        with urllib.request.urlopen(url, timeout=5) as response:
+            data = json.loads(response.read())
+            assert response.headers["Content-Type"] == "application/json; charset=utf-8"
+            assert response.headers["Age"] == "0"
+
+        assert data["number_of_students"] == 1000
+        assert data["programs"][0]["name"] == "Program 1"
+    finally:
+        refresher.stop()
+
+
+def test_MetricsRefresher_publishes_snapshot_file(mocker, tmp_path):
+    mocker.patch("dawson_college_pyscrapper.refresher.scrape", side_effect=[get_metrics(1000), get_metrics(2000)])
+    path = tmp_path / "metrics.snapshot"
+    refresher = MetricsRefresher(interval=60, snapshot_path=path)
+
+    refresher.refresh()
+    with SnapshotReader(path) as reader:
+        assert reader.metrics() == refresher.get()
+
+        refresher.refresh()
+
+        assert reader.reload()
+        assert reader.metrics().number_of_students == 2000
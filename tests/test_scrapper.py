@@ -1,11 +1,18 @@
+import gc
+import re
+import threading
+import time
+import tracemalloc
 from datetime import datetime
 import pytest
 import requests
 import requests_mock
 from freezegun import freeze_time
+from dawson_college_pyscrapper.aggregator import MetricsAggregator
+from dawson_college_pyscrapper.checkpoint import Checkpoint
 from dawson_college_pyscrapper.constants import PROGRAMS_LISTING_URL
 from dawson_college_pyscrapper.exceptions import PageDetailsError
-from dawson_college_pyscrapper.models import GeneralMetrics, Program, ProgramPageData
+from dawson_college_pyscrapper.models import GeneralMetrics, Program, ProgramPageData, ScrapeReport, Site
 
 from dawson_college_pyscrapper.scrapper import (
     get_program_details,
@@ -13,8 +20,16 @@ from dawson_college_pyscrapper.scrapper import (
     get_total_number_of_faculty,
     get_total_number_of_students,
     scrape,
+    scrape_sites,
+)
+from dawson_college_pyscrapper.transport import RecordedResponse, Transport, use_transport
+from tests.utils import (
+    get_invalid_program_listing,
+    get_invalid_program_listing_empty,
+    get_listing_html,
+    get_program,
+    get_valid_program_listing,
 )
-from tests.utils import get_invalid_program_listing, get_invalid_program_listing_empty, get_valid_program_listing
 
 
 @pytest.mark.parametrize(
@@ -310,32 +325,488 @@ def test_scrap_value_correctly(mocker, *mocks):
         Program(
             name="Program Name",
             modified_date="January 20, 2023",
-            program_type="Certificate",
+            program_type="Program",
             url="https://www.dawsoncollege.qc.ca/programs/program-name",
         ),
         Program(
             name="Program Name 2",
             modified_date="January 20, 2023",
-            program_type="Certificate",
+            program_type="Profile",
             url="https://www.dawsoncollege.qc.ca/programs/program-name-2",
         ),
     ]
     mocker.patch("dawson_college_pyscrapper.scrapper.get_total_number_of_students", return_value=1000)
     mocker.patch("dawson_college_pyscrapper.scrapper.get_total_number_of_faculty", return_value=100)
-    mocker.patch("dawson_college_pyscrapper.scrapper.get_programs", return_value=mocked_program)
-    mocker.patch("dawson_college_pyscrapper.scrapper.get_number_of_type", return_value=10)
+
+    def get_programs(on_program, **kwargs):
+        for program in mocked_program:
+            on_program(program)
+        on_program(None)
+        return mocked_program
+
+    mocker.patch("dawson_college_pyscrapper.scrapper.get_programs", side_effect=get_programs)
 
     result = scrape()
 
     assert isinstance(result, GeneralMetrics)
     assert result.date == datetime.now()  # Should be frozen to 2023-01-20
     assert result.total_programs_offered == 2
-    assert result.number_of_programs == 10
-    assert result.number_of_profiles == 10
-    assert result.number_of_disciplines == 10
-    assert result.number_of_special_studies == 10
-    assert result.number_of_general_studies == 10
+    assert result.number_of_programs == 1
+    assert result.number_of_profiles == 1
+    assert result.number_of_disciplines == 0
+    assert result.number_of_special_studies == 0
+    assert result.number_of_general_studies == 0
     assert result.total_year_counts == {"2023": 2}
     assert result.programs == mocked_program
     assert result.number_of_students == 1000
     assert result.number_of_faculty == 100
+
+
+def test_get_programs_canonicalizes_and_only_fetches_duplicate_urls_once(mocker, requests_mock):
+    mocked_get_program_details = mocker.patch("dawson_college_pyscrapper.scrapper.get_program_details", return_value=None)
+
+    example_html = """
+    <html>
+        <body>
+            <div class="entry-content">
+                <table>
+                    <tbody>
+                        <tr>
+                            <td class="program-name">
+                                <a href="/programs/program-1">Program 1</a>
+                            </td>
+                        </tr>
+                        <tr>
+                            <td class="program-name">
+                                <a href="https://www.dawsoncollege.qc.ca/programs/program-1/">Program 1</a>
+                            </td>
+                        </tr>
+                        <tr>
+                            <td class="program-name">
+                                <a href="/programs/program-2">Program 2</a>
+                            </td>
+                        </tr>
+                    </tbody>
+                </table>
+            </div>
+        </body>
+    </html>
+    """
+    requests_mock.get(PROGRAMS_LISTING_URL, text=example_html)
+
+    get_programs()
+
+    called_urls = [call.kwargs["program_url"] for call in mocked_get_program_details.call_args_list]
+    assert called_urls == [
+        "https://www.dawsoncollege.qc.ca/programs/program-1",
+        "https://www.dawsoncollege.qc.ca/programs/program-2",
+    ]
+
+
+def test_get_programs_resumes_from_checkpoint(mocker, requests_mock, tmp_path):
+    example_html = """
+    <html>
+        <body>
+            <div class="entry-content">
+                <table>
+                    <tbody>
+                        <tr>
+                            <td class="program-name">
+                                <a href="/programs/program-1">Program 1</a>
+                            </td>
+                        </tr>
+                        <tr>
+                            <td class="program-name">
+                                <a href="/programs/program-2">Program 2</a>
+                            </td>
+                        </tr>
+                        <tr>
+                            <td class="program-name">
+                                <a href="/programs/program-3">Program 3</a>
+                            </td>
+                        </tr>
+                    </tbody>
+                </table>
+            </div>
+        </body>
+    </html>
+    """
+    requests_mock.get(PROGRAMS_LISTING_URL, text=example_html)
+
+    journal_path = tmp_path / "journal.jsonl"
+
+    # The first run fails on the second program.
+    def first_run_details(program_url, listed_program, **kwargs):
+        if program_url.endswith("program-2"):
+            raise PageDetailsError()
+        return get_program(program_url.rsplit("/", 1)[-1])
+
+    mocker.patch("dawson_college_pyscrapper.scrapper.get_program_details", side_effect=first_run_details)
+    first_result = get_programs(checkpoint=Checkpoint(journal_path))
+    assert [program.name for program in first_result] == ["program-1", "program-3"]
+
+    # The resumed run only fetches the program which is missing from the journal.
+    mocked_get_program_details = mocker.patch(
+        "dawson_college_pyscrapper.scrapper.get_program_details",
+        side_effect=lambda program_url, listed_program, **kwargs: get_program(program_url.rsplit("/", 1)[-1]),
+    )
+    checkpoint = Checkpoint(journal_path)
+    assert checkpoint.failed == {"https://www.dawsoncollege.qc.ca/programs/program-2"}
+
+    resumed_result = get_programs(checkpoint=checkpoint)
+
+    assert [program.name for program in resumed_result] == ["program-1", "program-2", "program-3"]
+    assert [call.kwargs["program_url"] for call in mocked_get_program_details.call_args_list] == [
+        "https://www.dawsoncollege.qc.ca/programs/program-2"
+    ]
+    assert checkpoint.failed == set()
+
+
+def test_get_programs_concurrently_keeps_listing_order(mocker, requests_mock):
+    example_html = "".join(
+        f'<tr><td class="program-name"><a href="/programs/program-{index}">Program {index}</a></td></tr>' for index in range(20)
+    )
+    requests_mock.get(
+        PROGRAMS_LISTING_URL, text=f'<html><body><div class="entry-content"><table>{example_html}</table></div></body></html>'
+    )
+    mocker.patch(
+        "dawson_college_pyscrapper.scrapper.get_program_details",
+        side_effect=lambda program_url, listed_program, **kwargs: Program(
+            name=program_url.rsplit("/", 1)[-1], modified_date="January 1, 2023", program_type="Program", url=program_url
+        ),
+    )
+
+    result = get_programs(max_workers=8)
+
+    assert [program.name for program in result] == [f"program-{index}" for index in range(20)]
+
+
+def test_get_programs_from_configured_site(requests_mock):
+    site = Site(name="other-college", listing_url="https://www.other-college.ca/en/programs", base_url="https://www.other-college.ca")
+    requests_mock.get(site.listing_url, text=get_listing_html("/en/programs/program-1"))
+    requests_mock.get("https://www.other-college.ca/en/programs/program-1", text='<p class="page-mod-date">Last Modified: May 5, 2022</p>')
+
+    result = get_programs(site=site)
+
+    assert result == [
+        Program(
+            name="/en/programs/program-1",
+            modified_date="May 5, 2022",
+            program_type="Program",
+            url="https://www.other-college.ca/en/programs/program-1",
+        )
+    ]
+
+
+def test_scrape_sites_returns_metrics_per_site(requests_mock):
+    sites = [
+        Site(name="college-a", listing_url="https://www.college-a.ca/programs", base_url="https://www.college-a.ca"),
+        Site(name="college-b", listing_url="https://www.college-b.ca/programs", base_url="https://www.college-b.ca"),
+        Site(name="broken-college", listing_url="https://www.broken-college.ca/programs", base_url="https://www.broken-college.ca"),
+    ]
+    requests_mock.get(sites[0].listing_url, text=get_listing_html("/programs/a-1", "/programs/a-2"))
+    requests_mock.get(sites[1].listing_url, text=get_listing_html("/programs/b-1"))
+    requests_mock.get(sites[2].listing_url, status_code=500)
+    for url in ("https://www.college-a.ca/programs/a-1", "https://www.college-a.ca/programs/a-2", "https://www.college-b.ca/programs/b-1"):
+        requests_mock.get(url, text='<p class="page-mod-date">Last Modified: May 5, 2022</p>')
+
+    result = scrape_sites(sites, max_workers=4, max_connections_per_host=1)
+
+    assert set(result) == {"college-a", "college-b"}
+    assert result["college-a"].total_programs_offered == 2
+    assert result["college-a"].number_of_programs == 2
+    assert result["college-b"].total_programs_offered == 1
+    assert result["college-b"].number_of_students == 0
+    assert result["college-b"].number_of_faculty == 0
+
+
+def test_scrape_sites_caps_connections_per_host(mocker, requests_mock):
+    sites = [
+        Site(name="english", listing_url="https://www.college.ca/en/programs", base_url="https://www.college.ca"),
+        Site(name="french", listing_url="https://www.college.ca/fr/programmes", base_url="https://www.college.ca"),
+    ]
+    requests_mock.get(sites[0].listing_url, text=get_listing_html(*[f"/en/programs/{index}" for index in range(5)]))
+    requests_mock.get(sites[1].listing_url, text=get_listing_html(*[f"/fr/programmes/{index}" for index in range(5)]))
+
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def slow_page(request, context):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.02)
+        with lock:
+            in_flight.pop()
+        return '<p class="page-mod-date">Last Modified: May 5, 2022</p>'
+
+    requests_mock.get(re.compile(r"https://www\.college\.ca/(en/programs|fr/programmes)/\d"), text=slow_page)
+
+    result = scrape_sites(sites, max_workers=8, max_connections_per_host=2)
+
+    assert result["english"].total_programs_offered == 5
+    assert result["french"].total_programs_offered == 5
+    assert max(peak) <= 2
+
+
+def test_scrape_sites_rejects_duplicate_names():
+    site = Site(name="college", listing_url="https://www.college.ca/programs", base_url="https://www.college.ca")
+
+    with pytest.raises(ValueError):
+        scrape_sites([site, site])
+
+
+def test_get_programs_memory_stays_flat_for_large_listing():
+    number_of_programs = 200
+    # Every program page shares a template much larger than the few fields extracted from it.
+    template = "".join(
+        f'<div class="widget"><p>Paragraph {index} of the template.</p><a href="/link-{index}">Link</a></div>' for index in range(40)
+    )
+    program_page = f'<html><body>{template}<p class="page-mod-date">Last Modified: January 20, 2023</p></body></html>'.encode()
+    listing_page = get_listing_html(*[f"/programs/program-{index}" for index in range(number_of_programs)]).encode()
+
+    class SyntheticTransport(Transport):
+        def request(self, method, url, headers=None, data=None, timeout=None):
+            return RecordedResponse(url=url, status_code=200, content=listing_page if url == PROGRAMS_LISTING_URL else program_page)
+
+    # With the cyclic garbage collector off any parse tree which is not explicitly released stays in memory.
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        with use_transport(SyntheticTransport()):
+            programs = get_programs()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+
+    assert len(programs) == number_of_programs
+    # Keeping every program page tree alive would need well over 20MB here.
+    assert peak < 5 * 1024 * 1024
+    assert retained < 1024 * 1024
+
+
+class OrderRecordingTransport(Transport):
+    """Serves the listing and program pages, taking the given time for every program page and recording the order they are fetched in."""
+
+    def __init__(self, listing_page: str, page_delay: float = 0.0):
+        self.listing_page = listing_page.encode()
+        self.page_delay = page_delay
+        self.fetched_urls = []
+
+    def request(self, method, url, headers=None, data=None, timeout=None):
+        if url == PROGRAMS_LISTING_URL:
+            return RecordedResponse(url=url, status_code=200, content=self.listing_page)
+
+        self.fetched_urls.append(url)
+        time.sleep(self.page_delay)
+        return RecordedResponse(url=url, status_code=200, content=b'<p class="page-mod-date">Last Modified: May 5, 2023</p>')
+
+
+def test_get_programs_fetches_new_programs_first_then_stalest_known():
+    transport = OrderRecordingTransport(get_listing_html(*[f"/programs/program-{index}" for index in range(4)]))
+    known_programs = [
+        Program(name="0", modified_date="March 1, 2023", program_type="Program", url="https://www.dawsoncollege.qc.ca/programs/program-0"),
+        Program(
+            name="1", modified_date="January 1, 2021", program_type="Program", url="https://www.dawsoncollege.qc.ca/programs/program-1"
+        ),
+        Program(name="3", modified_date="June 1, 2022", program_type="Program", url="https://www.dawsoncollege.qc.ca/programs/program-3"),
+    ]
+
+    with use_transport(transport):
+        result = get_programs(known_programs=known_programs)
+
+    assert transport.fetched_urls == [
+        "https://www.dawsoncollege.qc.ca/programs/program-2",
+        "https://www.dawsoncollege.qc.ca/programs/program-1",
+        "https://www.dawsoncollege.qc.ca/programs/program-3",
+        "https://www.dawsoncollege.qc.ca/programs/program-0",
+    ]
+    # The results are still in listing order.
+    assert [program.url.rsplit("-", 1)[-1] for program in result] == ["0", "1", "2", "3"]
+
+
+def test_get_programs_returns_partial_results_when_deadline_is_reached():
+    transport = OrderRecordingTransport(get_listing_html(*[f"/programs/program-{index}" for index in range(10)]), page_delay=0.05)
+    report = ScrapeReport()
+
+    start = time.monotonic()
+    with use_transport(transport):
+        result = get_programs(deadline=0.12, report=report)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.3
+    assert 1 <= len(result) < 10
+    assert report.listed == 10
+    assert len(report.skipped_urls) == 10 - len(result)
+    assert set(report.skipped_urls).isdisjoint(program.url for program in result)
+
+
+class HangingTransport(OrderRecordingTransport):
+    def __init__(self, listing_html):
+        super().__init__(listing_html)
+        self.page_timeouts = []
+        self.page_ends = []
+
+    def request(self, method, url, headers=None, data=None, timeout=None):
+        if url == PROGRAMS_LISTING_URL:
+            return super().request(method, url, headers=headers, data=data, timeout=timeout)
+
+        # A server which never answers: the request only ends once its timeout is reached.
+        self.page_timeouts.append(timeout)
+        time.sleep(timeout if timeout is not None else 2)
+        self.page_ends.append(time.monotonic())
+        raise requests.Timeout(url)
+
+
+def test_get_programs_bounds_program_page_requests_by_the_deadline():
+    # Pages no other test fetches, so no fetch left in flight by another test is shared.
+    transport = HangingTransport(get_listing_html("/programs/hanging-1", "/programs/hanging-2"))
+    report = ScrapeReport()
+
+    start = time.monotonic()
+    with use_transport(transport):
+        result = get_programs(deadline=0.2, max_workers=2, report=report)
+        while len(transport.page_ends) < len(transport.page_timeouts) and time.monotonic() - start < 3:
+            time.sleep(0.01)
+
+    assert result == []
+    assert len(report.skipped_urls) == 2
+    assert all(timeout is not None and timeout <= 0.2 for timeout in transport.page_timeouts)
+    # The requests still running when the deadline was reached end with it instead of keeping the process alive.
+    assert max(transport.page_ends) - start < 0.6
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_get_programs_records_failed_program_page_requests(max_workers, requests_mock, tmp_path):
+    # Pages no other test fetches, so no fetch left in flight by another test is shared.
+    paths = [f"/programs/timing-out-{max_workers}", f"/programs/answering-{max_workers}"]
+    requests_mock.get(PROGRAMS_LISTING_URL, text=get_listing_html(*paths))
+    requests_mock.get(f"https://www.dawsoncollege.qc.ca{paths[0]}", exc=requests.exceptions.ReadTimeout)
+    requests_mock.get(f"https://www.dawsoncollege.qc.ca{paths[1]}", text='<p class="page-mod-date">Last Modified: May 5, 2022</p>')
+    checkpoint = Checkpoint(tmp_path / "journal.jsonl")
+    report = ScrapeReport()
+
+    result = get_programs(timeout=30, max_workers=max_workers, checkpoint=checkpoint, report=report)
+
+    assert [program.url for program in result] == [f"https://www.dawsoncollege.qc.ca{paths[1]}"]
+    assert checkpoint.failed == {f"https://www.dawsoncollege.qc.ca{paths[0]}"}
+    assert report.skipped_urls == []
+
+
+def test_get_programs_fetches_pages_in_calling_thread_with_a_single_worker():
+    fetching_threads = []
+
+    class ThreadRecordingTransport(OrderRecordingTransport):
+        def request(self, method, url, headers=None, data=None, timeout=None):
+            fetching_threads.append(threading.current_thread())
+            return super().request(method, url, headers=headers, data=data, timeout=timeout)
+
+    transport = ThreadRecordingTransport(get_listing_html("/programs/calling-thread-1", "/programs/calling-thread-2"))
+
+    with use_transport(transport):
+        result = get_programs(max_workers=1)
+
+    assert len(result) == 2
+    assert fetching_threads == [threading.current_thread()] * 3
+
+
+def test_get_programs_without_deadline_skips_nothing():
+    transport = OrderRecordingTransport(get_listing_html("/programs/program-1", "/programs/program-2"))
+    report = ScrapeReport()
+
+    with use_transport(transport):
+        result = get_programs(report=report)
+
+    assert len(result) == 2
+    assert report.listed == 2
+    assert report.skipped_urls == []
+    assert report.completeness == 1.0
+
+
+def test_scrape_with_deadline_reports_completeness(mocker):
+    transport = OrderRecordingTransport(get_listing_html(*[f"/programs/program-{index}" for index in range(10)]), page_delay=0.05)
+    mocker.patch("dawson_college_pyscrapper.scrapper.get_total_number_of_students", return_value=1000)
+    mocker.patch("dawson_college_pyscrapper.scrapper.get_total_number_of_faculty", return_value=100)
+
+    with use_transport(transport):
+        result = scrape(deadline=0.12, max_workers=2)
+
+    assert 0 < result.completeness < 1
+    assert result.total_programs_offered == round(result.completeness * 10)
+    assert len(result.skipped_urls) == 10 - result.total_programs_offered
+
+
+def test_scrape_leaves_headcounts_cut_short_by_deadline_at_zero(mocker):
+    transport = OrderRecordingTransport(get_listing_html(*[f"/programs/program-{index}" for index in range(2)]))
+
+    def time_out(timeout=None):
+        time.sleep(timeout)
+        raise requests.exceptions.ReadTimeout()
+
+    mocker.patch("dawson_college_pyscrapper.scrapper.get_total_number_of_students", side_effect=time_out)
+    get_total_number_of_faculty = mocker.patch("dawson_college_pyscrapper.scrapper.get_total_number_of_faculty", return_value=100)
+
+    with use_transport(transport):
+        result = scrape(deadline=0.1, max_workers=2)
+
+    assert result.number_of_students == 0
+    assert result.number_of_faculty == 0
+    get_total_number_of_faculty.assert_not_called()
+    assert result.total_programs_offered + len(result.skipped_urls) == 2
+
+
+def test_scrape_raises_headcount_timeouts_before_the_deadline(mocker):
+    mocker.patch("dawson_college_pyscrapper.scrapper.get_total_number_of_students", side_effect=requests.exceptions.ReadTimeout())
+
+    with pytest.raises(requests.Timeout):
+        scrape(deadline=60)
+
+
+def test_get_programs_calls_on_program_once_per_finished_program(tmp_path):
+    transport = OrderRecordingTransport(get_listing_html(*[f"/programs/program-{index}" for index in range(4)]), page_delay=0.05)
+    checkpoint = Checkpoint(tmp_path / "journal.jsonl")
+    checkpointed = Program(
+        name="0", modified_date="March 1, 2023", program_type="Program", url="https://www.dawsoncollege.qc.ca/programs/program-0"
+    )
+    checkpoint.record_program(checkpointed)
+    report = ScrapeReport()
+    finished = []
+
+    def on_program(program):
+        # The listing is counted before any program is finished.
+        assert report.listed == 4
+        finished.append(program)
+
+    with use_transport(transport):
+        programs = get_programs(checkpoint=checkpoint, deadline=0.08, report=report, on_program=on_program)
+
+    assert finished[0] == checkpointed
+    assert finished == programs
+    assert len(finished) + len(report.skipped_urls) == 4
+
+
+def test_scrape_adds_programs_to_aggregator_as_they_are_scraped(mocker):
+    class ProgressAggregator(MetricsAggregator):
+        def __init__(self):
+            super().__init__()
+            self.progress = []
+
+        def add(self, program):
+            super().add(program)
+            self.progress.append((self.snapshot().total_programs_offered, self.snapshot().completeness))
+
+    transport = OrderRecordingTransport(get_listing_html(*[f"/programs/program-{index}" for index in range(4)]))
+    mocker.patch("dawson_college_pyscrapper.scrapper.get_total_number_of_students", return_value=1000)
+    mocker.patch("dawson_college_pyscrapper.scrapper.get_total_number_of_faculty", return_value=100)
+    aggregator = ProgressAggregator()
+
+    with use_transport(transport):
+        result = scrape(aggregator=aggregator)
+
+    assert aggregator.progress == [(1, 0.25), (2, 0.5), (3, 0.75), (4, 1.0)]
+    assert result.number_of_programs == 4
+    assert result.number_of_students == 1000
+    assert result.total_year_counts == {"2023": 4}
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `snapshot` package in dawson_college_pyscrapper."""
+
+import multiprocessing
+import os
+from datetime import datetime
+
+import pytest
+
+from dawson_college_pyscrapper.exceptions import SnapshotFormatError
+from dawson_college_pyscrapper.models import Program
+from dawson_college_pyscrapper.snapshot import SnapshotReader, write_snapshot
+from tests.utils import get_metrics
+
+# The fields of the metrics written to the snapshots which differ from the default ones of get_metrics.
+SNAPSHOT_FIELDS = dict(
+    date=datetime(2023, 1, 20, 8, 30),
+    total_programs_offered=2,
+    number_of_profiles=1,
+    total_year_counts={"2023": 1, "2021": 1},
+    programs=[
+        Program(
+            name="Génie électrique",
+            modified_date="January 20, 2023",
+            program_type="Program",
+            url="https://www.dawsoncollege.qc.ca/programs/genie",
+            campus="Main campus",
+        ),
+        Program(
+            name="Profile 1",
+            modified_date="March 2, 2021",
+            program_type="Profile",
+            url="https://www.dawsoncollege.qc.ca/programs/profile-1",
+        ),
+    ],
+    completeness=0.6667,
+    skipped_urls=["https://www.dawsoncollege.qc.ca/programs/program-3"],
+)
+
+
+def read_students(path, queue):
+    with SnapshotReader(path) as reader:
+        queue.put((reader.header.counts[6], bytes(reader.program_field(0, "name")).decode("utf-8")))
+
+
+def test_write_snapshot_round_trip(tmp_path):
+    path = tmp_path / "metrics.snapshot"
+    metrics = get_metrics(**SNAPSHOT_FIELDS)
+
+    write_snapshot(metrics, path)
+
+    with SnapshotReader(path) as reader:
+        assert len(reader) == 2
+        assert reader.program(1) == metrics.programs[1]
+        assert list(reader) == metrics.programs
+        assert reader.metrics() == metrics
+        assert reader.header.completeness == 0.6667
+
+
+def test_SnapshotReader_program_field_is_a_view_of_the_mapped_file(tmp_path):
+    path = tmp_path / "metrics.snapshot"
+    write_snapshot(get_metrics(**SNAPSHOT_FIELDS), path)
+
+    with SnapshotReader(path) as reader:
+        name = reader.program_field(0, "name")
+
+        assert isinstance(name, memoryview)
+        assert name.readonly
+        assert bytes(name).decode("utf-8") == "Génie électrique"
+        with pytest.raises(IndexError):
+            reader.program_field(2, "name")
+
+
+def test_SnapshotReader_reload_maps_the_replaced_file(tmp_path):
+    path = tmp_path / "metrics.snapshot"
+    write_snapshot(get_metrics(1000, **SNAPSHOT_FIELDS), path)
+
+    with SnapshotReader(path) as reader:
+        previous_url = reader.program_field(1, "url")
+        assert not reader.reload()
+
+        write_snapshot(get_metrics(2000, **SNAPSHOT_FIELDS), path)
+
+        assert reader.reload()
+        assert reader.metrics().number_of_students == 2000
+        # Views of the previous snapshot stay readable after the swap.
+        assert bytes(previous_url) == b"https://www.dawsoncollege.qc.ca/programs/profile-1"
+    assert [name for name in os.listdir(tmp_path)] == ["metrics.snapshot"]
+
+
+def test_SnapshotReader_is_shared_with_other_processes(tmp_path):
+    path = tmp_path / "metrics.snapshot"
+    write_snapshot(get_metrics(**SNAPSHOT_FIELDS), path)
+    queue = multiprocessing.get_context("spawn").Queue()
+
+    process = multiprocessing.get_context("spawn").Process(target=read_students, args=(str(path), queue))
+    process.start()
+    process.join(timeout=30)
+
+    assert queue.get(timeout=5) == (1000, "Génie électrique")
+
+
+@pytest.mark.parametrize("content", [b"", b"not a snapshot" * 20])
+def test_SnapshotReader_rejects_other_files(tmp_path, content):
+    path = tmp_path / "metrics.snapshot"
+    path.write_bytes(content)
+
+    with pytest.raises(SnapshotFormatError):
+        SnapshotReader(path)
+
+
+def test_SnapshotReader_closed(tmp_path):
+    path = tmp_path / "metrics.snapshot"
+    write_snapshot(get_metrics(**SNAPSHOT_FIELDS), path)
+    reader = SnapshotReader(path)
+
+    reader.close()
+
+    with pytest.raises(ValueError):
+        len(reader)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `transport` package in dawson_college_pyscrapper."""
+
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dawson_college_pyscrapper.concurrency import submit_in_context
+from dawson_college_pyscrapper.constants import MAIN_WEBSITE_URL, PROGRAMS_LISTING_URL
+from dawson_college_pyscrapper.exceptions import RecordingNotFoundError
+from dawson_college_pyscrapper.scrapper import scrape
+from dawson_college_pyscrapper.transport import (
+    RecordingTransport,
+    ReplayTransport,
+    RequestsTransport,
+    get_transport,
+    use_transport,
+)
+
+LISTING_HTML = """
+<html>
+    <body>
+        <div class="entry-content">
+            <table>
+                <tr>
+                    <td class="program-name"><a href="/programs/program-1">Program 1</a></td>
+                    <td class="program-type">Program</td>
+                </tr>
+                <tr>
+                    <td class="program-name"><a href="/programs/program-2">Program 2</a></td>
+                    <td class="program-type">Profile</td>
+                </tr>
+            </table>
+        </div>
+    </body>
+</html>
+"""
+
+STUDENTS_HTML = """
+<html>
+    <body>
+        <div class="BNeawe">Collège Dawson (French)</div>
+        <div class="BNeawe">Collège Dawson (French)</div>
+        <div class="BNeawe">Students</div>
+        <div class="BNeawe">Dawson College (English)</div>
+        <div class="BNeawe">11,000</div>
+    </body>
+</html>
+"""
+
+
+def mock_website(requests_mock):
+    requests_mock.get(PROGRAMS_LISTING_URL, text=LISTING_HTML)
+    requests_mock.get(f"{MAIN_WEBSITE_URL}/programs/program-1", text='<p class="page-mod-date">Last Modified: January 20, 2023</p>')
+    requests_mock.get(f"{MAIN_WEBSITE_URL}/programs/program-2", text='<p class="page-mod-date">Last Modified: March 2, 2022</p>')
+    requests_mock.get(re.compile(r"https://www\.google\.ca/search"), text=STUDENTS_HTML)
+    requests_mock.post(f"{MAIN_WEBSITE_URL}/phone-directory", text="<html><body><b>500</b></body></html>")
+
+
+def test_default_transport_is_requests():
+    assert isinstance(get_transport(), RequestsTransport)
+
+
+def test_use_transport_restores_previous_transport(tmp_path):
+    previous_transport = get_transport()
+    with RecordingTransport(tmp_path / "crawl.zip") as recorder:
+        with use_transport(RequestsTransport()) as transport:
+            assert get_transport() is transport
+        assert get_transport() is recorder
+
+    assert get_transport() is previous_transport
+
+
+def test_transports_used_as_context_managers_inside_use_transport(tmp_path):
+    with RecordingTransport(tmp_path / "crawl.zip"):
+        pass
+
+    with use_transport(RequestsTransport()) as outer_transport:
+        with RecordingTransport(tmp_path / "other-crawl.zip") as recorder:
+            assert get_transport() is recorder
+        with ReplayTransport(tmp_path / "crawl.zip") as replay:
+            assert get_transport() is replay
+        assert get_transport() is outer_transport
+
+    assert isinstance(get_transport(), RequestsTransport)
+    assert get_transport() is not outer_transport
+
+
+def test_overlapping_use_transport_in_threads_do_not_leak():
+    previous_transport = get_transport()
+    first_entered, second_entered, first_exited = threading.Event(), threading.Event(), threading.Event()
+    seen = {}
+
+    def use(name, entered, wait_for, exited=None, wait_before_exit=None):
+        with use_transport(RequestsTransport()) as transport:
+            entered.set()
+            wait_for.wait(5)
+            if wait_before_exit:
+                wait_before_exit.wait(5)
+            seen[name] = get_transport() is transport
+        if exited:
+            exited.set()
+
+    # The first use exits while the second one is still active, then the second one exits.
+    first = threading.Thread(target=use, args=("first", first_entered, second_entered, first_exited))
+    second = threading.Thread(target=use, args=("second", second_entered, first_entered, None, first_exited))
+    first.start()
+    second.start()
+    first.join(5)
+    second.join(5)
+
+    assert seen == {"first": True, "second": True}
+    assert get_transport() is previous_transport
+
+
+def test_use_transport_is_seen_by_tasks_submitted_in_context():
+    with ThreadPoolExecutor(max_workers=1) as executor, use_transport(RequestsTransport()) as transport:
+        assert submit_in_context(executor, get_transport).result() is transport
+        assert executor.submit(get_transport).result() is not transport
+
+
+def test_scrape_replays_recorded_crawl_without_network(requests_mock, tmp_path):
+    archive_path = tmp_path / "crawl.zip"
+    mock_website(requests_mock)
+
+    with RecordingTransport(archive_path):
+        recorded_metrics = scrape()
+
+    recorded_request_count = requests_mock.call_count
+    with ReplayTransport(archive_path) as replay:
+        replayed_metrics = scrape()
+        recorded_urls = replay.recorded_urls()
+
+    # Nothing went to the (mocked) network while replaying.
+    assert requests_mock.call_count == recorded_request_count
+    assert len(recorded_urls) == 5
+    assert replayed_metrics.programs == recorded_metrics.programs
+    assert replayed_metrics.total_year_counts == {"2023": 1, "2022": 1}
+    assert replayed_metrics.number_of_students == 11000
+    assert replayed_metrics.number_of_faculty == 500
+
+
+def test_ReplayTransport_raises_for_request_not_recorded(requests_mock, tmp_path):
+    archive_path = tmp_path / "crawl.zip"
+    requests_mock.get(PROGRAMS_LISTING_URL, text=LISTING_HTML)
+    with RecordingTransport(archive_path) as recorder:
+        recorder.get(PROGRAMS_LISTING_URL)
+
+    with ReplayTransport(archive_path) as replay, pytest.raises(RecordingNotFoundError):
+        replay.post(PROGRAMS_LISTING_URL, data={"search": "Search"})
+
+
+def test_ReplayTransport_serves_repeated_requests_in_recorded_order(requests_mock, tmp_path):
+    archive_path = tmp_path / "crawl.zip"
+    requests_mock.get(PROGRAMS_LISTING_URL, [{"text": "first"}, {"text": "second", "status_code": 500}])
+    with RecordingTransport(archive_path) as recorder:
+        recorder.get(PROGRAMS_LISTING_URL)
+        recorder.get(PROGRAMS_LISTING_URL)
+
+    with ReplayTransport(archive_path) as replay:
+        responses = [replay.get(PROGRAMS_LISTING_URL) for _ in range(3)]
+
+    assert [response.text for response in responses] == ["first", "second", "second"]
+    assert [response.ok for response in responses] == [True, False, False]
+
+
+def test_ReplayTransport_replays_latency(tmp_path, mocker):
+    archive_path = tmp_path / "crawl.zip"
+
+    class SlowTransport(RequestsTransport):
+        def request(self, method, url, headers=None, data=None, timeout=None):
+            time.sleep(0.05)
+            return mocker.Mock(status_code=200, content=b"slow", headers={}, encoding="utf-8")
+
+    with RecordingTransport(archive_path, transport=SlowTransport()) as recorder:
+        recorder.get(PROGRAMS_LISTING_URL)
+
+    with ReplayTransport(archive_path, replay_latency=False) as replay:
+        start = time.perf_counter()
+        replay.get(PROGRAMS_LISTING_URL)
+        assert time.perf_counter() - start < 0.05
+
+    with ReplayTransport(archive_path, replay_latency=True) as replay:
+        start = time.perf_counter()
+        assert replay.get(PROGRAMS_LISTING_URL).text == "slow"
+        assert time.perf_counter() - start >= 0.05
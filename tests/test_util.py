@@ -1,12 +1,32 @@
+import threading
+from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+from freezegun import freeze_time
 from pytest_mock import mocker
 import requests
 import pandas as pd
 from bs4 import BeautifulSoup
 
+from dawson_college_pyscrapper.cache import PageCache
 from dawson_college_pyscrapper.constants import DEFAULT_HEADERS
 from dawson_college_pyscrapper.exceptions import PageDetailsError
-from dawson_college_pyscrapper.util import get_date_of_modification, get_number_of_type, get_soup_of_page, parse_program_page
+from dawson_college_pyscrapper.models import ProgramPageData
+from dawson_college_pyscrapper.util import (
+    bounded_timeout,
+    canonicalize_url,
+    extract_program_page,
+    get_date_of_modification,
+    get_number_of_type,
+    get_soup_of_page,
+    parse_modified_date,
+    parse_program_page,
+    release_soup,
+    remaining_time,
+    sniff_encoding,
+)
 
 
 @pytest.fixture
@@ -15,6 +35,8 @@ def mock_successful_response():
         def __init__(self):
             self.ok = True
             self.text = '<html><body><p class="page-mod-date">Last Modified: 01-01-2022</p></body></html>'
+            self.content = self.text.encode()
+            self.headers = {"Content-Type": "text/html"}
             self.status_code = 200
 
     return Response()
@@ -26,6 +48,8 @@ def mock_successful_response_no_content():
         def __init__(self):
             self.ok = True
             self.text = "<html><body></body></html>"
+            self.content = self.text.encode()
+            self.headers = {"Content-Type": "text/html"}
             self.status_code = 200
 
     return Response()
@@ -37,6 +61,8 @@ def mock_failed_response():
         def __init__(self):
             self.ok = False
             self.text = ""
+            self.content = self.text.encode()
+            self.headers = {"Content-Type": "text/html"}
             self.status_code = 404
 
     return Response()
@@ -93,3 +119,192 @@ def test_get_number_of_type_some_types_found(mocker):
 
     result = get_number_of_type(df, "test")
     assert result == 2
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("/programs/program-name", "https://www.dawsoncollege.qc.ca/programs/program-name"),
+        ("//programs/program-name", "https://www.dawsoncollege.qc.ca/programs/program-name"),
+        ("programs/program-name/", "https://www.dawsoncollege.qc.ca/programs/program-name"),
+        ("HTTPS://WWW.DawsonCollege.qc.ca:443/programs//program-name#overview", "https://www.dawsoncollege.qc.ca/programs/program-name"),
+        ("https://www.dawsoncollege.qc.ca/programs?b=2&a=1", "https://www.dawsoncollege.qc.ca/programs?a=1&b=2"),
+        ("https://www.dawsoncollege.qc.ca", "https://www.dawsoncollege.qc.ca/"),
+        ("http://example.com:8080/page", "http://example.com:8080/page"),
+    ],
+)
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_parse_program_page_shares_concurrent_fetches_of_the_same_page(mocker, mock_successful_response):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_get(*args, **kwargs):
+        started.set()
+        release.wait(timeout=5)
+        return mock_successful_response
+
+    mocked_get = mocker.patch("requests.get", side_effect=slow_get)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        first = executor.submit(parse_program_page, "https://www.dawsoncollege.qc.ca/programs/program-name")
+        started.wait(timeout=5)
+        others = [
+            executor.submit(parse_program_page, "https://www.dawsoncollege.qc.ca//programs/program-name/"),
+            executor.submit(parse_program_page, "/programs/program-name"),
+        ]
+        time.sleep(0.2)
+        release.set()
+        results = [first.result()] + [other.result() for other in others]
+
+    assert all(result.date == "01-01-2022" for result in results)
+    mocked_get.assert_called_once()
+
+
+def test_get_soup_of_page_stores_page_in_cache(tmp_path, requests_mock):
+    url = "https://www.dawsoncollege.qc.ca/programs"
+    requests_mock.get(url, text="<html><body>fresh</body></html>", headers={"ETag": '"v1"'})
+    cache = PageCache(tmp_path)
+
+    soup = get_soup_of_page(url, cache=cache)
+
+    assert soup.body.text == "fresh"
+    assert cache.get(url).etag == '"v1"'
+
+
+def test_get_soup_of_page_revalidates_cached_page(tmp_path, requests_mock):
+    url = "https://www.dawsoncollege.qc.ca/programs"
+    cache = PageCache(tmp_path)
+    cache.set(url, "<html><body>cached</body></html>", etag='"v1"')
+    requests_mock.get(url, status_code=304)
+
+    soup = get_soup_of_page(url, cache=cache)
+
+    assert soup.body.text == "cached"
+    assert requests_mock.last_request.headers["If-None-Match"] == '"v1"'
+
+
+def test_get_soup_of_page_refreshes_revalidated_page(tmp_path, requests_mock):
+    url = "https://www.dawsoncollege.qc.ca/programs"
+    cache = PageCache(tmp_path, max_age=60)
+    with freeze_time("2023-01-20 08:00:00"):
+        cache.set(url, "<html><body>cached</body></html>", etag='"v1"', last_modified="Fri, 20 Jan 2023 07:00:00 GMT")
+    requests_mock.get(url, status_code=304, headers={"ETag": '"v2"'})
+
+    with freeze_time("2023-01-20 09:00:00"):
+        for _ in range(3):
+            assert get_soup_of_page(url, cache=cache).body.text == "cached"
+
+    # Only the first call revalidated the stale page, the next ones used it while it was fresh again.
+    assert requests_mock.call_count == 1
+    assert cache.get(url).etag == '"v2"'
+    assert cache.get(url).last_modified == "Fri, 20 Jan 2023 07:00:00 GMT"
+
+
+def test_get_soup_of_page_uses_fresh_cached_page_without_request(tmp_path, requests_mock):
+    url = "https://www.dawsoncollege.qc.ca/programs"
+    cache = PageCache(tmp_path, max_age=60)
+    cache.set(url, "<html><body>cached</body></html>")
+
+    soup = get_soup_of_page(url, cache=cache)
+
+    assert soup.body.text == "cached"
+    assert not requests_mock.called
+
+
+def test_release_soup_destroys_the_whole_tree():
+    soup = BeautifulSoup('<!DOCTYPE html><html><body><p class="page-mod-date">Last Modified: 01-01-2022</p></body></html>', "html.parser")
+    paragraph = soup.find("p")
+
+    release_soup(soup)
+
+    assert paragraph.contents == []
+    assert paragraph.parent is None
+
+
+@pytest.mark.parametrize(
+    "modified_date, expected",
+    [("January 20, 2023", datetime(2023, 1, 20)), (" March 2, 2022 ", datetime(2022, 3, 2)), ("", None), ("2023-01-20", None)],
+)
+def test_parse_modified_date(modified_date, expected):
+    assert parse_modified_date(modified_date) == expected
+
+
+def test_extract_program_page():
+    soup = BeautifulSoup(
+        "<html><head><meta name='description' content='Learn to program.'></head><body>"
+        "<h1>Computer Science</h1><span class='program-code'>420.B0</span><span class='program-campus'>Main campus</span>"
+        "<a href='mailto:cs@dawsoncollege.qc.ca?subject=Hi'>Email us</a><a href='/programs/other'>Other</a>"
+        "<a href='https://www.example.com/page#top'>Example</a><a href='https://www.example.com/page'>Again</a>"
+        "<p class='page-mod-date'>Last Modified: January 20, 2023</p></body></html>",
+        "html.parser",
+    )
+
+    assert extract_program_page(soup, "https://www.dawsoncollege.qc.ca/programs/computer-science") == ProgramPageData(
+        date="January 20, 2023",
+        title="Computer Science",
+        description="Learn to program.",
+        program_code="420.B0",
+        campus="Main campus",
+        contact="cs@dawsoncollege.qc.ca",
+        outbound_links=("https://www.example.com/page",),
+    )
+
+
+def test_extract_program_page_missing_fields():
+    soup = BeautifulSoup("<html><body><p>Nothing here</p></body></html>", "html.parser")
+
+    assert extract_program_page(soup, "https://www.dawsoncollege.qc.ca/programs/program-name") == ProgramPageData(date="")
+
+
+@pytest.mark.parametrize(
+    "content, headers, expected",
+    [
+        (b"<html></html>", {"Content-Type": "text/html; charset=ISO-8859-1"}, "iso8859-1"),
+        (b'<html><head><meta charset="windows-1252"></head></html>', {"Content-Type": "text/html; charset=utf-8"}, "utf-8"),
+        (b'<html><head><meta charset="windows-1252"></head></html>', {"Content-Type": "text/html"}, "cp1252"),
+        (b'<meta http-equiv="Content-Type" content="text/html; charset=UTF8">', None, "utf-8"),
+        (b'<meta charset="not-an-encoding">', {}, None),
+        (b" " * 1024 + b'<meta charset="windows-1252">', {}, None),
+        (b"<html></html>", {}, None),
+    ],
+)
+def test_sniff_encoding(content, headers, expected):
+    assert sniff_encoding(content, headers) == expected
+
+
+def test_get_soup_of_page_parses_bytes_with_the_declared_encoding(mocker, requests_mock):
+    apparent_encoding = mocker.patch.object(requests.models.Response, "apparent_encoding", new_callable=mocker.PropertyMock)
+    url = "https://www.dawsoncollege.qc.ca/programs/program-name"
+    requests_mock.get(
+        url,
+        content='<html><head><meta charset="iso-8859-1"></head><body><h1>Génie</h1></body></html>'.encode("iso-8859-1"),
+        headers={"Content-Type": "text/html"},
+    )
+
+    soup = get_soup_of_page(url)
+
+    assert soup.find("h1").get_text() == "Génie"
+    assert not apparent_encoding.called
+
+
+def test_get_soup_of_page_defaults_to_utf8(requests_mock):
+    url = "https://www.dawsoncollege.qc.ca/programs/program-name"
+    requests_mock.get(url, content="<html><body><h1>Génie</h1></body></html>".encode("utf-8"), headers={"Content-Type": "text/html"})
+
+    assert get_soup_of_page(url).find("h1").get_text() == "Génie"
+
+
+def test_bounded_timeout_does_not_outlive_the_deadline(mocker):
+    mocker.patch("time.monotonic", return_value=100.0)
+
+    assert remaining_time(None) is None
+    assert remaining_time(105.0) == 5.0
+    assert remaining_time(95.0) == 0.0
+    assert bounded_timeout(10, None) == 10
+    assert bounded_timeout(10, 105.0) == 5.0
+    assert bounded_timeout(2, 105.0) == 2
+    assert bounded_timeout(None, 105.0) == 5.0
+    assert bounded_timeout(10, 95.0) == 0.001
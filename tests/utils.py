@@ -1,5 +1,10 @@
+from datetime import datetime
+from typing import Optional
+
 from bs4 import BeautifulSoup, Tag
 
+from dawson_college_pyscrapper.models import GeneralMetrics, Program
+
 
 def get_valid_program_listing() -> Tag:
     """
@@ -59,3 +64,56 @@ def get_invalid_program_listing_empty() -> Tag:
     invalid_tag = soup.find(class_="program-listing")
 
     return invalid_tag
+
+
+def get_listing_html(*paths: str) -> str:
+    """
+    Used to create a programs listing page for testing purposes.
+
+    :param paths: The paths of the listed programs. Each program is named after its path.
+    :return: The HTML of the listing page
+    """
+    rows = "".join(
+        f'<tr><td class="program-name"><a href="{path}">{path}</a></td><td class="program-type">Program</td></tr>' for path in paths
+    )
+    return f'<html><body><div class="entry-content"><table>{rows}</table></div></body></html>'
+
+
+def get_program(name: str, program_type: str = "Program", modified_date: str = "January 1, 2023", url: Optional[str] = None) -> Program:
+    """
+    Used to create a program for testing purposes.
+
+    :param name: The name of the program.
+    :param program_type: The type of the program.
+    :param modified_date: The date the program page was last modified.
+    :param url: The URL of the program. Its page on the Dawson College website named after it by default.
+    :return: The program
+    """
+    return Program(
+        name=name, modified_date=modified_date, program_type=program_type, url=url or f"https://www.dawsoncollege.qc.ca/programs/{name}"
+    )
+
+
+def get_metrics(number_of_students: int = 1000, **fields) -> GeneralMetrics:
+    """
+    Used to create the metrics of a scrape of a single program for testing purposes.
+
+    :param number_of_students: The number of students.
+    :param fields: The other fields of the metrics to set instead of their default.
+    :return: The metrics
+    """
+    metrics = {
+        "date": datetime(2023, 1, 20),
+        "total_programs_offered": 1,
+        "number_of_programs": 1,
+        "number_of_profiles": 0,
+        "number_of_disciplines": 0,
+        "number_of_special_studies": 0,
+        "number_of_general_studies": 0,
+        "number_of_students": number_of_students,
+        "number_of_faculty": 50,
+        "total_year_counts": {"2023": 1},
+        "programs": [get_program("Program 1", modified_date="January 20, 2023", url="https://www.dawsoncollege.qc.ca/programs/program-1")],
+    }
+
+    return GeneralMetrics(**{**metrics, **fields})